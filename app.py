@@ -1,28 +1,107 @@
-from flask import Flask
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from services.accounts_service import accounts_bp
-from services.loans_service import loans_bp
-from services.transactions_service import transactions_bp
 from config import Config
+from models.cache import cache
+from database.connection import db
+from models.ledger_queue import ledger_queue
+from models.metrics import metrics
+from services.admin import admin_bp, install_request_profiling
+from services.serializers import dumps, loads
+import importlib
 
-def create_app():
+# Blueprint module and attribute for each service, so a per-service
+# container only imports (and ships) the blueprint it serves
+SERVICES = {
+    'accounts': ('services.accounts_service', 'accounts_bp'),
+    'loans': ('services.loans_service', 'loans_bp'),
+    'transactions': ('services.transactions_service', 'transactions_bp')
+}
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    JSON with exact money: request numbers with a fraction are read as
+    Decimal and Decimal is written as a JSON number (orjson if installed).
+    """
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default, sort_keys=self.sort_keys)
+    
+    def loads(self, s, **kwargs):
+        return loads(s, **kwargs)
+
+def create_app(services=None):
+    """Build the API with the given services (default: Config.SERVICES)"""
+    services = services or Config.SERVICES
+    
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = JSONProvider(app)
     
     # Enable CORS for all routes
     CORS(app)
     
+    if Config.METRICS_ENABLED:
+        @app.before_request
+        def start_request_metrics():
+            metrics.start_request()
+        
+        @app.after_request
+        def record_request_metrics(response):
+            # Label by URL rule, not path, so account numbers don't each get a series
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.finish_request(request.method, route, response.status_code)
+            return response
+    
     # Register service blueprints
-    app.register_blueprint(accounts_bp, url_prefix='/api')
-    app.register_blueprint(loans_bp, url_prefix='/api')
-    app.register_blueprint(transactions_bp, url_prefix='/api')
+    for name in services:
+        module_name, blueprint_name = SERVICES[name]
+        blueprint = getattr(importlib.import_module(module_name), blueprint_name)
+        app.register_blueprint(blueprint, url_prefix='/api')
+    
+    # Operator endpoints (/admin/...), disabled unless ADMIN_TOKEN is set
+    app.register_blueprint(admin_bp)
+    if Config.ADMIN_TOKEN:
+        install_request_profiling(app)
     
     @app.route('/')
+    @app.route('/health')
     def health_check():
-        return {'status': 'Banking System API is running', 'services': ['accounts', 'loans', 'transactions']}
+        return {'status': 'Banking System API is running', 'services': list(services)}
+    
+    @app.route('/livez')
+    def liveness():
+        # The process is serving requests; says nothing about MySQL
+        return {'status': 'alive'}
+    
+    @app.route('/readyz')
+    def readiness():
+        # Take traffic only once this process's pool is open; a cold pool
+        # starts warming here if nothing else has asked for it yet
+        db.warm_up()
+        health = db.health()
+        return health, 200 if health['pool'] == 'ready' else 503
+    
+    @app.route('/cache/stats')
+    def cache_stats():
+        return cache.stats()
+    
+    @app.route('/pool/stats')
+    def pool_stats():
+        return db.stats()
+    
+    @app.route('/ledger-queue/stats')
+    def ledger_queue_stats():
+        return ledger_queue.stats()
+    
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return metrics.render(db.stats()), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
     
     return app
 
 if __name__ == '__main__':
+    # Development server only; production runs wsgi:app under gunicorn
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    db.warm_up()
+    ledger_queue.start()
+    app.run(debug=Config.DEBUG, host='0.0.0.0', port=Config.PORT)
@@ -0,0 +1,240 @@
+from quart import Blueprint, Response, request, jsonify
+from asgi.connection import adb
+from asgi.models import Account, Customer, Onboarding
+from models.money import parse_money, money_or_zero
+from services.common import (
+    format_account, format_accounts, format_customers,
+    parse_onboarding_batch, format_onboarding_outcome, batch_summary,
+    EXPORT_COLUMNS, EXPORT_MIMETYPES, ExportWriter, export_options, export_headers, export_stream_async
+)
+from config import Config
+import logging
+
+# asyncio version of services/accounts_service.py: same routes, same JSON
+accounts_bp = Blueprint('accounts', __name__)
+
+@accounts_bp.route('/accounts', methods=['POST'])
+async def create_account():
+    """Add new account with customer details"""
+    try:
+        data = await request.get_json()
+        
+        # Validate required fields
+        required_fields = ['cust_name', 'cust_street', 'cust_city', 'branch_name', 'initial_balance']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        # Customer and account are created in one unit of work
+        async with adb.session() as session:
+            customer = await Customer.create(
+                cust_name=data['cust_name'],
+                cust_street=data['cust_street'],
+                cust_city=data['cust_city'],
+                session=session
+            )
+            account = await Account.create(
+                branch_name=data['branch_name'],
+                balance=parse_money(data['initial_balance']),
+                cust_id=customer.cust_id,
+                session=session
+            )
+        
+        return jsonify({
+            'message': 'Account created successfully',
+            'account': {
+                'acc_no': account.acc_no,
+                'branch_name': account.branch_name,
+                'balance': money_or_zero(account.balance),
+                'customer': customer.to_dict()
+            }
+        }), 201
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid initial_balance format'}), 400
+    except Exception as e:
+        logging.error(f"Error creating account: {e}")
+        return jsonify({'error': 'Failed to create account'}), 500
+
+@accounts_bp.route('/accounts:batch', methods=['POST'])
+async def create_accounts_batch():
+    """Onboard many customers, each with one account, using chunked multi-row inserts"""
+    try:
+        data = await request.get_json()
+        
+        if not data or not isinstance(data.get('accounts'), list):
+            return jsonify({'error': 'Missing required field: accounts'}), 400
+        
+        items = data['accounts']
+        if len(items) > Config.ONBOARDING_MAX_ITEMS:
+            return jsonify({
+                'error': f'Batch too large (max {Config.ONBOARDING_MAX_ITEMS} accounts)'
+            }), 400
+        
+        # Validate every item up front; only valid ones reach the database
+        results, valid_indexes, valid_rows = parse_onboarding_batch(items)
+        outcomes = await Onboarding.create_batch(valid_rows, chunk_size=Config.ONBOARDING_CHUNK_SIZE)
+        
+        for index, row, outcome in zip(valid_indexes, valid_rows, outcomes):
+            results[index] = format_onboarding_outcome(index, row, outcome)
+        
+        return jsonify(batch_summary(results, message='Batch onboarding processed')), 200
+        
+    except Exception as e:
+        logging.error(f"Error onboarding accounts: {e}")
+        return jsonify({'error': 'Failed to process onboarding batch'}), 500
+
+@accounts_bp.route('/accounts/export', methods=['GET'])
+async def export_accounts():
+    """Stream every account as CSV or NDJSON (``format``), gzipped if the client accepts it"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        rows = Account.iter_all(chunk_size=Config.STREAM_CHUNK_SIZE)
+        writer = ExportWriter(EXPORT_COLUMNS['accounts'], file_format, compress)
+        return Response(
+            export_stream_async(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('accounts', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format. Use: csv or ndjson'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting accounts: {e}")
+        return jsonify({'error': 'Failed to export accounts'}), 500
+
+@accounts_bp.route('/accounts/<int:acc_no>', methods=['GET'])
+async def get_account(acc_no):
+    """Get account details by account number"""
+    try:
+        account = await Account.get_by_id(acc_no)
+        
+        if not account:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        return jsonify({'account': format_account(account)}), 200
+        
+    except Exception as e:
+        logging.error(f"Error fetching account: {e}")
+        return jsonify({'error': 'Failed to fetch account'}), 500
+
+@accounts_bp.route('/accounts/<int:acc_no>', methods=['PUT'])
+async def update_account(acc_no):
+    """Edit account details"""
+    try:
+        data = await request.get_json()
+        
+        async with adb.session() as session:
+            account_data = await Account.get_by_id(acc_no, session=session)
+            if not account_data:
+                return jsonify({'error': 'Account not found'}), 404
+            
+            await Account.update(
+                acc_no,
+                branch_name=data.get('branch_name', account_data['branch_name']),
+                balance=parse_money(data['balance']) if 'balance' in data else None,
+                session=session
+            )
+            
+            # Update customer details if provided
+            if any(field in data for field in ['cust_name', 'cust_street', 'cust_city']):
+                customer = await Customer.get_by_id(account_data['cust_id'], session=session)
+                if customer:
+                    customer.cust_name = data.get('cust_name', customer.cust_name)
+                    customer.cust_street = data.get('cust_street', customer.cust_street)
+                    customer.cust_city = data.get('cust_city', customer.cust_city)
+                    await Customer.update(customer, session=session)
+            
+            updated_account = await Account.get_by_id(acc_no, session=session)
+        
+        return jsonify({
+            'message': 'Account updated successfully',
+            'account': format_account(updated_account)
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid balance format'}), 400
+    except Exception as e:
+        logging.error(f"Error updating account: {e}")
+        return jsonify({'error': 'Failed to update account'}), 500
+
+@accounts_bp.route('/accounts/<int:acc_no>', methods=['DELETE'])
+async def delete_account(acc_no):
+    """Delete account"""
+    try:
+        async with adb.session() as session:
+            account_data = await Account.get_by_id(acc_no, session=session)
+            if not account_data:
+                return jsonify({'error': 'Account not found'}), 404
+            
+            await Account.delete(acc_no, session=session)
+        
+        return jsonify({'message': 'Account deleted successfully'}), 200
+        
+    except Exception as e:
+        logging.error(f"Error deleting account: {e}")
+        return jsonify({'error': 'Failed to delete account'}), 500
+
+@accounts_bp.route('/accounts', methods=['GET'])
+async def list_accounts():
+    """List all accounts"""
+    try:
+        account_list = format_accounts(await Account.get_all())
+        
+        return jsonify({
+            'accounts': account_list,
+            'total': len(account_list)
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Error listing accounts: {e}")
+        return jsonify({'error': 'Failed to list accounts'}), 500
+
+@accounts_bp.route('/customers', methods=['GET'])
+async def list_customers():
+    """List all customers"""
+    try:
+        customer_list = format_customers(await Customer.get_all())
+        
+        return jsonify({
+            'customers': customer_list,
+            'total': len(customer_list)
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Error listing customers: {e}")
+        return jsonify({'error': 'Failed to list customers'}), 500
+
+@accounts_bp.route('/customers/export', methods=['GET'])
+async def export_customers():
+    """Stream every customer as CSV or NDJSON (``format``), gzipped if the client accepts it"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        rows = Customer.iter_all(chunk_size=Config.STREAM_CHUNK_SIZE)
+        writer = ExportWriter(EXPORT_COLUMNS['customers'], file_format, compress)
+        return Response(
+            export_stream_async(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('customers', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format. Use: csv or ndjson'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting customers: {e}")
+        return jsonify({'error': 'Failed to export customers'}), 500
+
+@accounts_bp.route('/customers/<int:cust_id>', methods=['GET'])
+async def get_customer(cust_id):
+    """Get customer details"""
+    try:
+        customer = await Customer.get_by_id(cust_id)
+        
+        if not customer:
+            return jsonify({'error': 'Customer not found'}), 404
+        
+        return jsonify({'customer': customer.to_dict()}), 200
+        
+    except Exception as e:
+        logging.error(f"Error fetching customer: {e}")
+        return jsonify({'error': 'Failed to fetch customer'}), 500
@@ -0,0 +1,105 @@
+from quart import Blueprint, Response, request, jsonify, g
+from asgi.connection import adb
+from models.metrics import metrics
+from models.profiler import profiler, format_stats, ProfilerBusyError
+from models.slow_queries import slow_queries
+from pymysql.err import MySQLError
+from services.common import admin_authorized, sample_options, profile_sort
+from config import Config
+from functools import wraps
+import asyncio
+import logging
+
+# asyncio version of services/admin.py. Everything runs on the event loop
+# thread, so both profiles see every request in flight, not just one.
+admin_bp = Blueprint('admin', __name__)
+
+# cProfile hooks the thread, so one ?profile=1 request at a time
+_request_profile = asyncio.Lock()
+
+def admin_required(view):
+    """asyncio version of ``services.admin.admin_required``"""
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        if not Config.ADMIN_TOKEN:
+            return jsonify({'error': 'Not found'}), 404
+        if not admin_authorized(request.headers):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return await view(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/admin/profile', methods=['GET'])
+@admin_required
+async def sample_profile():
+    try:
+        seconds, interval = sample_options(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        # Sample from a thread so the event loop keeps serving (and is what gets sampled)
+        stacks, ticks = await asyncio.to_thread(profiler.sample, seconds, interval)
+    except ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        logging.error(f"Error sampling profile: {e}")
+        return jsonify({'error': 'Failed to sample profile'}), 500
+    
+    return Response(stacks, mimetype='text/plain', headers={'X-Profile-Samples': str(ticks)})
+
+@admin_bp.route('/admin/slow-queries', methods=['GET'])
+@admin_required
+async def get_slow_queries():
+    refresh = request.args.get('refresh') == '1'
+    for key, statement, params in slow_queries.pending_explains(refresh):
+        try:
+            with metrics.operation('admin.explain'):
+                async with adb.cursor(dictionary=True) as cursor:
+                    await cursor.execute(f"EXPLAIN {statement}", params)
+                    slow_queries.set_plan(key, await cursor.fetchall())
+        except MySQLError as e:
+            logging.error(f"Error explaining slow query: {e}")
+            slow_queries.set_plan(key, {'error': str(e)})
+    
+    return jsonify({
+        'threshold_ms': Config.SLOW_QUERY_MS,
+        'queries': slow_queries.entries()
+    }), 200
+
+def install_request_profiling(app):
+    """asyncio version of ``services.admin.install_request_profiling``"""
+    @app.before_request
+    async def start_request_profile():
+        if request.args.get('profile') != '1':
+            return None
+        if not admin_authorized(request.headers):
+            return jsonify({'error': 'Unauthorized'}), 401
+        try:
+            g.profile_sort = profile_sort(request.args)
+            if _request_profile.locked():
+                raise ProfilerBusyError("A profile is already running")
+            profile = profiler.profile_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except ProfilerBusyError as e:
+            return jsonify({'error': str(e)}), 409
+        await _request_profile.acquire()
+        g.profile = profile
+        profile.enable()
+        return None
+    
+    @app.after_request
+    async def finish_request_profile(response):
+        profile = g.get('profile')
+        if profile is None:
+            return response
+        profile.disable()
+        return Response(format_stats(profile, g.profile_sort), status=response.status_code, mimetype='text/plain')
+    
+    @app.teardown_request
+    async def stop_request_profile(error=None):
+        # after_request is skipped when the view raises; this always runs
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.disable()
+            _request_profile.release()
@@ -0,0 +1,104 @@
+from quart import Quart, request
+from quart.json.provider import DefaultJSONProvider
+from quart_cors import cors
+from config import Config
+from models.cache import cache
+from asgi.connection import adb
+from models.metrics import metrics
+from asgi.admin import admin_bp, install_request_profiling
+from services.serializers import dumps, loads
+import importlib
+
+# Blueprint module and attribute for each service, so a per-service
+# container only imports the blueprint it serves
+SERVICES = {
+    'accounts': ('asgi.accounts_service', 'accounts_bp'),
+    'loans': ('asgi.loans_service', 'loans_bp'),
+    'transactions': ('asgi.transactions_service', 'transactions_bp')
+}
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    JSON with exact money: request numbers with a fraction are read as
+    Decimal and Decimal is written as a JSON number (orjson if installed).
+    """
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default, sort_keys=self.sort_keys)
+    
+    def loads(self, s, **kwargs):
+        return loads(s, **kwargs)
+
+def create_app(services=None):
+    """
+    asyncio/ASGI variant of the API, with the same ``/api/...`` routes.
+    
+    ``services`` limits which blueprints are registered (default:
+    Config.SERVICES). Serve with an ASGI server, e.g.
+    ``hypercorn asgi.app:app --bind 0.0.0.0:5000``.
+    """
+    services = services or Config.SERVICES
+    
+    app = Quart(__name__)
+    app.config.from_object(Config)
+    app.json = JSONProvider(app)
+    app = cors(app, allow_origin='*')
+    
+    for name in services:
+        module_name, blueprint_name = SERVICES[name]
+        blueprint = getattr(importlib.import_module(module_name), blueprint_name)
+        app.register_blueprint(blueprint, url_prefix='/api')
+    
+    if Config.METRICS_ENABLED:
+        # Async hooks, so they share the request task's context variables
+        @app.before_request
+        async def start_request_metrics():
+            metrics.start_request()
+        
+        @app.after_request
+        async def record_request_metrics(response):
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.finish_request(request.method, route, response.status_code)
+            return response
+    
+    @app.before_serving
+    async def warm_pool():
+        adb.warm_up()
+    
+    @app.after_serving
+    async def close_pool():
+        await adb.close()
+    
+    # Operator endpoints (/admin/...), disabled unless ADMIN_TOKEN is set
+    app.register_blueprint(admin_bp)
+    if Config.ADMIN_TOKEN:
+        install_request_profiling(app)
+    
+    @app.route('/')
+    async def health_check():
+        return {'status': 'Banking System API is running', 'services': list(services)}
+    
+    @app.route('/livez')
+    async def liveness():
+        return {'status': 'alive'}
+    
+    @app.route('/readyz')
+    async def readiness():
+        adb.warm_up()
+        health = adb.health()
+        return health, 200 if health['pool'] == 'ready' else 503
+    
+    @app.route('/cache/stats')
+    async def cache_stats():
+        return cache.stats()
+    
+    @app.route('/pool/stats')
+    async def pool_stats():
+        return adb.stats()
+    
+    @app.route('/metrics')
+    async def prometheus_metrics():
+        return metrics.render(adb.stats()), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    
+    return app
+
+app = create_app()
@@ -0,0 +1,302 @@
+import aiomysql
+from pymysql.constants import CLIENT
+from pymysql.err import MySQLError
+from config import Config
+from models.metrics import metrics
+from models.slow_queries import slow_queries
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+
+class AsyncDatabaseConnection:
+    """
+    asyncio counterpart of ``database.connection.DatabaseConnection``.
+    
+    Wraps an aiomysql pool of up to ASYNC_POOL_MAX_SIZE connections. The pool
+    is opened inside the running event loop, by ``warm_up()`` when serving
+    starts or on first use, and closed by ``close()`` on shutdown. Checkout waits up to POOL_TIMEOUT seconds; a
+    waiting request only parks its coroutine, so thousands of in-flight
+    requests can share the pool without a thread each.
+    """
+    def __init__(self):
+        self._pool = None
+        self._pool_lock = None
+        self._warmup_task = None
+        self._warmup_error = None
+        self._waiting = 0
+        self._metrics = {
+            'checkouts': 0,
+            'exhaustion_events': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0
+        }
+    
+    async def pool(self):
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    try:
+                        # FOUND_ROWS makes rowcount count matched rows, as
+                        # mysql-connector does by default
+                        self._pool = await aiomysql.create_pool(
+                            host=Config.MYSQL_HOST,
+                            user=Config.MYSQL_USER,
+                            password=Config.MYSQL_PASSWORD,
+                            db=Config.MYSQL_DATABASE,
+                            port=Config.MYSQL_PORT,
+                            minsize=Config.ASYNC_POOL_MIN_SIZE,
+                            maxsize=Config.ASYNC_POOL_MAX_SIZE,
+                            autocommit=True,
+                            client_flag=CLIENT.FOUND_ROWS
+                        )
+                        logging.info(f"Async MySQL connection pool created (max_size={Config.ASYNC_POOL_MAX_SIZE})")
+                    except MySQLError as e:
+                        logging.error(f"Error creating async connection pool: {e}")
+                        raise e
+        return self._pool
+    
+    def warm_up(self):
+        """Open the pool in a background task, retrying with backoff until MySQL answers"""
+        if self._pool is None and (self._warmup_task is None or self._warmup_task.done()):
+            self._warmup_task = asyncio.ensure_future(self._warm_up())
+    
+    async def _warm_up(self):
+        delay = 0.5
+        while self._pool is None:
+            try:
+                await self.pool()
+                self._warmup_error = None
+            except MySQLError as e:
+                self._warmup_error = str(e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, Config.POOL_WARMUP_MAX_BACKOFF)
+    
+    def health(self):
+        """Pool warm state: ``ready`` once open, else ``warming`` or ``cold``"""
+        if self._pool is not None:
+            state = 'ready'
+        elif self._warmup_task is not None and not self._warmup_task.done():
+            state = 'warming'
+        else:
+            state = 'cold'
+        return {'pool': state, 'last_error': self._warmup_error}
+    
+    async def get_connection(self):
+        pool = await self.pool()
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            connection = await asyncio.wait_for(pool.acquire(), timeout=Config.POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._metrics['exhaustion_events'] += 1
+            logging.error(f"Timed out after {Config.POOL_TIMEOUT}s waiting for a database connection")
+            raise
+        finally:
+            self._waiting -= 1
+        
+        waited = time.monotonic() - started
+        self._metrics['checkouts'] += 1
+        self._metrics['wait_time_total'] += waited
+        self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], waited)
+        metrics.record_checkout()
+        return connection
+    
+    def return_connection(self, connection):
+        if connection and self._pool is not None:
+            self._pool.release(connection)
+    
+    async def close(self):
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.close()
+            await pool.wait_closed()
+    
+    def stats(self):
+        """Pool sizing, utilisation and checkout wait metrics"""
+        stats = dict(self._metrics)
+        stats['in_use'] = self._pool.size - self._pool.freesize if self._pool else 0
+        stats['open'] = self._pool.size if self._pool else 0
+        stats['waiting'] = self._waiting
+        stats['pool_size'] = Config.ASYNC_POOL_MAX_SIZE
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+    
+    def session(self):
+        """Start a unit of work: ``async with adb.session() as session: ...``"""
+        return AsyncSession(self)
+    
+    @asynccontextmanager
+    async def cursor(self, session=None, dictionary=False, transaction=False):
+        """Cursor for a single model operation; same contract as ``db.cursor``"""
+        if session is not None:
+            cursor = await session.cursor(dictionary=dictionary)
+            if not transaction:
+                yield cursor
+                return
+            savepoint = session.savepoint()
+            await cursor.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield cursor
+            except BaseException:
+                await cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                raise
+            await cursor.execute(f"RELEASE SAVEPOINT {savepoint}")
+            return
+        
+        connection = await self.get_connection()
+        cursor = None
+        try:
+            if transaction:
+                await connection.begin()
+            cursor = timed(await connection.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor))
+            yield cursor
+            if transaction:
+                await connection.commit()
+        except BaseException:
+            if transaction:
+                await connection.rollback()
+            raise
+        finally:
+            if cursor:
+                await cursor.close()
+            self.return_connection(connection)
+    
+    def after_commit(self, session, callback):
+        """Run ``callback`` once the session commits, or right away without one"""
+        if session is not None:
+            session.after_commit(callback)
+        else:
+            callback()
+    
+    async def stream(self, query, params=None, chunk_size=1000):
+        """
+        Yield dict rows from an unbuffered (server-side) cursor, ``chunk_size`` at a time.
+        
+        The pooled connection is held until the generator is exhausted or closed.
+        """
+        connection = await self.get_connection()
+        cursor = None
+        try:
+            cursor = timed(await connection.cursor(aiomysql.SSDictCursor))
+            await cursor.execute(query, params or ())
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        except MySQLError as e:
+            logging.error(f"Error streaming query results: {e}")
+            raise e
+        finally:
+            try:
+                # Closing an unbuffered cursor drains any unread rows so the
+                # connection goes back to the pool in a clean state
+                if cursor:
+                    await cursor.close()
+            except MySQLError as e:
+                logging.error(f"Error closing streaming cursor: {e}")
+            self.return_connection(connection)
+
+class AsyncTimedCursor:
+    """asyncio counterpart of ``database.connection.TimedCursor``"""
+    def __init__(self, cursor):
+        self._cursor = cursor
+    
+    async def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.execute(query, args)
+        finally:
+            self._record(query, args, time.perf_counter() - started)
+    
+    async def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.executemany(query, args)
+        finally:
+            self._record(query, args, time.perf_counter() - started)
+    
+    @staticmethod
+    def _record(query, args, elapsed):
+        metrics.record_statement(elapsed)
+        slow_queries.observe(metrics.current_operation(), query, args, elapsed)
+    
+    def __aiter__(self):
+        return self._cursor.__aiter__()
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+def timed(cursor):
+    return AsyncTimedCursor(cursor) if metrics.enabled or slow_queries.enabled else cursor
+
+class AsyncSession:
+    """asyncio counterpart of ``database.connection.Session``"""
+    def __init__(self, database):
+        self._db = database
+        self.connection = None
+        self._cursors = {}
+        self._callbacks = []
+        self._closing = False
+        self._savepoints = 0
+    
+    async def __aenter__(self):
+        self.connection = await self._db.get_connection()
+        try:
+            await self.connection.begin()
+        except MySQLError:
+            self._db.return_connection(self.connection)
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._closing = True
+        try:
+            if exc_type is None:
+                await self.commit()
+            else:
+                await self.rollback()
+        finally:
+            for cursor in self._cursors.values():
+                try:
+                    await cursor.close()
+                except MySQLError:
+                    pass
+            self._cursors.clear()
+            self._db.return_connection(self.connection)
+        return False
+    
+    async def cursor(self, dictionary=False):
+        if dictionary not in self._cursors:
+            self._cursors[dictionary] = timed(await self.connection.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor))
+        return self._cursors[dictionary]
+    
+    def after_commit(self, callback):
+        self._callbacks.append(callback)
+    
+    def savepoint(self):
+        """Unique savepoint name for a nested atomic block"""
+        self._savepoints += 1
+        return f"sp_{self._savepoints}"
+    
+    async def commit(self):
+        """Commit the work so far; mid-session a new transaction is started"""
+        await self.connection.commit()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+        if not self._closing:
+            await self.connection.begin()
+    
+    async def rollback(self):
+        self._callbacks = []
+        await self.connection.rollback()
+
+# Global async database instance
+adb = AsyncDatabaseConnection()
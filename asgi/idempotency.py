@@ -0,0 +1,54 @@
+from quart import request, jsonify, make_response
+from asgi.connection import adb
+from asgi.models import Idempotency
+from models.idempotency import Idempotency as SyncIdempotency, IdempotencyConflictError
+from services.idempotency import IDEMPOTENCY_HEADER
+from functools import wraps
+import logging
+
+class _Discard(Exception):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+def idempotent(view):
+    """asyncio version of ``services.idempotency.idempotent``"""
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return await view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'}), 400
+        
+        endpoint = request.endpoint
+        request_hash = SyncIdempotency.request_hash(await request.get_data())
+        try:
+            stored = SyncIdempotency.cached(endpoint, key, request_hash)
+            if stored is None:
+                async with adb.session() as session:
+                    stored = await Idempotency.reserve(endpoint, key, request_hash, session)
+                    if stored is None:
+                        response = await make_response(await view(*args, session=session, **kwargs))
+                        if response.status_code >= 500:
+                            raise _Discard(response)
+                        await Idempotency.complete(
+                            endpoint, key, request_hash,
+                            response.status_code, await response.get_data(as_text=True), session
+                        )
+                        return response
+        except _Discard as discarded:
+            return discarded.response
+        except IdempotencyConflictError:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+        except Exception as e:
+            logging.error(f"Error handling idempotent request: {e}")
+            return jsonify({'error': 'Failed to process request'}), 500
+        
+        if stored.status_code is None:
+            return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+        replay = await make_response(stored.body, stored.status_code)
+        replay.mimetype = 'application/json'
+        replay.headers['Idempotent-Replayed'] = 'true'
+        return replay
+    return wrapper
@@ -0,0 +1,223 @@
+from quart import Blueprint, Response, request, jsonify
+from asgi.connection import adb
+from asgi.models import Loan, Customer
+from models.money import parse_money
+from services.common import (
+    LOAN_STATUSES, page_limit, loan_filters, loan_page, format_loan,
+    EXPORT_COLUMNS, EXPORT_MIMETYPES, ExportWriter, export_options, export_headers, export_stream_async
+)
+from config import Config
+import logging
+
+# asyncio version of services/loans_service.py: same routes, same JSON
+loans_bp = Blueprint('loans', __name__)
+
+@loans_bp.route('/loans', methods=['POST'])
+async def apply_for_loan():
+    """Apply for a new loan"""
+    try:
+        data = await request.get_json()
+        
+        # Validate required fields
+        required_fields = ['cust_id', 'branch_name', 'amount', 'installments']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        async with adb.session() as session:
+            customer = await Customer.get_by_id(data['cust_id'], session=session)
+            if not customer:
+                return jsonify({'error': 'Customer not found'}), 404
+            
+            amount = parse_money(data['amount'])
+            if amount <= 0:
+                return jsonify({'error': 'Loan amount must be positive'}), 400
+            
+            if data['installments'] <= 0:
+                return jsonify({'error': 'Installments must be positive'}), 400
+            
+            loan = await Loan.create(
+                branch_name=data['branch_name'],
+                amount=amount,
+                installments_remaining=data['installments'],
+                cust_id=data['cust_id'],
+                session=session
+            )
+        
+        return jsonify({
+            'message': 'Loan application submitted successfully',
+            'loan': {
+                'loan_no': loan.loan_no,
+                'branch_name': loan.branch_name,
+                'amount': loan.amount,
+                'status': loan.status,
+                'installments_remaining': loan.installments_remaining,
+                'customer': customer.to_dict()
+            }
+        }), 201
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid amount format'}), 400
+    except Exception as e:
+        logging.error(f"Error applying for loan: {e}")
+        return jsonify({'error': 'Failed to apply for loan'}), 500
+
+@loans_bp.route('/loans/<int:loan_no>', methods=['GET'])
+async def get_loan(loan_no):
+    """Get loan details by loan number"""
+    try:
+        loan = await Loan.get_by_id(loan_no)
+        
+        if not loan:
+            return jsonify({'error': 'Loan not found'}), 404
+        
+        return jsonify({'loan': format_loan(loan)}), 200
+        
+    except Exception as e:
+        logging.error(f"Error fetching loan: {e}")
+        return jsonify({'error': 'Failed to fetch loan'}), 500
+
+@loans_bp.route('/loans/<int:loan_no>/approve', methods=['PUT'])
+async def approve_loan(loan_no):
+    """Approve a loan"""
+    try:
+        async with adb.session() as session:
+            loan_data = await Loan.get_by_id(loan_no, session=session)
+            if not loan_data:
+                return jsonify({'error': 'Loan not found'}), 404
+            
+            if loan_data['status'] == 'approved':
+                return jsonify({'error': 'Loan is already approved'}), 400
+            
+            await Loan.approve(loan_no, session=session)
+            updated_loan = await Loan.get_by_id(loan_no, session=session)
+        
+        return jsonify({
+            'message': 'Loan approved successfully',
+            'loan': format_loan(updated_loan)
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Error approving loan: {e}")
+        return jsonify({'error': 'Failed to approve loan'}), 500
+
+@loans_bp.route('/loans/<int:loan_no>/installments', methods=['GET'])
+async def get_remaining_installments(loan_no):
+    """Get remaining installments for a loan"""
+    try:
+        loan = await Loan.get_by_id(loan_no)
+        
+        if not loan:
+            return jsonify({'error': 'Loan not found'}), 404
+        
+        return jsonify({
+            'loan_no': loan['loan_no'],
+            'installments_remaining': loan['installments_remaining'],
+            'amount': loan['amount'],
+            'status': loan['status'],
+            'customer': {
+                'cust_id': loan['cust_id'],
+                'cust_name': loan['cust_name']
+            }
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Error fetching installments: {e}")
+        return jsonify({'error': 'Failed to fetch installments'}), 500
+
+@loans_bp.route('/loans/<int:loan_no>/installments', methods=['PUT'])
+async def update_installments(loan_no):
+    """Update remaining installments (for payment processing)"""
+    try:
+        data = await request.get_json()
+        
+        if 'installments_remaining' not in data:
+            return jsonify({'error': 'Missing installments_remaining field'}), 400
+        
+        async with adb.session() as session:
+            loan_data = await Loan.get_by_id(loan_no, session=session)
+            if not loan_data:
+                return jsonify({'error': 'Loan not found'}), 404
+            
+            new_installments = data['installments_remaining']
+            if new_installments < 0:
+                return jsonify({'error': 'Installments remaining cannot be negative'}), 400
+            
+            await Loan.update_installments(loan_no, new_installments, session=session)
+            updated_loan = await Loan.get_by_id(loan_no, session=session)
+        
+        return jsonify({
+            'message': 'Installments updated successfully',
+            'loan': {
+                'loan_no': updated_loan['loan_no'],
+                'installments_remaining': updated_loan['installments_remaining'],
+                'amount': updated_loan['amount'],
+                'status': updated_loan['status']
+            }
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Error updating installments: {e}")
+        return jsonify({'error': 'Failed to update installments'}), 500
+
+@loans_bp.route('/loans', methods=['GET'])
+async def list_loans():
+    """List loans ordered by loan number, with the same filters as the sync service"""
+    try:
+        status = request.args.get('status')
+        if status is not None and status not in LOAN_STATUSES:
+            return jsonify({'error': 'Invalid status. Use: pending, approved, or rejected'}), 400
+        
+        return jsonify(await _loan_page(status)), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid filter or pagination parameter'}), 400
+    except Exception as e:
+        logging.error(f"Error listing loans: {e}")
+        return jsonify({'error': 'Failed to list loans'}), 500
+
+@loans_bp.route('/loans/export', methods=['GET'])
+async def export_loans():
+    """Stream loans as CSV or NDJSON (``format``), with the same filters as GET /loans"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        status = request.args.get('status')
+        if status is not None and status not in LOAN_STATUSES:
+            return jsonify({'error': 'Invalid status. Use: pending, approved, or rejected'}), 400
+        
+        rows = Loan.iter_find(chunk_size=Config.STREAM_CHUNK_SIZE, **loan_filters(request.args, status))
+        writer = ExportWriter(EXPORT_COLUMNS['loans'], file_format, compress)
+        return Response(
+            export_stream_async(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('loans', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format or filter'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting loans: {e}")
+        return jsonify({'error': 'Failed to export loans'}), 500
+
+@loans_bp.route('/loans/status/<status>', methods=['GET'])
+async def get_loans_by_status(status):
+    """Get loans by status (pending, approved, rejected)"""
+    try:
+        if status not in LOAN_STATUSES:
+            return jsonify({'error': 'Invalid status. Use: pending, approved, or rejected'}), 400
+        
+        page = await _loan_page(status)
+        page['status'] = status
+        
+        return jsonify(page), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid filter or pagination parameter'}), 400
+    except Exception as e:
+        logging.error(f"Error fetching loans by status: {e}")
+        return jsonify({'error': 'Failed to fetch loans by status'}), 500
+
+async def _loan_page(status):
+    limit = page_limit(request.args)
+    loans = await Loan.find(limit=limit + 1, **loan_filters(request.args, status))
+    return loan_page(loans, limit)
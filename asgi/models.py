@@ -0,0 +1,655 @@
+from asgi.connection import adb
+from models.account import Account as SyncAccount
+from models.account_stats import AccountStats as SyncAccountStats, STAT_COLUMNS
+from models.cache import cache, account_key, customer_key
+from models.customer import Customer as SyncCustomer
+from models.idempotency import Idempotency as SyncIdempotency, IdempotencyConflictError, StoredResponse
+from models.ledger import Ledger as SyncLedger, BalanceChange, AccountNotFoundError, InsufficientBalanceError
+from models.loan import Loan as SyncLoan
+from models.onboarding import Onboarding as SyncOnboarding, InterleavedIdsError
+from models.transaction import Transaction as SyncTransaction, TRANSACTION_LIST_COLUMNS
+from models.transaction_archive import transaction_archive
+from models.metrics import instrument
+from pymysql.constants import ER
+from pymysql.err import MySQLError, IntegrityError
+from config import Config
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+# asyncio versions of the model methods used by the services. They run the
+# same SQL as models/ (sharing its query builders) on the aiomysql pool and
+# return the same rows and objects, so the ASGI blueprints can reuse the
+# response shaping in services/common.py unchanged.
+
+@instrument
+class Account:
+    @staticmethod
+    async def create(branch_name, balance, cust_id, session=None):
+        try:
+            async with adb.cursor(session) as cursor:
+                query = """
+                INSERT INTO Account (branch_name, balance, cust_id)
+                VALUES (%s, %s, %s)
+                """
+                await cursor.execute(query, (branch_name, balance, cust_id))
+                acc_no = cursor.lastrowid
+            
+            return SyncAccount(acc_no, branch_name, balance, cust_id)
+        except MySQLError as e:
+            logging.error(f"Error creating account: {e}")
+            raise e
+    
+    @staticmethod
+    async def get_by_id(acc_no, session=None):
+        """Account joined with its customer, served from the read-through cache"""
+        if session is not None:
+            return await Account._fetch_by_id(acc_no, session)
+        return await cache.get_or_load_async(account_key(acc_no), lambda: Account._fetch_by_id(acc_no))
+    
+    @staticmethod
+    async def _fetch_by_id(acc_no, session=None):
+        try:
+            async with adb.cursor(session, dictionary=True) as cursor:
+                query = """
+                SELECT a.*, c.cust_name, c.cust_street, c.cust_city
+                FROM Account a
+                JOIN Customer c ON a.cust_id = c.cust_id
+                WHERE a.acc_no = %s
+                """
+                await cursor.execute(query, (acc_no,))
+                return await cursor.fetchone()
+        except MySQLError as e:
+            logging.error(f"Error fetching account: {e}")
+            raise e
+    
+    @staticmethod
+    async def get_all(session=None):
+        """Every account with its customer, as tuples in ACCOUNT_COLUMNS order"""
+        try:
+            async with adb.cursor(session) as cursor:
+                await cursor.execute(SyncAccount._all_query())
+                return list(await cursor.fetchall())
+        except MySQLError as e:
+            logging.error(f"Error fetching accounts: {e}")
+            raise e
+    
+    @staticmethod
+    def iter_all(chunk_size=1000):
+        """Async-iterate every account with its customer, by acc_no, from a server-side cursor"""
+        return adb.stream(SyncAccount._all_query(), chunk_size=chunk_size)
+    
+    @staticmethod
+    async def update(acc_no, branch_name, balance=None, session=None):
+        """See ``models.account.Account.update``: a None balance is left alone"""
+        try:
+            async with adb.cursor(session) as cursor:
+                if balance is None:
+                    query = "UPDATE Account SET branch_name = %s WHERE acc_no = %s"
+                    await cursor.execute(query, (branch_name, acc_no))
+                else:
+                    query = """
+                    UPDATE Account
+                    SET branch_name = %s, balance = %s
+                    WHERE acc_no = %s
+                    """
+                    await cursor.execute(query, (branch_name, balance, acc_no))
+            
+            adb.after_commit(session, lambda: cache.invalidate(account_key(acc_no)))
+            return True
+        except MySQLError as e:
+            logging.error(f"Error updating account: {e}")
+            raise e
+    
+    @staticmethod
+    async def delete(acc_no, session=None):
+        try:
+            async with adb.cursor(session, transaction=True) as cursor:
+                # Transaction is partitioned, so it cannot cascade from a foreign key
+                await cursor.execute("DELETE FROM Transaction WHERE acc_no = %s", (acc_no,))
+                await cursor.execute("DELETE FROM Account WHERE acc_no = %s", (acc_no,))
+            
+            adb.after_commit(session, lambda: cache.invalidate(account_key(acc_no)))
+            return True
+        except MySQLError as e:
+            logging.error(f"Error deleting account: {e}")
+            raise e
+
+@instrument
+class Customer:
+    @staticmethod
+    async def create(cust_name, cust_street, cust_city, session=None):
+        try:
+            async with adb.cursor(session) as cursor:
+                query = """
+                INSERT INTO Customer (cust_name, cust_street, cust_city)
+                VALUES (%s, %s, %s)
+                """
+                await cursor.execute(query, (cust_name, cust_street, cust_city))
+                cust_id = cursor.lastrowid
+            
+            return SyncCustomer(cust_id, cust_name, cust_street, cust_city)
+        except MySQLError as e:
+            logging.error(f"Error creating customer: {e}")
+            raise e
+    
+    @staticmethod
+    async def get_by_id(cust_id, session=None):
+        """Customer by id, served from the read-through cache"""
+        if session is not None:
+            row = await Customer._fetch_by_id(cust_id, session)
+        else:
+            row = await cache.get_or_load_async(customer_key(cust_id), lambda: Customer._fetch_by_id(cust_id))
+        if row:
+            return SyncCustomer(**row)
+        return None
+    
+    @staticmethod
+    async def _fetch_by_id(cust_id, session=None):
+        try:
+            async with adb.cursor(session, dictionary=True) as cursor:
+                query = "SELECT cust_id, cust_name, cust_street, cust_city FROM Customer WHERE cust_id = %s"
+                await cursor.execute(query, (cust_id,))
+                return await cursor.fetchone()
+        except MySQLError as e:
+            logging.error(f"Error fetching customer: {e}")
+            raise e
+    
+    @staticmethod
+    async def get_all(session=None):
+        """Every customer as tuples in CUSTOMER_COLUMNS order"""
+        try:
+            async with adb.cursor(session) as cursor:
+                await cursor.execute(SyncCustomer._all_query())
+                return list(await cursor.fetchall())
+        except MySQLError as e:
+            logging.error(f"Error fetching customers: {e}")
+            raise e
+    
+    @staticmethod
+    def iter_all(chunk_size=1000):
+        """Async-iterate every customer row by cust_id from a server-side cursor"""
+        return adb.stream(SyncCustomer._all_query(), chunk_size=chunk_size)
+    
+    @staticmethod
+    async def update(customer, session=None):
+        try:
+            async with adb.cursor(session) as cursor:
+                query = """
+                UPDATE Customer
+                SET cust_name = %s, cust_street = %s, cust_city = %s
+                WHERE cust_id = %s
+                """
+                await cursor.execute(query, (customer.cust_name, customer.cust_street, customer.cust_city, customer.cust_id))
+                
+                # Cached account rows embed the customer's name and address
+                await cursor.execute("SELECT acc_no FROM Account WHERE cust_id = %s", (customer.cust_id,))
+                keys = [customer_key(customer.cust_id)] + [account_key(row[0]) for row in await cursor.fetchall()]
+            
+            adb.after_commit(session, lambda: cache.invalidate(*keys))
+            return True
+        except MySQLError as e:
+            logging.error(f"Error updating customer: {e}")
+            raise e
+
+@instrument
+class Loan:
+    @staticmethod
+    async def create(branch_name, amount, installments_remaining, cust_id, session=None):
+        try:
+            async with adb.cursor(session, transaction=True) as cursor:
+                loan_query = """
+                INSERT INTO Loan (branch_name, amount, status, installments_remaining)
+                VALUES (%s, %s, %s, %s)
+                """
+                await cursor.execute(loan_query, (branch_name, amount, 'pending', installments_remaining))
+                loan_no = cursor.lastrowid
+                
+                borrower_query = "INSERT INTO Borrower (cust_id, loan_no) VALUES (%s, %s)"
+                await cursor.execute(borrower_query, (cust_id, loan_no))
+            
+            return SyncLoan(loan_no, branch_name, amount, 'pending', installments_remaining)
+        except MySQLError as e:
+            logging.error(f"Error creating loan: {e}")
+            raise e
+    
+    @staticmethod
+    async def get_by_id(loan_no, session=None):
+        try:
+            async with adb.cursor(session, dictionary=True) as cursor:
+                query = """
+                SELECT l.*, c.cust_name, c.cust_id
+                FROM Loan l
+                JOIN Borrower b ON l.loan_no = b.loan_no
+                JOIN Customer c ON b.cust_id = c.cust_id
+                WHERE l.loan_no = %s
+                """
+                await cursor.execute(query, (loan_no,))
+                return await cursor.fetchone()
+        except MySQLError as e:
+            logging.error(f"Error fetching loan: {e}")
+            raise e
+    
+    @staticmethod
+    async def find(status=None, branch_name=None, cust_id=None, min_amount=None, max_amount=None,
+                   limit=None, after_loan_no=None, session=None):
+        """Filtered, keyset-paginated loans; see ``models.loan.Loan.find``"""
+        query, params = SyncLoan._find_query(status, branch_name, cust_id, min_amount, max_amount, limit, after_loan_no)
+        try:
+            async with adb.cursor(session) as cursor:
+                await cursor.execute(query, params)
+                return list(await cursor.fetchall())
+        except MySQLError as e:
+            logging.error(f"Error fetching loans: {e}")
+            raise e
+    
+    @staticmethod
+    def iter_find(status=None, branch_name=None, cust_id=None, min_amount=None, max_amount=None,
+                  after_loan_no=None, chunk_size=1000):
+        """Async-iterate every matching loan by loan_no from a server-side cursor"""
+        query, params = SyncLoan._find_query(status, branch_name, cust_id, min_amount, max_amount, None, after_loan_no)
+        return adb.stream(query, params, chunk_size=chunk_size)
+    
+    @staticmethod
+    async def approve(loan_no, session=None):
+        try:
+            async with adb.cursor(session) as cursor:
+                await cursor.execute("UPDATE Loan SET status = 'approved' WHERE loan_no = %s", (loan_no,))
+            return True
+        except MySQLError as e:
+            logging.error(f"Error approving loan: {e}")
+            raise e
+    
+    @staticmethod
+    async def update_installments(loan_no, remaining, session=None):
+        try:
+            async with adb.cursor(session) as cursor:
+                query = "UPDATE Loan SET installments_remaining = %s WHERE loan_no = %s"
+                await cursor.execute(query, (remaining, loan_no))
+            return True
+        except MySQLError as e:
+            logging.error(f"Error updating installments: {e}")
+            raise e
+
+@instrument
+class Transaction:
+    @staticmethod
+    async def get_by_account(acc_no, limit=None, before=None, after=None, date_from=None, date_to=None, session=None):
+        """An account's transactions newest first; see ``models.transaction.Transaction.get_by_account``"""
+        try:
+            # Archive files are read off the event loop
+            archived = []
+            if after:
+                archived = await asyncio.to_thread(
+                    transaction_archive.account_rows, acc_no, limit, None, after, date_from, date_to
+                )
+                if archived:
+                    after = SyncTransaction._position(archived[-1])
+            
+            results = []
+            async with adb.cursor(session) as cursor:
+                for window_from, window_to in SyncTransaction._windows(before, after, date_from, date_to):
+                    remaining = SyncTransaction._remaining(limit, len(archived) + len(results))
+                    if remaining == 0:
+                        break
+                    query, params = SyncTransaction._account_query(acc_no, remaining, before, after, window_from, window_to)
+                    await cursor.execute(query, params)
+                    results.extend(await cursor.fetchall())
+            
+            if after:
+                results = archived + results
+                results.reverse()
+                return results
+            
+            remaining = SyncTransaction._remaining(limit, len(results))
+            if remaining != 0:
+                older = SyncTransaction._position(results[-1]) if results else before
+                results.extend(await asyncio.to_thread(
+                    transaction_archive.account_rows, acc_no, remaining, older, None, date_from, date_to
+                ))
+            return results
+        except MySQLError as e:
+            logging.error(f"Error fetching transactions: {e}")
+            raise e
+    
+    @staticmethod
+    async def get_all(limit=None, before=None, session=None):
+        try:
+            results = []
+            async with adb.cursor(session) as cursor:
+                for window_from, window_to in SyncTransaction._windows(before, None, None, None):
+                    remaining = SyncTransaction._remaining(limit, len(results))
+                    if remaining == 0:
+                        break
+                    query, params = SyncTransaction._all_query(remaining, before, window_from, window_to)
+                    await cursor.execute(query, params)
+                    results.extend(await cursor.fetchall())
+            
+            remaining = SyncTransaction._remaining(limit, len(results))
+            if remaining != 0:
+                older = SyncTransaction._position(results[-1]) if results else before
+                archived = await asyncio.to_thread(transaction_archive.newest_rows, remaining, older)
+                if archived:
+                    async with adb.cursor(session) as cursor:
+                        await cursor.execute(*SyncTransaction._names_query({row[1] for row in archived}))
+                        names = {acc_no: (branch_name, cust_name) for acc_no, branch_name, cust_name in await cursor.fetchall()}
+                    results.extend(row + names.get(row[1], (None, None)) for row in archived)
+            return results
+        except MySQLError as e:
+            logging.error(f"Error fetching all transactions: {e}")
+            raise e
+    
+    @staticmethod
+    async def iter_all(before=None, chunk_size=1000):
+        """Async-iterate every transaction newest first, live rows then the archived months"""
+        position = before
+        async for row in adb.stream(*SyncTransaction._all_query(None, before), chunk_size=chunk_size):
+            position = (row['date_time'], row['txn_id'])
+            yield row
+        
+        while True:
+            archived = await asyncio.to_thread(transaction_archive.newest_rows, chunk_size, position)
+            if not archived:
+                return
+            async with adb.cursor() as cursor:
+                await cursor.execute(*SyncTransaction._names_query({row[1] for row in archived}))
+                names = {acc_no: (branch_name, cust_name) for acc_no, branch_name, cust_name in await cursor.fetchall()}
+            for row in archived:
+                yield dict(zip(TRANSACTION_LIST_COLUMNS, row + names.get(row[1], (None, None))))
+            position = SyncTransaction._position(archived[-1])
+
+@instrument
+class AccountStats:
+    @staticmethod
+    async def get(acc_no, session=None):
+        """Per-type totals and counts for an account (zeros if it has no activity)"""
+        try:
+            async with adb.cursor(session, dictionary=True) as cursor:
+                query = f"SELECT {', '.join(STAT_COLUMNS)} FROM AccountStats WHERE acc_no = %s"
+                await cursor.execute(query, (acc_no,))
+                result = await cursor.fetchone()
+            
+            return SyncAccountStats._summary(result)
+        except MySQLError as e:
+            logging.error(f"Error fetching account stats: {e}")
+            raise e
+    
+    @staticmethod
+    async def record(cursor, entries):
+        statement = SyncAccountStats._record_query(entries)
+        if statement:
+            await cursor.execute(*statement)
+
+@instrument
+class Ledger:
+    """asyncio version of ``models.ledger.Ledger`` with the same locking and error semantics"""
+    
+    @staticmethod
+    async def deposit(acc_no, amount, session=None):
+        try:
+            async with adb.cursor(session, transaction=True) as cursor:
+                new_balance = await Ledger._credit(cursor, acc_no, amount)
+                transaction = await Ledger._record(cursor, acc_no, 'deposit', amount)
+                await AccountStats.record(cursor, [(acc_no, 'deposit', amount)])
+            
+            adb.after_commit(session, lambda: cache.invalidate(account_key(acc_no)))
+            return BalanceChange(acc_no, new_balance - amount, new_balance, transaction)
+        except MySQLError as e:
+            logging.error(f"Error processing deposit: {e}")
+            raise e
+    
+    @staticmethod
+    async def withdraw(acc_no, amount, session=None):
+        try:
+            async with adb.cursor(session, transaction=True) as cursor:
+                new_balance = await Ledger._debit(cursor, acc_no, amount)
+                transaction = await Ledger._record(cursor, acc_no, 'withdrawal', amount)
+                await AccountStats.record(cursor, [(acc_no, 'withdrawal', amount)])
+            
+            adb.after_commit(session, lambda: cache.invalidate(account_key(acc_no)))
+            return BalanceChange(acc_no, new_balance + amount, new_balance, transaction)
+        except MySQLError as e:
+            logging.error(f"Error processing withdrawal: {e}")
+            raise e
+    
+    @staticmethod
+    async def transfer(from_acc_no, to_acc_no, amount, session=None):
+        """Move funds between two accounts, returning (debit, credit) BalanceChanges"""
+        try:
+            async with adb.cursor(session, transaction=True) as cursor:
+                # Ascending acc_no order, as in the sync ledger, to avoid deadlocks
+                new_balances = {}
+                for acc_no in sorted((from_acc_no, to_acc_no), key=int):
+                    if acc_no == from_acc_no:
+                        new_balances[acc_no] = await Ledger._debit(cursor, acc_no, amount)
+                    else:
+                        new_balances[acc_no] = await Ledger._credit(cursor, acc_no, amount)
+                
+                now = datetime.now()
+                withdrawal_txn = await Ledger._record(cursor, from_acc_no, 'transfer_out', amount, now)
+                deposit_txn = await Ledger._record(cursor, to_acc_no, 'transfer_in', amount, now)
+                await AccountStats.record(cursor, [
+                    (from_acc_no, 'transfer_out', amount),
+                    (to_acc_no, 'transfer_in', amount)
+                ])
+            
+            adb.after_commit(session, lambda: cache.invalidate(account_key(from_acc_no), account_key(to_acc_no)))
+            
+            from_balance = new_balances[from_acc_no]
+            to_balance = new_balances[to_acc_no]
+            return (
+                BalanceChange(from_acc_no, from_balance + amount, from_balance, withdrawal_txn),
+                BalanceChange(to_acc_no, to_balance - amount, to_balance, deposit_txn)
+            )
+        except MySQLError as e:
+            logging.error(f"Error processing transfer: {e}")
+            raise e
+    
+    @staticmethod
+    async def transfer_batch(transfers, commit_size=200):
+        """Apply many transfers with grouped commits; see ``models.ledger.Ledger.transfer_batch``"""
+        results = []
+        for start in range(0, len(transfers), commit_size):
+            results.extend(await Ledger._apply_transfer_group(transfers[start:start + commit_size]))
+        return results
+    
+    @staticmethod
+    async def _apply_transfer_group(transfers):
+        try:
+            async with adb.cursor(transaction=True) as cursor:
+                acc_nos = sorted({int(acc_no) for item in transfers for acc_no in item[:2]})
+                placeholders = ', '.join(['%s'] * len(acc_nos))
+                await cursor.execute(
+                    f"SELECT acc_no, balance FROM Account WHERE acc_no IN ({placeholders}) "
+                    f"ORDER BY acc_no FOR UPDATE",
+                    acc_nos
+                )
+                balances = dict(await cursor.fetchall())
+                
+                results, ledger_rows, touched = SyncLedger._plan_transfer_group(transfers, balances)
+                
+                if touched:
+                    await cursor.execute(*SyncLedger._balance_update_query(touched, balances))
+                    await cursor.executemany(
+                        "INSERT INTO Transaction (acc_no, type, amount, date_time) VALUES (%s, %s, %s, %s)",
+                        ledger_rows
+                    )
+                    await AccountStats.record(cursor, [row[:3] for row in ledger_rows])
+            
+            cache.invalidate(*[account_key(acc_no) for acc_no in touched])
+            return results
+        except MySQLError as e:
+            logging.error(f"Error processing transfer batch: {e}")
+            return [e] * len(transfers)
+    
+    @staticmethod
+    async def _credit(cursor, acc_no, amount):
+        await cursor.execute("UPDATE Account SET balance = balance + %s WHERE acc_no = %s", (amount, acc_no))
+        if cursor.rowcount == 0:
+            raise AccountNotFoundError(acc_no)
+        return await Ledger._current_balance(cursor, acc_no)
+    
+    @staticmethod
+    async def _debit(cursor, acc_no, amount):
+        query = """
+        UPDATE Account
+        SET balance = balance - %s
+        WHERE acc_no = %s AND balance >= %s
+        """
+        await cursor.execute(query, (amount, acc_no, amount))
+        if cursor.rowcount == 0:
+            current_balance = await Ledger._current_balance(cursor, acc_no)
+            if current_balance is None:
+                raise AccountNotFoundError(acc_no)
+            raise InsufficientBalanceError(acc_no, current_balance, amount)
+        return await Ledger._current_balance(cursor, acc_no)
+    
+    @staticmethod
+    async def _current_balance(cursor, acc_no):
+        await cursor.execute("SELECT balance FROM Account WHERE acc_no = %s", (acc_no,))
+        result = await cursor.fetchone()
+        return result[0] if result else None
+    
+    @staticmethod
+    async def _record(cursor, acc_no, transaction_type, amount, date_time=None):
+        query = """
+        INSERT INTO Transaction (acc_no, type, amount, date_time)
+        VALUES (%s, %s, %s, %s)
+        """
+        date_time = date_time or datetime.now()
+        await cursor.execute(query, (acc_no, transaction_type, amount, date_time))
+        return SyncTransaction(cursor.lastrowid, acc_no, transaction_type, amount, date_time)
+
+@instrument
+class Idempotency:
+    """asyncio version of ``models.idempotency.Idempotency``; shares its response cache"""
+    
+    @staticmethod
+    async def reserve(endpoint, key, request_hash, session):
+        try:
+            async with adb.cursor(session) as cursor:
+                insert = """
+                INSERT INTO IdempotencyKey (endpoint, idem_key, request_hash, expires_at)
+                VALUES (%s, %s, %s, %s)
+                """
+                params = (endpoint, key, request_hash, datetime.now() + timedelta(hours=Config.IDEMPOTENCY_TTL))
+                try:
+                    await cursor.execute(insert, params)
+                    return None
+                except IntegrityError as e:
+                    if e.args[0] != ER.DUP_ENTRY:
+                        raise e
+                
+                await cursor.execute(
+                    """
+                    SELECT request_hash, status_code, response_body, expires_at
+                    FROM IdempotencyKey
+                    WHERE endpoint = %s AND idem_key = %s
+                    LOCK IN SHARE MODE
+                    """,
+                    (endpoint, key)
+                )
+                row = await cursor.fetchone()
+                if row is None or row[3] < datetime.now():
+                    await cursor.execute("DELETE FROM IdempotencyKey WHERE endpoint = %s AND idem_key = %s", (endpoint, key))
+                    await cursor.execute(insert, params)
+                    return None
+            
+            stored_hash, status_code, body, _ = row
+            if stored_hash != request_hash:
+                raise IdempotencyConflictError(key)
+            SyncIdempotency._recent.set(f"{endpoint}:{key}", (stored_hash, status_code, body))
+            return StoredResponse(status_code, body)
+        except MySQLError as e:
+            logging.error(f"Error reserving idempotency key: {e}")
+            raise e
+    
+    @staticmethod
+    async def complete(endpoint, key, request_hash, status_code, body, session):
+        try:
+            async with adb.cursor(session) as cursor:
+                query = """
+                UPDATE IdempotencyKey
+                SET status_code = %s, response_body = %s
+                WHERE endpoint = %s AND idem_key = %s
+                """
+                await cursor.execute(query, (status_code, body, endpoint, key))
+            
+            session.after_commit(lambda: SyncIdempotency._recent.set(f"{endpoint}:{key}", (request_hash, status_code, body)))
+            return True
+        except MySQLError as e:
+            logging.error(f"Error storing idempotent response: {e}")
+            raise e
+
+@instrument
+class Onboarding:
+    """asyncio version of ``models.onboarding.Onboarding`` with the same chunking and fallback"""
+    
+    @staticmethod
+    async def create_batch(rows, chunk_size=500):
+        results = []
+        for start in range(0, len(rows), chunk_size):
+            results.extend(await Onboarding._create_chunk(rows[start:start + chunk_size]))
+        return results
+    
+    @staticmethod
+    async def _create_chunk(rows):
+        try:
+            async with adb.session() as session:
+                try:
+                    async with adb.cursor(session, transaction=True) as cursor:
+                        return await Onboarding._insert(cursor, rows)
+                except (MySQLError, InterleavedIdsError) as e:
+                    if len(rows) == 1:
+                        return [e]
+                    logging.info(f"Onboarding chunk of {len(rows)} rows falls back to single-row inserts: {e}")
+                
+                results = []
+                for row in rows:
+                    try:
+                        async with adb.cursor(session, transaction=True) as cursor:
+                            results.extend(await Onboarding._insert(cursor, [row]))
+                    except MySQLError as e:
+                        results.append(e)
+                return results
+        except MySQLError as e:
+            logging.error(f"Error onboarding customers: {e}")
+            return [e] * len(rows)
+    
+    @staticmethod
+    async def _insert(cursor, rows):
+        customers = [row[:3] for row in rows]
+        await cursor.execute(
+            f"INSERT INTO Customer (cust_name, cust_street, cust_city) VALUES {SyncOnboarding._values(3, len(rows))}",
+            [value for customer in customers for value in customer]
+        )
+        first_id = cursor.lastrowid
+        cust_ids = list(range(first_id, first_id + len(rows)))
+        
+        if len(rows) > 1 and await Onboarding._lock_mode(cursor) >= 2:
+            await cursor.execute(
+                "SELECT cust_name, cust_street, cust_city FROM Customer "
+                "WHERE cust_id BETWEEN %s AND %s ORDER BY cust_id",
+                (cust_ids[0], cust_ids[-1])
+            )
+            if [tuple(row) for row in await cursor.fetchall()] != customers:
+                raise InterleavedIdsError(f"Customer ids from {first_id} were interleaved with another insert")
+        
+        accounts = [(row[3], row[4], cust_id) for row, cust_id in zip(rows, cust_ids)]
+        await cursor.execute(
+            f"INSERT INTO Account (branch_name, balance, cust_id) VALUES {SyncOnboarding._values(3, len(rows))}",
+            [value for account in accounts for value in account]
+        )
+        await cursor.execute(
+            f"SELECT cust_id, acc_no FROM Account WHERE cust_id IN ({', '.join(['%s'] * len(cust_ids))})",
+            cust_ids
+        )
+        acc_nos = dict(await cursor.fetchall())
+        return [(cust_id, acc_nos[cust_id]) for cust_id in cust_ids]
+    
+    @staticmethod
+    async def _lock_mode(cursor):
+        if SyncOnboarding._autoinc_lock_mode is None:
+            await cursor.execute("SELECT @@innodb_autoinc_lock_mode")
+            SyncOnboarding._autoinc_lock_mode = int((await cursor.fetchone())[0])
+        return SyncOnboarding._autoinc_lock_mode
@@ -0,0 +1,312 @@
+from quart import Blueprint, Response, request, jsonify
+from asgi.models import Account, AccountStats, Ledger, Transaction
+from models.ledger import AccountNotFoundError, InsufficientBalanceError
+from models.money import parse_money
+from models.transaction import TRANSACTION_LIST_COLUMNS
+from asgi.idempotency import idempotent
+from services.serializers import dumps
+from services.common import (
+    page_limit, decode_cursor, row_cursor, history_query, split_history_page,
+    format_transaction, format_transactions, format_history, format_account_overview, format_summary,
+    parse_account_number, parse_transfer_batch, format_batch_outcome, batch_summary,
+    EXPORT_COLUMNS, EXPORT_MIMETYPES, ExportWriter, export_options, export_headers, export_stream_async
+)
+from config import Config
+import logging
+
+# asyncio version of services/transactions_service.py: same routes, same JSON
+transactions_bp = Blueprint('transactions', __name__)
+
+@transactions_bp.route('/transactions/deposit', methods=['POST'])
+@idempotent
+async def deposit_money(session=None):
+    """Deposit money to an account (retry-safe with an Idempotency-Key header)"""
+    try:
+        data = await request.get_json()
+        
+        required_fields = ['acc_no', 'amount']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        try:
+            acc_no = parse_account_number(data['acc_no'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        amount = parse_money(data['amount'])
+        
+        if amount <= 0:
+            return jsonify({'error': 'Deposit amount must be positive'}), 400
+        
+        try:
+            change = await Ledger.deposit(acc_no, amount, session=session)
+        except AccountNotFoundError:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        return jsonify({
+            'message': 'Deposit successful',
+            'transaction': change.transaction.to_dict(),
+            'account': {
+                'acc_no': acc_no,
+                'previous_balance': change.previous_balance,
+                'new_balance': change.new_balance,
+                'deposited_amount': amount
+            }
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid amount format'}), 400
+    except Exception as e:
+        logging.error(f"Error processing deposit: {e}")
+        return jsonify({'error': 'Failed to process deposit'}), 500
+
+@transactions_bp.route('/transactions/withdraw', methods=['POST'])
+@idempotent
+async def withdraw_money(session=None):
+    """Withdraw money from an account (retry-safe with an Idempotency-Key header)"""
+    try:
+        data = await request.get_json()
+        
+        required_fields = ['acc_no', 'amount']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        try:
+            acc_no = parse_account_number(data['acc_no'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        amount = parse_money(data['amount'])
+        
+        if amount <= 0:
+            return jsonify({'error': 'Withdrawal amount must be positive'}), 400
+        
+        try:
+            change = await Ledger.withdraw(acc_no, amount, session=session)
+        except AccountNotFoundError:
+            return jsonify({'error': 'Account not found'}), 404
+        except InsufficientBalanceError as e:
+            return jsonify({
+                'error': 'Insufficient balance',
+                'current_balance': e.current_balance,
+                'requested_amount': amount
+            }), 400
+        
+        return jsonify({
+            'message': 'Withdrawal successful',
+            'transaction': change.transaction.to_dict(),
+            'account': {
+                'acc_no': acc_no,
+                'previous_balance': change.previous_balance,
+                'new_balance': change.new_balance,
+                'withdrawn_amount': amount
+            }
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid amount format'}), 400
+    except Exception as e:
+        logging.error(f"Error processing withdrawal: {e}")
+        return jsonify({'error': 'Failed to process withdrawal'}), 500
+
+@transactions_bp.route('/transactions/<int:acc_no>', methods=['GET'])
+async def get_transaction_history(acc_no):
+    """Get transaction history for a specific account, newest first"""
+    try:
+        query = history_query(request.args)
+        if query['before'] and query['after']:
+            return jsonify({'error': 'Use either before or after, not both'}), 400
+        
+        account_data = await Account.get_by_id(acc_no)
+        if not account_data:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        limit = query.pop('limit')
+        transactions = await Transaction.get_by_account(acc_no, limit=limit + 1, **query)
+        transactions, next_cursor, prev_cursor = split_history_page(
+            transactions, limit, before=query['before'], after=query['after']
+        )
+        
+        transaction_list = format_history(transactions)
+        
+        return jsonify({
+            'account': format_account_overview(account_data),
+            'transactions': transaction_list,
+            'total_transactions': len(transaction_list),
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor, limit or date'}), 400
+    except Exception as e:
+        logging.error(f"Error fetching transaction history: {e}")
+        return jsonify({'error': 'Failed to fetch transaction history'}), 500
+
+@transactions_bp.route('/transactions', methods=['GET'])
+async def get_all_transactions():
+    """Get transactions across all accounts, newest first (keyset ``cursor`` or ``format=ndjson``)"""
+    try:
+        before = decode_cursor(request.args.get('cursor'))
+        
+        if request.args.get('format') == 'ndjson':
+            rows = Transaction.iter_all(before=before, chunk_size=Config.STREAM_CHUNK_SIZE)
+            
+            async def lines():
+                async for txn in rows:
+                    yield dumps(format_transaction(txn)) + '\n'
+            
+            return Response(lines(), mimetype='application/x-ndjson')
+        
+        limit = page_limit(request.args)
+        transactions = await Transaction.get_all(limit=limit + 1, before=before)
+        
+        next_cursor = None
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            next_cursor = row_cursor(transactions[-1], TRANSACTION_LIST_COLUMNS)
+        
+        transaction_list = format_transactions(transactions)
+        
+        return jsonify({
+            'transactions': transaction_list,
+            'total_transactions': len(transaction_list),
+            'next_cursor': next_cursor
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
+    except Exception as e:
+        logging.error(f"Error fetching all transactions: {e}")
+        return jsonify({'error': 'Failed to fetch transactions'}), 500
+
+@transactions_bp.route('/transactions/export', methods=['GET'])
+async def export_transactions():
+    """Stream transactions newest first as CSV or NDJSON (``format``), optionally from a ``cursor``"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        rows = Transaction.iter_all(before=decode_cursor(request.args.get('cursor')), chunk_size=Config.STREAM_CHUNK_SIZE)
+        writer = ExportWriter(EXPORT_COLUMNS['transactions'], file_format, compress)
+        return Response(
+            export_stream_async(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('transactions', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format or cursor'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting transactions: {e}")
+        return jsonify({'error': 'Failed to export transactions'}), 500
+
+@transactions_bp.route('/transactions/summary/<int:acc_no>', methods=['GET'])
+async def get_account_summary(acc_no):
+    """Get account summary with transaction statistics"""
+    try:
+        account_data = await Account.get_by_id(acc_no)
+        if not account_data:
+            return jsonify({'error': 'Account not found'}), 404
+        
+        stats = await AccountStats.get(acc_no)
+        
+        return jsonify({
+            'account': format_account_overview(account_data),
+            'summary': format_summary(stats)
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Error generating account summary: {e}")
+        return jsonify({'error': 'Failed to generate account summary'}), 500
+
+@transactions_bp.route('/transactions/transfer', methods=['POST'])
+@idempotent
+async def transfer_money(session=None):
+    """Transfer money between accounts (retry-safe with an Idempotency-Key header)"""
+    try:
+        data = await request.get_json()
+        
+        required_fields = ['from_acc_no', 'to_acc_no', 'amount']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        try:
+            from_acc_no = parse_account_number(data['from_acc_no'])
+            to_acc_no = parse_account_number(data['to_acc_no'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        amount = parse_money(data['amount'])
+        
+        if amount <= 0:
+            return jsonify({'error': 'Transfer amount must be positive'}), 400
+        
+        if from_acc_no == to_acc_no:
+            return jsonify({'error': 'Cannot transfer to the same account'}), 400
+        
+        try:
+            debit, credit = await Ledger.transfer(from_acc_no, to_acc_no, amount, session=session)
+        except AccountNotFoundError as e:
+            if e.acc_no == from_acc_no:
+                return jsonify({'error': 'Source account not found'}), 404
+            return jsonify({'error': 'Destination account not found'}), 404
+        except InsufficientBalanceError as e:
+            return jsonify({
+                'error': 'Insufficient balance in source account',
+                'current_balance': e.current_balance,
+                'requested_amount': amount
+            }), 400
+        
+        return jsonify({
+            'message': 'Transfer successful',
+            'transfer_details': {
+                'from_account': {
+                    'acc_no': from_acc_no,
+                    'previous_balance': debit.previous_balance,
+                    'new_balance': debit.new_balance
+                },
+                'to_account': {
+                    'acc_no': to_acc_no,
+                    'previous_balance': credit.previous_balance,
+                    'new_balance': credit.new_balance
+                },
+                'amount': amount
+            },
+            'transactions': [
+                debit.transaction.to_dict(),
+                credit.transaction.to_dict()
+            ]
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid amount format'}), 400
+    except Exception as e:
+        logging.error(f"Error processing transfer: {e}")
+        return jsonify({'error': 'Failed to process transfer'}), 500
+
+@transactions_bp.route('/transactions/transfers:batch', methods=['POST'])
+async def transfer_money_batch():
+    """Apply many transfers in one request with grouped commits"""
+    try:
+        data = await request.get_json()
+        
+        if not data or not isinstance(data.get('transfers'), list):
+            return jsonify({'error': 'Missing required field: transfers'}), 400
+        
+        items = data['transfers']
+        if len(items) > Config.BATCH_TRANSFER_MAX_ITEMS:
+            return jsonify({
+                'error': f'Batch too large (max {Config.BATCH_TRANSFER_MAX_ITEMS} transfers)'
+            }), 400
+        
+        results, valid_indexes, valid_transfers = parse_transfer_batch(items)
+        
+        outcomes = await Ledger.transfer_batch(valid_transfers, commit_size=Config.BATCH_TRANSFER_COMMIT_SIZE)
+        
+        for index, transfer, outcome in zip(valid_indexes, valid_transfers, outcomes):
+            results[index] = format_batch_outcome(index, transfer, outcome)
+        
+        return jsonify(batch_summary(results)), 200
+        
+    except Exception as e:
+        logging.error(f"Error processing transfer batch: {e}")
+        return jsonify({'error': 'Failed to process transfer batch'}), 500
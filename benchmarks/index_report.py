@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Before/after query times for the hot-path indexes of migration 0002.
+
+For each index, runs the model query it serves against a seeded benchmark
+database twice: as the optimizer plans it now ("with"), and with the index
+the plan uses hidden by an IGNORE INDEX hint ("without", i.e. the plan the
+query had before the index existed). Foreign-key indexes cannot be dropped
+to measure them the other way, so the hint stands in for the older schema.
+Reports the median time of --repeat runs with different parameters and the
+rows the optimizer expected to examine.
+
+Run from the repository root, after benchmarks.seed (or with --seed):
+    python -m benchmarks.index_report --database banking_bench
+    python -m benchmarks.index_report --seed --customers 100000 --transactions-per-account 50
+"""
+
+from benchmarks.seed import Scale, run_seed
+from scripts.setup_database import get_connection_config
+from models.transaction import Transaction
+from models.loan import Loan
+from mysql.connector import Error
+import argparse
+import json
+import mysql.connector
+import random
+import statistics
+import time
+
+class HotPath:
+    """
+    A model query and the index migration 0002 adds for it.
+    
+    ``table_ref`` is where the query names the indexed table ("FROM Loan l"),
+    so the hint can be placed after it; ``query`` is a function of (rng, scale)
+    returning (sql, params) for a random row of the seeded data.
+    """
+    def __init__(self, index, name, table_ref, query):
+        self.index = index
+        self.name = name
+        self.table_ref = table_ref
+        self.query = query
+    
+    @property
+    def alias(self):
+        return self.table_ref.split()[-1]
+
+HOT_PATHS = [
+    HotPath('Transaction(acc_no, date_time)', 'Transaction.get_by_account', 'FROM Transaction',
+            lambda rng, s: Transaction._account_query(rng.randint(1, s.accounts), 50, None, None, None, None)),
+    HotPath('Transaction(date_time, txn_id)', 'Transaction.get_all', 'FROM Transaction t',
+            lambda rng, s: Transaction._all_query(50, None)),
+    HotPath('Loan(status, loan_no)', 'Loan.find(status)', 'FROM Loan l',
+            lambda rng, s: Loan._find_query(rng.choice(['pending', 'approved', 'rejected']), None, None, None, None, 50, None)),
+    HotPath('Borrower(loan_no)', 'Loan.find', 'JOIN Borrower b',
+            lambda rng, s: Loan._find_query(None, None, None, None, None, 50, rng.randint(0, max(s.loans - 50, 0)))),
+    HotPath('Borrower(cust_id)', 'Loan.find(cust_id)', 'JOIN Borrower b',
+            lambda rng, s: Loan._find_query(None, None, rng.randint(1, s.customers), None, None, 50, None)),
+    HotPath('Account(cust_id)', 'Customer._cache_keys', 'FROM Account',
+            lambda rng, s: ("SELECT acc_no FROM Account WHERE cust_id = %s", (rng.randint(1, s.customers),))),
+]
+
+def hinted(path, sql, index_name):
+    return sql.replace(path.table_ref, f"{path.table_ref} IGNORE INDEX ({index_name})", 1)
+
+def plan(cursor, path, sql, params):
+    """(index used, rows expected) for the path's table in the EXPLAIN of ``sql``"""
+    cursor.execute(f"EXPLAIN {sql}", params)
+    for row in cursor.fetchall():
+        if row['table'] == path.alias:
+            return row['key'], row['rows']
+    return None, None
+
+def median_ms(cursor, samples):
+    timings = []
+    for sql, params in samples:
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def measure(cursor, path, scale, repeat, rng):
+    samples = [path.query(rng, scale) for _ in range(repeat)]
+    index_name, rows_with = plan(cursor, path, *samples[0])
+    result = {'index': path.index, 'query': path.name, 'uses': index_name, 'rows_with': rows_with}
+    if index_name is None:
+        return result
+    without = [(hinted(path, sql, index_name), params) for sql, params in samples]
+    _, result['rows_without'] = plan(cursor, path, *without[0])
+    # First pass warms the buffer pool for both plans
+    median_ms(cursor, samples[:1] + without[:1])
+    result['with_ms'] = median_ms(cursor, samples)
+    result['without_ms'] = median_ms(cursor, without)
+    return result
+
+def print_report(results):
+    print(f"\n{'index':<32} {'query':<28} {'uses':<20} {'without ms':>11} {'with ms':>9} {'speedup':>8} {'rows':>17}")
+    for result in results:
+        if 'with_ms' not in result:
+            print(f"{result['index']:<32} {result['query']:<28} {'(no index used)':<20}")
+            continue
+        speedup = result['without_ms'] / result['with_ms'] if result['with_ms'] else float('inf')
+        rows = f"{result['rows_without']} → {result['rows_with']}"
+        print(f"{result['index']:<32} {result['query']:<28} {result['uses']:<20} "
+              f"{result['without_ms']:>11.2f} {result['with_ms']:>9.2f} {speedup:>7.1f}x {rows:>17}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query times with and without the hot-path indexes")
+    parser.add_argument('--database', default='banking_bench', help="seeded benchmark database")
+    Scale.add_arguments(parser)
+    parser.add_argument('--seed', action='store_true', help="(re)seed the database first")
+    parser.add_argument('--repeat', type=int, default=20, help="runs per query and plan")
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+    
+    scale = Scale.from_args(args)
+    if args.seed and not run_seed(args.database, scale):
+        return False
+    
+    connection = None
+    try:
+        connection = mysql.connector.connect(database=args.database, **get_connection_config())
+        cursor = connection.cursor(dictionary=True)
+        rng = random.Random(42)
+        results = [measure(cursor, path, scale, args.repeat, rng) for path in HOT_PATHS]
+    except Error as e:
+        print(f"✗ Error measuring queries: {e}")
+        return False
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+    
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump({'scale': scale.to_dict(), 'results': results}, handle, indent=2)
+        print(f"✓ Results written to {args.output}")
+    return True
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,219 @@
+"""
+Concurrent load generation against the ``/api`` endpoints.
+
+Each client thread loops over a weighted mix of ENDPOINTS for the given
+duration, through either a keep-alive HTTP connection to a running server
+or a Flask test client of an in-process app, and records the latency and
+status of every request. Pool checkout wait comes from ``/pool/stats``
+before and after the run.
+"""
+
+from collections import Counter
+import http.client
+import json
+import math
+import random
+import threading
+import time
+import urllib.parse
+
+class Endpoint:
+    """
+    One request shape of the workload.
+    
+    ``path`` and ``body`` are functions of (rng, scale) so every request hits
+    a random row of the seeded data; ``weight`` is its share of the mix.
+    """
+    def __init__(self, service, name, method, path, body=None, weight=1):
+        self.service = service
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.weight = weight
+
+def _amount(rng, low, high):
+    return rng.randrange(low * 100, high * 100) / 100
+
+ENDPOINTS = [
+    # accounts
+    Endpoint('accounts', 'GET /accounts/<acc_no>', 'GET',
+             lambda rng, s: f"/api/accounts/{rng.randint(1, s.accounts)}", weight=10),
+    Endpoint('accounts', 'GET /customers/<cust_id>', 'GET',
+             lambda rng, s: f"/api/customers/{rng.randint(1, s.customers)}", weight=5),
+    Endpoint('accounts', 'GET /accounts', 'GET', lambda rng, s: "/api/accounts", weight=1),
+    Endpoint('accounts', 'GET /customers', 'GET', lambda rng, s: "/api/customers", weight=1),
+    Endpoint('accounts', 'POST /accounts', 'POST', lambda rng, s: "/api/accounts",
+             lambda rng, s: {
+                 'cust_name': f"Bench {rng.randrange(10 ** 9)}", 'cust_street': '1 Main Street',
+                 'cust_city': 'New York', 'branch_name': 'Central Branch', 'initial_balance': _amount(rng, 100, 5000)
+             }, weight=1),
+    Endpoint('accounts', 'PUT /accounts/<acc_no>', 'PUT',
+             lambda rng, s: f"/api/accounts/{rng.randint(1, s.accounts)}",
+             lambda rng, s: {'cust_city': rng.choice(['Chicago', 'Houston', 'Boston'])}, weight=1),
+    # loans
+    Endpoint('loans', 'GET /loans', 'GET', lambda rng, s: "/api/loans?limit=50", weight=3),
+    Endpoint('loans', 'GET /loans/status/<status>', 'GET',
+             lambda rng, s: f"/api/loans/status/{rng.choice(['pending', 'approved', 'rejected'])}?limit=50", weight=3),
+    Endpoint('loans', 'GET /loans/<loan_no>', 'GET',
+             lambda rng, s: f"/api/loans/{rng.randint(1, s.loans)}", weight=5),
+    Endpoint('loans', 'GET /loans/<loan_no>/installments', 'GET',
+             lambda rng, s: f"/api/loans/{rng.randint(1, s.loans)}/installments", weight=2),
+    Endpoint('loans', 'POST /loans', 'POST', lambda rng, s: "/api/loans",
+             lambda rng, s: {
+                 'cust_id': rng.randint(1, s.customers), 'branch_name': 'Central Branch',
+                 'amount': _amount(rng, 1000, 50000), 'installments': rng.randint(6, 60)
+             }, weight=1),
+    # transactions
+    Endpoint('transactions', 'POST /transactions/deposit', 'POST', lambda rng, s: "/api/transactions/deposit",
+             lambda rng, s: {'acc_no': rng.randint(1, s.accounts), 'amount': _amount(rng, 1, 500)}, weight=5),
+    Endpoint('transactions', 'POST /transactions/withdraw', 'POST', lambda rng, s: "/api/transactions/withdraw",
+             lambda rng, s: {'acc_no': rng.randint(1, s.accounts), 'amount': _amount(rng, 1, 100)}, weight=3),
+    Endpoint('transactions', 'POST /transactions/transfer', 'POST', lambda rng, s: "/api/transactions/transfer",
+             lambda rng, s: {
+                 'from_acc_no': rng.randint(1, s.accounts), 'to_acc_no': rng.randint(1, s.accounts),
+                 'amount': _amount(rng, 1, 100)
+             }, weight=3),
+    Endpoint('transactions', 'GET /transactions/<acc_no>', 'GET',
+             lambda rng, s: f"/api/transactions/{rng.randint(1, s.accounts)}?limit=20", weight=8),
+    Endpoint('transactions', 'GET /transactions/summary/<acc_no>', 'GET',
+             lambda rng, s: f"/api/transactions/summary/{rng.randint(1, s.accounts)}", weight=4),
+    Endpoint('transactions', 'GET /transactions', 'GET', lambda rng, s: "/api/transactions?limit=50", weight=2),
+]
+
+class HTTPClient:
+    """Keep-alive connection to a running server, reconnecting after errors"""
+    def __init__(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self._connection = None
+    
+    def request(self, method, path, body=None):
+        """Send one request; returns (status, body bytes)"""
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self._connection.request(method, path, payload, headers)
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self._connection.close()
+            self._connection = None
+            raise
+
+class AppClient:
+    """Flask test client of an in-process app (the real pool and MySQL, no sockets)"""
+    def __init__(self, app):
+        self._client = app.test_client()
+    
+    def request(self, method, path, body=None):
+        response = self._client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+def pool_stats(client):
+    status, body = client.request('GET', '/pool/stats')
+    return json.loads(body) if status == 200 else None
+
+def run_load(client_factory, endpoints, scale, clients=8, duration=30, warmup=5, seed=42):
+    """
+    Drive ``endpoints`` from ``clients`` threads for ``warmup + duration``
+    seconds; only requests started after the warmup are recorded.
+    
+    Returns {'endpoints': {name: summary}, 'total': summary, 'pool': ...}.
+    """
+    cumulative = []
+    total_weight = 0
+    for endpoint in endpoints:
+        total_weight += endpoint.weight
+        cumulative.append(total_weight)
+    
+    control = client_factory()
+    pool_before = pool_stats(control)
+    started = time.monotonic()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    results = []
+    
+    def worker(index):
+        rng = random.Random(seed + index)
+        client = client_factory()
+        latencies = {endpoint.name: [] for endpoint in endpoints}
+        statuses = {endpoint.name: Counter() for endpoint in endpoints}
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            endpoint = rng.choices(endpoints, cum_weights=cumulative)[0]
+            path = endpoint.path(rng, scale)
+            body = endpoint.body(rng, scale) if endpoint.body else None
+            request_started = time.perf_counter()
+            try:
+                status, _ = client.request(endpoint.method, path, body)
+            except Exception:
+                status = 'error'
+            elapsed = time.perf_counter() - request_started
+            if now >= measure_from:
+                latencies[endpoint.name].append(elapsed)
+                statuses[endpoint.name][status] += 1
+        results.append((latencies, statuses))
+    
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    pool_after = pool_stats(control)
+    report = {'endpoints': {}, 'total': None, 'pool': pool_delta(pool_before, pool_after)}
+    every_latency = []
+    every_status = Counter()
+    for endpoint in endpoints:
+        latencies = sorted(value for latencies, _ in results for value in latencies[endpoint.name])
+        statuses = sum((statuses[endpoint.name] for _, statuses in results), Counter())
+        if latencies:
+            report['endpoints'][endpoint.name] = summarize(latencies, statuses, duration)
+        every_latency.extend(latencies)
+        every_status.update(statuses)
+    report['total'] = summarize(sorted(every_latency), every_status, duration)
+    return report
+
+def summarize(latencies, statuses, duration):
+    """Throughput and latency percentiles (milliseconds) of one endpoint or the whole run"""
+    errors = sum(count for status, count in statuses.items() if status == 'error' or status >= 500)
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)}
+    }
+
+def pool_delta(before, after):
+    """Checkout wait during the run, from two /pool/stats snapshots (one process's pool)"""
+    if not before or not after:
+        return None
+    checkouts = after['checkouts'] - before['checkouts']
+    wait_total = after['wait_time_total'] - before['wait_time_total']
+    return {
+        'checkouts': checkouts,
+        'wait_avg_ms': wait_total / checkouts * 1000 if checkouts else 0.0,
+        'wait_max_ms': after['wait_time_max'] * 1000,
+        'exhaustion_events': after['exhaustion_events'] - before['exhaustion_events'],
+        'pool_size': after['pool_size'],
+        'max_overflow': after['max_overflow']
+    }
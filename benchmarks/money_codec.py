@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Money codec micro-benchmark.
+
+Measures the CPU time per request of the JSON work around money values,
+for a deposit (request body in, balances out) and for a page of
+transaction history, two ways:
+
+    float    json.loads, Decimal(str(amount)), float() on every amount in
+             the response and json.dumps (the previous code path)
+    decimal  services.serializers.loads/dumps with Decimal throughout and
+             the precompiled row serializer (the current code path)
+
+No database is needed. Run from the repository root:
+    python -m benchmarks.money_codec
+    python -m benchmarks.money_codec --rows 100 --repeat 5
+"""
+
+from models.money import parse_money
+from services.serializers import RowSerializer, dumps, loads, orjson
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import json
+import time
+import timeit
+
+COLUMNS = ('txn_id', 'acc_no', 'type', 'amount', 'date_time')
+
+HISTORY_ENTRY = RowSerializer({
+    'txn_id': 'txn_id',
+    'type': 'type',
+    'amount': 'amount',
+    'date_time': ('date_time', 'iso')
+})
+
+def make_rows(count):
+    """Transaction rows as the MySQL driver returns them: DECIMAL as Decimal"""
+    start = datetime(2024, 1, 1, 9, 30)
+    return [
+        (txn_id, 1001, 'deposit' if txn_id % 2 else 'withdrawal',
+         Decimal(f"{txn_id * 37 % 100000}.{txn_id % 100:02d}"), start + timedelta(minutes=txn_id))
+        for txn_id in range(1, count + 1)
+    ]
+
+def deposit_float(body, balance):
+    data = json.loads(body)
+    amount = Decimal(str(data['amount']))
+    new_balance = balance + amount
+    return json.dumps({
+        'message': 'Deposit successful',
+        'account': {
+            'acc_no': data['acc_no'],
+            'previous_balance': float(balance),
+            'new_balance': float(new_balance),
+            'deposited_amount': float(amount)
+        }
+    })
+
+def deposit_decimal(body, balance):
+    data = loads(body)
+    amount = parse_money(data['amount'])
+    new_balance = balance + amount
+    return dumps({
+        'message': 'Deposit successful',
+        'account': {
+            'acc_no': data['acc_no'],
+            'previous_balance': balance,
+            'new_balance': new_balance,
+            'deposited_amount': amount
+        }
+    })
+
+def history_float(rows):
+    entries = []
+    for row in rows:
+        txn = dict(zip(COLUMNS, row))
+        entries.append({
+            'txn_id': txn['txn_id'],
+            'type': txn['type'],
+            'amount': float(txn['amount']),
+            'date_time': txn['date_time'].isoformat() if txn['date_time'] else None
+        })
+    return json.dumps({'transactions': entries, 'total_transactions': len(entries)})
+
+def history_decimal(rows):
+    entries = HISTORY_ENTRY.rows(COLUMNS, rows)
+    return dumps({'transactions': entries, 'total_transactions': len(entries)})
+
+def cpu_time(function, repeat, number):
+    """Best CPU seconds per call over ``repeat`` runs of ``number`` calls"""
+    timer = timeit.Timer(function, timer=time.process_time)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def report(name, baseline, current):
+    saved = (baseline - current) / baseline * 100
+    print(f"{name:<22} float {baseline * 1e6:9.1f} µs   decimal {current * 1e6:9.1f} µs   saved {saved:5.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU cost of money handling per request")
+    parser.add_argument('--rows', type=int, default=50, help="transactions per history page")
+    parser.add_argument('--number', type=int, default=2000, help="calls per timing run")
+    parser.add_argument('--repeat', type=int, default=5, help="timing runs (best one is reported)")
+    args = parser.parse_args()
+
+    body = json.dumps({'acc_no': 1001, 'amount': 1250.75})
+    balance = Decimal('98765.43')
+    rows = make_rows(args.rows)
+
+    # Both paths must describe the same amounts
+    assert json.loads(deposit_float(body, balance)) == json.loads(deposit_decimal(body, balance))
+    assert json.loads(history_float(rows)) == json.loads(history_decimal(rows))
+
+    print(f"JSON encoder: {'orjson ' + orjson.__version__ if orjson else 'json (stdlib)'}")
+    report("deposit", cpu_time(lambda: deposit_float(body, balance), args.repeat, args.number),
+           cpu_time(lambda: deposit_decimal(body, balance), args.repeat, args.number))
+    report(f"history ({args.rows} rows)", cpu_time(lambda: history_float(rows), args.repeat, args.number),
+           cpu_time(lambda: history_decimal(rows), args.repeat, args.number))
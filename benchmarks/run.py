@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark and load test for the Banking System API.
+
+Seeds a dedicated database (benchmarks.seed), then drives every selected
+blueprint's endpoints with concurrent clients (benchmarks.load) and
+reports throughput, p50/p95/p99 latency per endpoint and connection pool
+wait. Save a run with --output and pass it as --baseline to a later run to
+see the change in throughput and p95 per endpoint.
+
+Without --url the app is built in-process with create_app() against the
+benchmark database; with --url a running server is measured instead (it
+must point at the same database; /pool/stats then shows one worker's pool).
+
+Run from the repository root:
+    python -m benchmarks.run --customers 10000 --clients 16 --duration 30 --output base.json
+    python -m benchmarks.run --skip-seed --clients 16 --baseline base.json
+    python -m benchmarks.run --standin --services transactions
+    python -m benchmarks.run --skip-seed --services transactions --ledger-queue --baseline base.json
+    python -m benchmarks.run --skip-seed --url http://localhost:5003 --services transactions
+"""
+
+from benchmarks.seed import Scale, run_seed
+from benchmarks.standin import StandIn
+from benchmarks.load import ENDPOINTS, HTTPClient, AppClient, run_load
+import argparse
+import json
+import os
+import platform
+import tempfile
+
+def print_report(report, baseline=None):
+    previous = (baseline or {}).get('endpoints', {})
+    print(f"\n{'endpoint':<38} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+    for name, summary in rows:
+        line = (f"{name:<38} {summary['throughput']:>9.1f} {summary['p50_ms']:>8.2f} "
+                f"{summary['p95_ms']:>8.2f} {summary['p99_ms']:>8.2f} {summary['errors']:>7}")
+        before = baseline['total'] if baseline and name == 'TOTAL' else previous.get(name)
+        if before and before['throughput'] and before['p95_ms']:
+            throughput_change = (summary['throughput'] / before['throughput'] - 1) * 100
+            p95_change = (summary['p95_ms'] / before['p95_ms'] - 1) * 100
+            line += f"   req/s {throughput_change:+.1f}%  p95 {p95_change:+.1f}%"
+        print(line)
+    
+    pool = report['pool']
+    if pool:
+        print(
+            f"\nPool: {pool['checkouts']} checkouts, wait avg {pool['wait_avg_ms']:.3f} ms, "
+            f"max {pool['wait_max_ms']:.1f} ms, {pool['exhaustion_events']} exhaustion events "
+            f"(size {pool['pool_size']} + {pool['max_overflow']} overflow)"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a benchmark database and load test the API")
+    parser.add_argument('--database', default='banking_bench', help="benchmark database (recreated unless --skip-seed)")
+    Scale.add_arguments(parser)
+    parser.add_argument('--skip-seed', action='store_true', help="reuse the data of a previous seed with the same scale")
+    parser.add_argument('--standin', action='store_true', help="run against a disposable MariaDB container")
+    parser.add_argument('--services', default='accounts,loans,transactions', help="blueprints to exercise")
+    parser.add_argument('--url', help="measure a running server instead of an in-process app")
+    parser.add_argument('--ledger-queue', action='store_true', help="post through the ledger queue (in-process only)")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent client threads")
+    parser.add_argument('--duration', type=float, default=30, help="measured seconds")
+    parser.add_argument('--warmup', type=float, default=5, help="unmeasured seconds before the run")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for data and request mix")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', help="compare with results written by an earlier --output")
+    args = parser.parse_args()
+    if args.ledger_queue and args.url:
+        parser.error("--ledger-queue measures the in-process app; enable it on the server for --url")
+    
+    services = [name.strip() for name in args.services.split(',') if name.strip()]
+    endpoints = [endpoint for endpoint in ENDPOINTS if endpoint.service in services]
+    scale = Scale.from_args(args)
+    standin = StandIn() if args.standin else None
+    
+    try:
+        if standin:
+            standin.start()
+        if not args.skip_seed and not run_seed(args.database, scale, seed_value=args.seed):
+            return False
+        
+        if args.url:
+            client_factory = lambda: HTTPClient(args.url)
+        else:
+            # Config reads the environment at import, so select the database first
+            os.environ['MYSQL_DATABASE'] = args.database
+            if args.ledger_queue:
+                os.environ['LEDGER_QUEUE_ENABLED'] = 'True'
+                os.environ['LEDGER_QUEUE_DIR'] = tempfile.mkdtemp(prefix='ledger-queue-')
+            from app import create_app
+            from models.ledger_queue import ledger_queue
+            app = create_app(services)
+            ledger_queue.start()
+            client_factory = lambda: AppClient(app)
+        
+        print(f"\n⏱  {args.clients} clients, {args.warmup:g}s warmup + {args.duration:g}s, services: {', '.join(services)}")
+        report = run_load(client_factory, endpoints, scale, args.clients, args.duration, args.warmup, args.seed)
+        report['config'] = {
+            'scale': scale.to_dict(),
+            'services': services,
+            'clients': args.clients,
+            'duration': args.duration,
+            'target': args.url or 'in-process',
+            'ledger_queue': args.ledger_queue,
+            'python': platform.python_version()
+        }
+        
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as handle:
+                baseline = json.load(handle)
+        print_report(report, baseline)
+        
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2)
+            print(f"✓ Results written to {args.output}")
+        return report['total']['errors'] == 0
+    finally:
+        if not args.url:
+            from database.connection import db
+            from models.ledger_queue import ledger_queue
+            ledger_queue.close()
+            db.close()
+        if standin:
+            standin.stop()
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
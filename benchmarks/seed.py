@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark data seeding for the Banking System.
+
+Recreates a dedicated benchmark database with the schema migrations (the
+same schema, triggers and indexes as setup_database.py) and fills it with
+generated customers, accounts, loans and transactions at the requested
+scale, then derives AccountStats from the ledger. The generator is seeded,
+so the same arguments always produce the same data.
+
+Run from the repository root (the database is dropped first):
+    python -m benchmarks.seed --database banking_bench --customers 10000
+    python -m benchmarks.seed --customers 100000 --transactions-per-account 50
+"""
+
+from scripts.setup_database import get_connection_config, rebuild_stats
+from scripts.migrate import migrate
+from mysql.connector import Error
+from datetime import datetime, timedelta
+from decimal import Decimal
+import argparse
+import mysql.connector
+import random
+import time
+
+BRANCHES = ('Downtown Branch', 'Uptown Branch', 'Central Branch', 'West Branch', 'East Branch')
+CITIES = ('New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Seattle', 'Boston')
+STREETS = ('Main Street', 'Oak Avenue', 'Pine Road', 'Elm Street', 'Maple Drive')
+LOAN_STATUSES = ('pending', 'approved', 'rejected')
+TRANSACTION_TYPES = ('deposit', 'withdrawal', 'transfer_in', 'transfer_out')
+
+class Scale:
+    """Row counts of a seeded database; ids run from 1 because it is created fresh"""
+    def __init__(self, customers=1000, accounts_per_customer=1, loans=200, transactions_per_account=20):
+        self.customers = customers
+        self.accounts_per_customer = accounts_per_customer
+        self.loans = loans
+        self.transactions_per_account = transactions_per_account
+    
+    @property
+    def accounts(self):
+        return self.customers * self.accounts_per_customer
+    
+    @property
+    def transactions(self):
+        return self.accounts * self.transactions_per_account
+    
+    def to_dict(self):
+        return {
+            'customers': self.customers,
+            'accounts': self.accounts,
+            'loans': self.loans,
+            'transactions': self.transactions
+        }
+    
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('--customers', type=int, default=1000, help="customers to create")
+        parser.add_argument('--accounts-per-customer', type=int, default=1, help="accounts per customer")
+        parser.add_argument('--loans', type=int, default=200, help="loans to create")
+        parser.add_argument('--transactions-per-account', type=int, default=20, help="ledger rows per account")
+    
+    @staticmethod
+    def from_args(args):
+        return Scale(args.customers, args.accounts_per_customer, args.loans, args.transactions_per_account)
+
+def money(rng, low, high):
+    return Decimal(rng.randrange(low * 100, high * 100)) / 100
+
+def customer_rows(scale, rng):
+    for cust_id in range(1, scale.customers + 1):
+        yield (f"Customer {cust_id}", f"{rng.randrange(1, 999)} {rng.choice(STREETS)}", rng.choice(CITIES))
+
+def account_rows(scale, rng):
+    for cust_id in range(1, scale.customers + 1):
+        for _ in range(scale.accounts_per_customer):
+            yield (rng.choice(BRANCHES), money(rng, 1000, 100000), cust_id)
+
+def loan_rows(scale, rng):
+    for _ in range(scale.loans):
+        yield (rng.choice(BRANCHES), money(rng, 1000, 50000), rng.choice(LOAN_STATUSES), rng.randrange(1, 60))
+
+def borrower_rows(scale, rng):
+    for loan_no in range(1, scale.loans + 1):
+        yield (rng.randrange(1, scale.customers + 1), loan_no)
+
+def transaction_rows(scale, rng):
+    # Spread over the last year so history paging and date filters have work to do
+    now = datetime.now().replace(microsecond=0)
+    for acc_no in range(1, scale.accounts + 1):
+        for _ in range(scale.transactions_per_account):
+            yield (acc_no, rng.choice(TRANSACTION_TYPES), money(rng, 1, 2000), now - timedelta(seconds=rng.randrange(365 * 86400)))
+
+def insert_rows(cursor, table, columns, rows, batch_size):
+    """executemany in batches (sent as multi-row INSERTs); returns the row count"""
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            cursor.executemany(query, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+        count += len(batch)
+    return count
+
+def create_schema(cursor, database):
+    """Drop ``database`` and recreate it with every migration"""
+    cursor.execute(f"DROP DATABASE IF EXISTS {database}")
+    return migrate(cursor, database)
+
+def seed(cursor, database, scale, batch_size=5000, seed=42):
+    """Create the schema and generate every table's rows; returns True on success"""
+    rng = random.Random(seed)
+    try:
+        if not create_schema(cursor, database):
+            return False
+        cursor.execute(f"USE {database}")
+        
+        for table, columns, rows in (
+            ('Customer', ('cust_name', 'cust_street', 'cust_city'), customer_rows(scale, rng)),
+            ('Account', ('branch_name', 'balance', 'cust_id'), account_rows(scale, rng)),
+            ('Loan', ('branch_name', 'amount', 'status', 'installments_remaining'), loan_rows(scale, rng)),
+            ('Borrower', ('cust_id', 'loan_no'), borrower_rows(scale, rng)),
+            ('Transaction', ('acc_no', 'type', 'amount', 'date_time'), transaction_rows(scale, rng))
+        ):
+            started = time.monotonic()
+            count = insert_rows(cursor, table, columns, rows, batch_size)
+            print(f"✓ {table}: {count} rows in {time.monotonic() - started:.1f}s")
+        
+        # The ledger was written directly, so derive the aggregates from it
+        return rebuild_stats(cursor, database)
+    except Error as e:
+        print(f"✗ Error seeding {database}: {e}")
+        return False
+
+def run_seed(database, scale, batch_size=5000, seed_value=42):
+    """Connect with the MYSQL_* settings and seed ``database``"""
+    if database == 'banking_system':
+        print("✗ Refusing to drop banking_system; pick a dedicated --database")
+        return False
+    connection = None
+    try:
+        connection = mysql.connector.connect(**get_connection_config())
+        return seed(connection.cursor(), database, scale, batch_size, seed_value)
+    except Error as e:
+        print(f"✗ Database connection error: {e}")
+        return False
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a benchmark database at a given scale")
+    parser.add_argument('--database', default='banking_bench', help="database to (re)create")
+    Scale.add_arguments(parser)
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows per INSERT batch")
+    parser.add_argument('--seed', type=int, default=42, help="random seed")
+    args = parser.parse_args()
+    
+    success = run_seed(args.database, Scale.from_args(args), args.batch_size, args.seed)
+    exit(0 if success else 1)
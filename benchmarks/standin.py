@@ -0,0 +1,64 @@
+"""
+Disposable MariaDB stand-in for benchmarks.
+
+Starts a throwaway ``mariadb`` container with its data directory on tmpfs
+(no disk fsync cost), waits until it accepts connections and removes it on
+``stop()``. Used by ``benchmarks.run --standin`` when no MySQL instance is
+at hand; results against it are comparable with each other, not with a
+production server.
+"""
+
+from mysql.connector import Error
+import mysql.connector
+import os
+import subprocess
+import time
+import uuid
+
+IMAGE = 'mariadb:11'
+PASSWORD = 'bench'
+
+class StandIn:
+    def __init__(self, port=33306, image=IMAGE):
+        self.port = port
+        self.image = image
+        self.name = f"banking-bench-{uuid.uuid4().hex[:8]}"
+        self.started = False
+    
+    def start(self, timeout=90):
+        """Start the container and point the MYSQL_* environment at it"""
+        subprocess.run([
+            'docker', 'run', '--rm', '-d', '--name', self.name,
+            '-e', f"MARIADB_ROOT_PASSWORD={PASSWORD}",
+            '-p', f"127.0.0.1:{self.port}:3306",
+            '--tmpfs', '/var/lib/mysql:rw',
+            self.image,
+            '--innodb-buffer-pool-size=512M', '--max-connections=500'
+        ], check=True, stdout=subprocess.DEVNULL)
+        self.started = True
+        
+        os.environ.update({
+            'MYSQL_HOST': '127.0.0.1',
+            'MYSQL_PORT': str(self.port),
+            'MYSQL_USER': 'root',
+            'MYSQL_PASSWORD': PASSWORD
+        })
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                mysql.connector.connect(
+                    host='127.0.0.1', port=self.port, user='root', password=PASSWORD
+                ).close()
+                print(f"✓ Stand-in {self.image} ready on port {self.port}")
+                return
+            except Error:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"Stand-in database did not start within {timeout}s")
+                time.sleep(1)
+    
+    def stop(self):
+        if self.started:
+            subprocess.run(['docker', 'rm', '-f', self.name], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.started = False
@@ -11,6 +11,82 @@ class Config:
     MYSQL_DATABASE = os.environ.get('MYSQL_DATABASE', 'banking_system')
     MYSQL_PORT = int(os.environ.get('MYSQL_PORT', 3306))
     
+    # Connection Pool Configuration (mysql-connector caps POOL_SIZE at 32)
+    POOL_SIZE = int(os.environ.get('POOL_SIZE', 10))
+    POOL_MAX_OVERFLOW = int(os.environ.get('POOL_MAX_OVERFLOW', 5))
+    POOL_TIMEOUT = float(os.environ.get('POOL_TIMEOUT', 10))
+    POOL_MAX_WAITERS = int(os.environ.get('POOL_MAX_WAITERS', 64))
+    POOL_RESET_SESSION = os.environ.get('POOL_RESET_SESSION', 'True').lower() == 'true'
+    POOL_WARMUP_MAX_BACKOFF = float(os.environ.get('POOL_WARMUP_MAX_BACKOFF', 30))
+    
+    # Async Pool Configuration (ASGI mode; waits share POOL_TIMEOUT)
+    ASYNC_POOL_MIN_SIZE = int(os.environ.get('ASYNC_POOL_MIN_SIZE', 1))
+    ASYNC_POOL_MAX_SIZE = int(os.environ.get('ASYNC_POOL_MAX_SIZE', 50))
+    
+    # Cache Configuration (CACHE_BACKEND: memory, redis or none)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory').lower()
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 5))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Idempotency Configuration (keys expire after IDEMPOTENCY_TTL hours)
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 24))
+    IDEMPOTENCY_CACHE_TTL = int(os.environ.get('IDEMPOTENCY_CACHE_TTL', 300))
+    IDEMPOTENCY_CACHE_ENTRIES = int(os.environ.get('IDEMPOTENCY_CACHE_ENTRIES', 10000))
+    
+    # Ledger Queue Configuration (write-ahead queue for Transaction rows; off by default)
+    LEDGER_QUEUE_ENABLED = os.environ.get('LEDGER_QUEUE_ENABLED', 'False').lower() == 'true'
+    LEDGER_QUEUE_DIR = os.environ.get('LEDGER_QUEUE_DIR', 'ledger-queue')
+    LEDGER_QUEUE_FLUSH_INTERVAL = float(os.environ.get('LEDGER_QUEUE_FLUSH_INTERVAL', 0.2))
+    LEDGER_QUEUE_BATCH_SIZE = int(os.environ.get('LEDGER_QUEUE_BATCH_SIZE', 1000))
+    LEDGER_QUEUE_SEGMENT_BYTES = int(os.environ.get('LEDGER_QUEUE_SEGMENT_BYTES', 64 * 1024 * 1024))
+    
+    # Transaction Partitioning (monthly partitions on date_time; see scripts/partitions.py)
+    # History reads try the last TRANSACTION_RECENT_MONTHS partitions first (0 disables)
+    TRANSACTION_RECENT_MONTHS = int(os.environ.get('TRANSACTION_RECENT_MONTHS', 3))
+    TRANSACTION_PARTITIONS_AHEAD = int(os.environ.get('TRANSACTION_PARTITIONS_AHEAD', 3))
+    # Partitions that ended more than this many months ago are archived to TRANSACTION_ARCHIVE_DIR
+    TRANSACTION_RETENTION_MONTHS = int(os.environ.get('TRANSACTION_RETENTION_MONTHS', 12))
+    TRANSACTION_ARCHIVE_DIR = os.environ.get('TRANSACTION_ARCHIVE_DIR', 'transaction-archive')
+    
+    # Metrics Configuration (per-route and per-statement timings served on /metrics)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # Slow Query Log (statements over SLOW_QUERY_MS are logged and EXPLAINed on /admin/slow-queries; 0 disables)
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_MAX_ENTRIES = int(os.environ.get('SLOW_QUERY_MAX_ENTRIES', 200))
+    
+    # Admin Configuration (/admin/* and ?profile=1 need "Authorization: Bearer ADMIN_TOKEN"; unset disables them)
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+    PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', 60))
+    PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.01))
+    
+    # Pagination Configuration
+    DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 100))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 1000))
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 1000))
+    # Exports are sent in chunks of about this many bytes (before gzip)
+    EXPORT_BUFFER_BYTES = int(os.environ.get('EXPORT_BUFFER_BYTES', 64 * 1024))
+    
+    # Batch Transfer Configuration
+    BATCH_TRANSFER_MAX_ITEMS = int(os.environ.get('BATCH_TRANSFER_MAX_ITEMS', 5000))
+    BATCH_TRANSFER_COMMIT_SIZE = int(os.environ.get('BATCH_TRANSFER_COMMIT_SIZE', 200))
+    
+    # Bulk Onboarding Configuration (POST /accounts:batch and scripts/onboard_customers.py)
+    ONBOARDING_MAX_ITEMS = int(os.environ.get('ONBOARDING_MAX_ITEMS', 5000))
+    ONBOARDING_CHUNK_SIZE = int(os.environ.get('ONBOARDING_CHUNK_SIZE', 500))
+    
+    # Server Configuration (SERVICES: comma-separated blueprints this process serves)
+    SERVICES = [name for name in os.environ.get('BANKING_SERVICES', 'accounts,loans,transactions').split(',') if name]
+    PORT = int(os.environ.get('PORT', 5000))
+    # 0 workers means 2 * CPU cores + 1
+    GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 0))
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+    GUNICORN_TIMEOUT = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 20))
+    GUNICORN_KEEPALIVE = int(os.environ.get('GUNICORN_KEEPALIVE', 75))
+    GUNICORN_MAX_REQUESTS = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+    
     # Flask Configuration
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-here')
-    DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
+    DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
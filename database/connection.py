@@ -1,11 +1,32 @@
 import mysql.connector
 from mysql.connector import pooling, Error
+from mysql.connector.errors import PoolError
 from config import Config
+from models.metrics import metrics
+from models.slow_queries import slow_queries
+from contextlib import contextmanager
 import logging
+import threading
+import time
 
 class DatabaseConnection:
+    """
+    Per-process MySQL connection pool.
+
+    Sizing and session-reset policy come from Config. Checkout blocks for up
+    to POOL_TIMEOUT seconds when all POOL_SIZE + POOL_MAX_OVERFLOW slots are
+    in use, with at most POOL_MAX_WAITERS callers queued; beyond that it
+    fails fast. Overflow connections are opened on demand and closed when
+    returned. ``stats()`` reports checkout wait, in-use and exhaustion counts.
+
+    The pool is not opened at import: ``warm_up()`` opens it on a background
+    thread (gunicorn starts it after forking each worker) and the first
+    checkout opens it otherwise. ``health()`` reports whether it is warm, for
+    the readiness probe. Sockets must never be shared across a fork, so a
+    forked child calls ``reset_after_fork()`` before using it.
+    """
     _instance = None
-    _connection_pool = None
+    _connection_config = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -13,34 +34,380 @@ class DatabaseConnection:
         return cls._instance
     
     def __init__(self):
+        if self._connection_config is None:
+            self._connection_config = {
+                'host': Config.MYSQL_HOST,
+                'user': Config.MYSQL_USER,
+                'password': Config.MYSQL_PASSWORD,
+                'database': Config.MYSQL_DATABASE,
+                'port': Config.MYSQL_PORT,
+                'autocommit': True
+            }
+            self._reset_state()
+    
+    def _reset_state(self):
+        self._connection_pool = None
+        self._init_lock = threading.Lock()
+        self._warmup_thread = None
+        self._warmup_error = None
+        self._closed = False
+        self._slots = threading.BoundedSemaphore(Config.POOL_SIZE + Config.POOL_MAX_OVERFLOW)
+        self._lock = threading.Lock()
+        self._checked_out = {}  # id(connection) -> True if it is an overflow connection
+        self._waiting = 0
+        self._metrics = {
+            'checkouts': 0,
+            'overflow_checkouts': 0,
+            'exhaustion_events': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0
+        }
+    
+    def init_pool(self):
+        """Open the pool in this process if it is not open yet"""
         if self._connection_pool is None:
+            with self._init_lock:
+                if self._connection_pool is None:
+                    try:
+                        self._connection_pool = pooling.MySQLConnectionPool(
+                            pool_name="banking_pool",
+                            pool_size=Config.POOL_SIZE,
+                            pool_reset_session=Config.POOL_RESET_SESSION,
+                            **self._connection_config
+                        )
+                        logging.info(f"MySQL connection pool created (size={Config.POOL_SIZE}, max_overflow={Config.POOL_MAX_OVERFLOW})")
+                    except Error as e:
+                        logging.error(f"Error creating connection pool: {e}")
+                        raise e
+        return self._connection_pool
+    
+    def warm_up(self):
+        """Open the pool on a background thread, retrying with backoff until MySQL answers"""
+        if self._connection_pool is not None:
+            return
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return
+        self._warmup_thread = threading.Thread(target=self._warm_up, name='db-pool-warmup', daemon=True)
+        self._warmup_thread.start()
+    
+    def _warm_up(self):
+        started = time.monotonic()
+        delay = 0.5
+        while self._connection_pool is None and not self._closed:
+            try:
+                self.init_pool()
+                self._warmup_error = None
+                logging.info(f"MySQL connection pool warm after {time.monotonic() - started:.2f}s")
+            except Error as e:
+                self._warmup_error = str(e)
+                time.sleep(delay)
+                delay = min(delay * 2, Config.POOL_WARMUP_MAX_BACKOFF)
+    
+    def health(self):
+        """Pool warm state: ``ready`` once open, else ``warming`` or ``cold``"""
+        if self._connection_pool is not None:
+            state = 'ready'
+        elif self._warmup_thread is not None and self._warmup_thread.is_alive():
+            state = 'warming'
+        else:
+            state = 'cold'
+        return {'pool': state, 'last_error': self._warmup_error}
+    
+    def reset_after_fork(self):
+        """Forget a pool inherited from the parent process without touching its sockets"""
+        self._reset_state()
+    
+    def close(self):
+        """Close idle pooled connections on shutdown; checked-out ones close when returned"""
+        self._closed = True
+        pool, self._connection_pool = self._connection_pool, None
+        if pool is not None:
             try:
-                self._connection_pool = pooling.MySQLConnectionPool(
-                    pool_name="banking_pool",
-                    pool_size=10,  # Adjust based on your needs
-                    pool_reset_session=True,
-                    host=Config.MYSQL_HOST,
-                    user=Config.MYSQL_USER,
-                    password=Config.MYSQL_PASSWORD,
-                    database=Config.MYSQL_DATABASE,
-                    port=Config.MYSQL_PORT,
-                    autocommit=True
-                )
-                logging.info("MySQL connection pool created")
+                pool._remove_connections()
             except Error as e:
-                logging.error(f"Error creating connection pool: {e}")
-                raise e
+                logging.error(f"Error closing connection pool: {e}")
     
     def get_connection(self):
+        started = time.monotonic()
+        self._acquire_slot()
+        waited = time.monotonic() - started
+        
         try:
-            return self._connection_pool.get_connection()
+            try:
+                connection = self.init_pool().get_connection()
+                overflow = False
+            except PoolError:
+                # Every pooled connection is out but an overflow slot was free
+                connection = mysql.connector.connect(**self._connection_config)
+                overflow = True
         except Error as e:
+            self._slots.release()
             logging.error(f"Error getting connection from pool: {e}")
             raise e
+        
+        with self._lock:
+            self._checked_out[id(connection)] = overflow
+            self._metrics['checkouts'] += 1
+            self._metrics['overflow_checkouts'] += overflow
+            self._metrics['wait_time_total'] += waited
+            self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], waited)
+        metrics.record_checkout()
+        return connection
     
     def return_connection(self, connection):
-        if connection and connection.is_connected():
-            connection.close()  # This returns it to the pool
+        if not connection:
+            return
+        with self._lock:
+            if id(connection) not in self._checked_out:
+                return  # Already returned
+            self._checked_out.pop(id(connection))
+        try:
+            # Pooled connections go back to the pool (and are reconnected on
+            # next checkout if they dropped); overflow ones are really closed
+            connection.close()
+        except Error as e:
+            logging.error(f"Error returning connection to pool: {e}")
+        finally:
+            self._slots.release()
+    
+    def connect(self):
+        """A connection outside the pool, for session state that must outlive a checkout (the caller closes it)"""
+        try:
+            return mysql.connector.connect(**self._connection_config)
+        except Error as e:
+            logging.error(f"Error opening connection: {e}")
+            raise e
+    
+    def stats(self):
+        """Pool sizing, utilisation and checkout wait metrics"""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats['in_use'] = len(self._checked_out)
+            stats['overflow_in_use'] = sum(self._checked_out.values())
+            stats['waiting'] = self._waiting
+        stats['pool_size'] = Config.POOL_SIZE
+        stats['max_overflow'] = Config.POOL_MAX_OVERFLOW
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+    
+    def _acquire_slot(self):
+        if self._slots.acquire(blocking=False):
+            return
+        
+        with self._lock:
+            if self._waiting >= Config.POOL_MAX_WAITERS:
+                self._metrics['exhaustion_events'] += 1
+                raise PoolError("Connection pool exhausted and wait queue is full")
+            self._waiting += 1
+        try:
+            acquired = self._slots.acquire(timeout=Config.POOL_TIMEOUT)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        
+        if not acquired:
+            with self._lock:
+                self._metrics['exhaustion_events'] += 1
+            logging.error(f"Timed out after {Config.POOL_TIMEOUT}s waiting for a database connection")
+            raise PoolError("Timed out waiting for a connection from the pool")
+    
+    def session(self):
+        """Start a unit of work: ``with db.session() as session: ...``"""
+        return Session(self)
+    
+    @contextmanager
+    def cursor(self, session=None, dictionary=False, transaction=False):
+        """
+        Cursor for a single model operation.
+        
+        Inside a session the session's connection and cached cursor are used
+        and committing is left to the session; ``transaction`` wraps the block
+        in a savepoint so a failed operation leaves no partial writes behind.
+        Otherwise a connection is checked out for the duration of the block
+        and returned to the pool afterwards; with ``transaction`` the block
+        runs in an explicit transaction, committed on success and rolled back
+        on error.
+        """
+        if session is not None:
+            cursor = session.cursor(dictionary=dictionary)
+            if not transaction:
+                yield cursor
+                return
+            savepoint = session.savepoint()
+            cursor.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                raise
+            cursor.execute(f"RELEASE SAVEPOINT {savepoint}")
+            return
+        
+        # Pool connections autocommit, so only explicit transactions need
+        # the extra COMMIT/ROLLBACK round trip
+        connection = self.get_connection()
+        cursor = None
+        try:
+            if transaction:
+                connection.start_transaction()
+            cursor = timed(connection.cursor(dictionary=dictionary, buffered=True))
+            yield cursor
+            if transaction:
+                connection.commit()
+        except BaseException:
+            if transaction:
+                connection.rollback()
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            self.return_connection(connection)
+    
+    def after_commit(self, session, callback):
+        """Run ``callback`` once the session commits, or right away without one"""
+        if session is not None:
+            session.after_commit(callback)
+        else:
+            callback()
+    
+    def stream(self, query, params=None, chunk_size=1000, dictionary=True):
+        """
+        Yield rows from an unbuffered (server-side) cursor, ``chunk_size`` at a time.
+        
+        The pooled connection is held until the generator is exhausted or closed,
+        so memory stays flat regardless of the result size.
+        """
+        connection = self.get_connection()
+        cursor = None
+        try:
+            cursor = timed(connection.cursor(dictionary=dictionary, buffered=False))
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        except Error as e:
+            logging.error(f"Error streaming query results: {e}")
+            raise e
+        finally:
+            try:
+                # Drain anything left by an early close so the connection
+                # goes back to the pool in a clean state
+                connection.consume_results()
+                if cursor:
+                    cursor.close()
+            except Error as e:
+                logging.error(f"Error closing streaming cursor: {e}")
+            self.return_connection(connection)
+
+class TimedCursor:
+    """
+    Cursor proxy reporting every statement's latency to ``metrics`` and
+    the slow ones to ``slow_queries``.
+    
+    Buffered cursors read the whole result inside execute(), so the time
+    covers the round trip and the transfer; everything else is delegated.
+    """
+    def __init__(self, cursor):
+        self._cursor = cursor
+    
+    def execute(self, operation, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, **kwargs)
+        finally:
+            self._record(operation, params, time.perf_counter() - started)
+    
+    def executemany(self, operation, seq_params):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            self._record(operation, seq_params, time.perf_counter() - started)
+    
+    @staticmethod
+    def _record(operation, params, elapsed):
+        metrics.record_statement(elapsed)
+        slow_queries.observe(metrics.current_operation(), operation, params, elapsed)
+    
+    def __iter__(self):
+        return iter(self._cursor)
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+def timed(cursor):
+    return TimedCursor(cursor) if metrics.enabled or slow_queries.enabled else cursor
+
+class Session:
+    """
+    Unit of work bound to one pooled connection and one transaction.
+    
+    Model methods accept it as ``session=`` so a handler's reads and writes
+    share a single checkout and commit once; cursors are created once per
+    kind and reused. Commits on a clean exit, rolls back on an exception.
+    """
+    def __init__(self, database):
+        self._db = database
+        self.connection = None
+        self._cursors = {}
+        self._callbacks = []
+        self._closing = False
+        self._savepoints = 0
+    
+    def __enter__(self):
+        self.connection = self._db.get_connection()
+        try:
+            self.connection.start_transaction()
+        except Error:
+            self._db.return_connection(self.connection)
+            raise
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._closing = True
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            for cursor in self._cursors.values():
+                try:
+                    cursor.close()
+                except Error:
+                    pass
+            self._cursors.clear()
+            self._db.return_connection(self.connection)
+        return False
+    
+    def cursor(self, dictionary=False):
+        if dictionary not in self._cursors:
+            self._cursors[dictionary] = timed(self.connection.cursor(dictionary=dictionary, buffered=True))
+        return self._cursors[dictionary]
+    
+    def after_commit(self, callback):
+        self._callbacks.append(callback)
+    
+    def savepoint(self):
+        """Unique savepoint name for a nested atomic block"""
+        self._savepoints += 1
+        return f"sp_{self._savepoints}"
+    
+    def commit(self):
+        """Commit the work so far; mid-session a new transaction is started"""
+        self.connection.commit()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+        if not self._closing:
+            self.connection.start_transaction()
+    
+    def rollback(self):
+        self._callbacks = []
+        self.connection.rollback()
 
 # Global database instance
 db = DatabaseConnection()
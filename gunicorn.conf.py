@@ -0,0 +1,48 @@
+from config import Config
+from database.connection import db
+from models.ledger_queue import ledger_queue
+import multiprocessing
+
+# Pre-fork server settings for wsgi:app. Each worker is a separate process
+# with its own MySQL pool of POOL_SIZE + POOL_MAX_OVERFLOW connections, so a
+# replica opens up to workers * that many connections.
+
+bind = f"0.0.0.0:{Config.PORT}"
+workers = Config.GUNICORN_WORKERS or multiprocessing.cpu_count() * 2 + 1
+# The ledger queue keeps unflushed rows in one process (see LedgerQueue)
+if Config.LEDGER_QUEUE_ENABLED and workers != 1:
+    raise RuntimeError("LEDGER_QUEUE_ENABLED requires GUNICORN_WORKERS=1")
+# Threads overlap requests that are waiting on MySQL within a worker
+worker_class = 'gthread'
+threads = Config.GUNICORN_THREADS
+
+timeout = Config.GUNICORN_TIMEOUT
+# SIGTERM lets in-flight requests finish for this long before workers are killed
+graceful_timeout = Config.GUNICORN_GRACEFUL_TIMEOUT
+# Longer than the ingress/load balancer idle timeout, so it closes first
+keepalive = Config.GUNICORN_KEEPALIVE
+
+# Recycle workers periodically, with jitter so they do not restart together
+max_requests = Config.GUNICORN_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+
+# Import the app once in the master so workers fork warm; no database
+# connection is opened at import time
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+def post_fork(server, worker):
+    # Never share the parent's sockets: give every worker its own pool,
+    # opened in the background so the worker accepts probes immediately
+    db.reset_after_fork()
+    db.warm_up()
+    # The worker takes ownership of the ledger queue (no-op unless enabled)
+    ledger_queue.reset_after_fork()
+    ledger_queue.start()
+
+def worker_exit(server, worker):
+    # Drain queued ledger rows while the pool is still open
+    ledger_queue.close()
+    db.close()
@@ -1,7 +1,13 @@
 from database.connection import db
+from models.cache import cache, account_key
+from models.metrics import instrument
 from mysql.connector import Error
 import logging
 
+# Column order of the tuple rows returned by get_all
+ACCOUNT_COLUMNS = ('acc_no', 'branch_name', 'balance', 'cust_id', 'cust_name', 'cust_street', 'cust_city')
+
+@instrument
 class Account:
     def __init__(self, acc_no=None, branch_name=None, balance=None, cust_id=None):
         self.acc_no = acc_no
@@ -10,45 +16,42 @@ class Account:
         self.cust_id = cust_id
     
     @staticmethod
-    def create(branch_name, balance, cust_id):
-        connection = None
+    def create(branch_name, balance, cust_id, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = """
-            INSERT INTO Account (branch_name, balance, cust_id) 
-            VALUES (%s, %s, %s)
-            """
-            cursor.execute(query, (branch_name, balance, cust_id))
-            
-            acc_no = cursor.lastrowid
-            cursor.close()
+            with db.cursor(session) as cursor:
+                query = """
+                INSERT INTO Account (branch_name, balance, cust_id)
+                VALUES (%s, %s, %s)
+                """
+                cursor.execute(query, (branch_name, balance, cust_id))
+                
+                acc_no = cursor.lastrowid
             
             return Account(acc_no, branch_name, balance, cust_id)
         except Error as e:
             logging.error(f"Error creating account: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
     @staticmethod
-    def get_by_id(acc_no):
-        connection = None
+    def get_by_id(acc_no, session=None):
+        """Account joined with its customer, served from the read-through cache"""
+        if session is not None:
+            # Reads inside a unit of work must see its uncommitted writes
+            return Account._fetch_by_id(acc_no, session)
+        return cache.get_or_load(account_key(acc_no), lambda: Account._fetch_by_id(acc_no))
+    
+    @staticmethod
+    def _fetch_by_id(acc_no, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-            SELECT a.*, c.cust_name, c.cust_street, c.cust_city 
-            FROM Account a 
-            JOIN Customer c ON a.cust_id = c.cust_id 
-            WHERE a.acc_no = %s
-            """
-            cursor.execute(query, (acc_no,))
-            result = cursor.fetchone()
-            cursor.close()
+            with db.cursor(session, dictionary=True) as cursor:
+                query = """
+                SELECT a.*, c.cust_name, c.cust_street, c.cust_city
+                FROM Account a
+                JOIN Customer c ON a.cust_id = c.cust_id
+                WHERE a.acc_no = %s
+                """
+                cursor.execute(query, (acc_no,))
+                result = cursor.fetchone()
             
             if result:
                 return result
@@ -56,89 +59,78 @@ class Account:
         except Error as e:
             logging.error(f"Error fetching account: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
     @staticmethod
-    def get_all():
-        connection = None
+    def get_all(session=None):
+        """Every account with its customer, as tuples in ACCOUNT_COLUMNS order"""
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-            SELECT a.*, c.cust_name, c.cust_street, c.cust_city 
-            FROM Account a 
-            JOIN Customer c ON a.cust_id = c.cust_id
-            """
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
+            with db.cursor(session) as cursor:
+                cursor.execute(Account._all_query())
+                results = cursor.fetchall()
             
             return results
         except Error as e:
             logging.error(f"Error fetching accounts: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
-    def update(self):
-        connection = None
+    @staticmethod
+    def iter_all(chunk_size=1000):
+        """Yield every account with its customer, by acc_no, from a server-side cursor"""
+        return db.stream(Account._all_query(), chunk_size=chunk_size)
+    
+    @staticmethod
+    def _all_query():
+        return f"""
+        SELECT a.{', a.'.join(ACCOUNT_COLUMNS[:4])}, c.{', c.'.join(ACCOUNT_COLUMNS[4:])}
+        FROM Account a
+        JOIN Customer c ON a.cust_id = c.cust_id
+        ORDER BY a.acc_no
+        """
+    
+    def update(self, session=None):
+        """Write branch_name, and balance unless it is None (concurrent postings keep their effect then)"""
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = """
-            UPDATE Account 
-            SET branch_name = %s, balance = %s 
-            WHERE acc_no = %s
-            """
-            cursor.execute(query, (self.branch_name, self.balance, self.acc_no))
-            cursor.close()
+            with db.cursor(session) as cursor:
+                if self.balance is None:
+                    query = "UPDATE Account SET branch_name = %s WHERE acc_no = %s"
+                    cursor.execute(query, (self.branch_name, self.acc_no))
+                else:
+                    query = """
+                    UPDATE Account
+                    SET branch_name = %s, balance = %s
+                    WHERE acc_no = %s
+                    """
+                    cursor.execute(query, (self.branch_name, self.balance, self.acc_no))
             
+            db.after_commit(session, lambda: cache.invalidate(account_key(self.acc_no)))
             return True
         except Error as e:
             logging.error(f"Error updating account: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
-    def delete(self):
-        connection = None
+    def delete(self, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = "DELETE FROM Account WHERE acc_no = %s"
-            cursor.execute(query, (self.acc_no,))
-            cursor.close()
+            with db.cursor(session, transaction=True) as cursor:
+                # Transaction is partitioned, so it cannot cascade from a foreign key
+                cursor.execute("DELETE FROM Transaction WHERE acc_no = %s", (self.acc_no,))
+                query = "DELETE FROM Account WHERE acc_no = %s"
+                cursor.execute(query, (self.acc_no,))
             
+            db.after_commit(session, lambda: cache.invalidate(account_key(self.acc_no)))
             return True
         except Error as e:
             logging.error(f"Error deleting account: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
-    def update_balance(self, new_balance):
-        connection = None
+    def update_balance(self, new_balance, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = "UPDATE Account SET balance = %s WHERE acc_no = %s"
-            cursor.execute(query, (new_balance, self.acc_no))
-            cursor.close()
+            with db.cursor(session) as cursor:
+                query = "UPDATE Account SET balance = %s WHERE acc_no = %s"
+                cursor.execute(query, (new_balance, self.acc_no))
             
             self.balance = new_balance
+            db.after_commit(session, lambda: cache.invalidate(account_key(self.acc_no)))
             return True
         except Error as e:
             logging.error(f"Error updating balance: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
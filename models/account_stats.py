@@ -0,0 +1,93 @@
+from database.connection import db
+from models.metrics import instrument
+from mysql.connector import Error
+from decimal import Decimal
+import logging
+
+TRANSACTION_TYPES = ('deposit', 'withdrawal', 'transfer_in', 'transfer_out')
+
+STAT_COLUMNS = [
+    column
+    for txn_type in TRANSACTION_TYPES
+    for column in (f"{txn_type}_count", f"{txn_type}_total")
+]
+
+@instrument
+class AccountStats:
+    """
+    Running per-account transaction aggregates.
+    
+    Rows are maintained incrementally by the ledger in the same database
+    transaction as the balance change, so reading a summary is a single
+    primary-key lookup. ``scripts/setup_database.py --rebuild-stats`` and
+    ``--verify-stats`` recompute them from the Transaction table.
+    """
+    
+    @staticmethod
+    def get(acc_no, session=None):
+        """Per-type totals and counts for an account (zeros if it has no activity)"""
+        try:
+            with db.cursor(session, dictionary=True) as cursor:
+                query = f"SELECT {', '.join(STAT_COLUMNS)} FROM AccountStats WHERE acc_no = %s"
+                cursor.execute(query, (acc_no,))
+                result = cursor.fetchone()
+            
+            return AccountStats._summary(result)
+        except Error as e:
+            logging.error(f"Error fetching account stats: {e}")
+            raise e
+    
+    @staticmethod
+    def record(cursor, entries):
+        """
+        Fold ledger entries into the running aggregates.
+        
+        ``entries`` is an iterable of (acc_no, type, amount). Must be called
+        with the cursor of the transaction that writes those ledger rows.
+        """
+        statement = AccountStats._record_query(entries)
+        if statement:
+            cursor.execute(*statement)
+    
+    @staticmethod
+    def merge(summary, transactions):
+        """Add ledger rows (TRANSACTION_COLUMNS tuples) not yet folded into AccountStats, e.g. queued ones, to a summary"""
+        for _, _, txn_type, amount, _ in transactions:
+            summary[txn_type]['count'] += 1
+            summary[txn_type]['total'] += amount
+        return summary
+    
+    @staticmethod
+    def _summary(result):
+        summary = {}
+        for txn_type in TRANSACTION_TYPES:
+            summary[txn_type] = {
+                'count': result[f"{txn_type}_count"] if result else 0,
+                'total': result[f"{txn_type}_total"] if result else Decimal('0.00')
+            }
+        return summary
+    
+    @staticmethod
+    def _record_query(entries):
+        """Upsert statement folding ``entries`` into AccountStats, or None if there are none"""
+        deltas = {}
+        for acc_no, txn_type, amount in entries:
+            row = deltas.setdefault(int(acc_no), {column: 0 for column in STAT_COLUMNS})
+            row[f"{txn_type}_count"] += 1
+            row[f"{txn_type}_total"] += amount
+        if not deltas:
+            return None
+        
+        placeholders = ', '.join(['%s'] * (len(STAT_COLUMNS) + 1))
+        updates = ', '.join(f"{column} = {column} + VALUES({column})" for column in STAT_COLUMNS)
+        query = f"""
+        INSERT INTO AccountStats (acc_no, {', '.join(STAT_COLUMNS)})
+        VALUES {', '.join([f'({placeholders})'] * len(deltas))}
+        ON DUPLICATE KEY UPDATE {updates}
+        """
+        # Sorted so concurrent writers take the stats row locks in the same order
+        params = []
+        for acc_no in sorted(deltas):
+            params.append(acc_no)
+            params.extend(deltas[acc_no][column] for column in STAT_COLUMNS)
+        return query, params
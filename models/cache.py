@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from config import Config
+import logging
+import pickle
+import threading
+import time
+
+class LRUCache:
+    """In-process least-recently-used cache with a per-entry TTL"""
+    def __init__(self, max_entries=10000, ttl=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisCache:
+    """
+    Redis-backed cache shared by every replica.
+    
+    ``client`` only needs ``get``, ``set(key, value, ex=...)`` and
+    ``delete(*keys)``, so a local stand-in can replace Redis in tests.
+    """
+    def __init__(self, client, ttl=5, prefix='banking:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+    
+    def get(self, key):
+        payload = self.client.get(self.prefix + key)
+        return pickle.loads(payload) if payload is not None else None
+    
+    def set(self, key, value):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl)
+    
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+    
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+class NullCache:
+    """Backend that never stores anything (CACHE_BACKEND=none)"""
+    def get(self, key):
+        return None
+    
+    def set(self, key, value):
+        pass
+    
+    def delete(self, *keys):
+        pass
+    
+    def clear(self):
+        pass
+
+class ReadThroughCache:
+    """
+    Read-through cache for model lookups with explicit write invalidation.
+    
+    Loaders return a row dict or None; misses are not cached. Callers get a
+    shallow copy so they can mutate results freely. Backend errors are logged
+    and treated as misses so the database stays the source of truth.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0, 'errors': 0}
+    
+    def configure(self, backend):
+        """Swap the backend (e.g. for a stand-in during tests)"""
+        self.backend = backend
+    
+    def get_or_load(self, key, loader):
+        value = self._lookup(key)
+        if value is not None:
+            return value
+        return self._store(key, loader())
+    
+    async def get_or_load_async(self, key, loader):
+        """Same as get_or_load for a coroutine ``loader`` (used by the asyncio models)"""
+        value = self._lookup(key)
+        if value is not None:
+            return value
+        return self._store(key, await loader())
+    
+    def _lookup(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logging.error(f"Cache get failed for {key}: {e}")
+            self._count('errors')
+            value = None
+        
+        if value is not None:
+            self._count('hits')
+            return dict(value)
+        self._count('misses')
+        return None
+    
+    def _store(self, key, value):
+        if value is not None:
+            try:
+                self.backend.set(key, dict(value))
+            except Exception as e:
+                logging.error(f"Cache set failed for {key}: {e}")
+                self._count('errors')
+        return value
+    
+    def invalidate(self, *keys):
+        try:
+            self.backend.delete(*keys)
+        except Exception as e:
+            logging.error(f"Cache invalidation failed for {keys}: {e}")
+            self._count('errors')
+        self._count('invalidations', len(keys))
+    
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = counters['hits'] / lookups if lookups else 0.0
+        counters['backend'] = type(self.backend).__name__
+        return counters
+    
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+def account_key(acc_no):
+    return f"account:{int(acc_no)}"
+
+def customer_key(cust_id):
+    return f"customer:{int(cust_id)}"
+
+def create_backend():
+    """Build the backend selected by Config.CACHE_BACKEND (memory, redis or none)"""
+    if Config.CACHE_BACKEND == 'none':
+        return NullCache()
+    if Config.CACHE_BACKEND == 'redis':
+        try:
+            import redis
+        except ImportError as e:
+            logging.error("CACHE_BACKEND=redis requires the redis package")
+            raise e
+        return RedisCache(redis.Redis.from_url(Config.REDIS_URL), ttl=Config.CACHE_TTL)
+    return LRUCache(max_entries=Config.CACHE_MAX_ENTRIES, ttl=Config.CACHE_TTL)
+
+# Global cache instance
+cache = ReadThroughCache(create_backend())
@@ -1,7 +1,13 @@
 from database.connection import db
+from models.cache import cache, account_key, customer_key
+from models.metrics import instrument
 from mysql.connector import Error
 import logging
 
+# Column order of the tuple rows returned by get_all
+CUSTOMER_COLUMNS = ('cust_id', 'cust_name', 'cust_street', 'cust_city')
+
+@instrument
 class Customer:
     def __init__(self, cust_id=None, cust_name=None, cust_street=None, cust_city=None):
         self.cust_id = cust_id
@@ -10,119 +16,116 @@ class Customer:
         self.cust_city = cust_city
     
     @staticmethod
-    def create(cust_name, cust_street, cust_city):
-        connection = None
+    def create(cust_name, cust_street, cust_city, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = """
-            INSERT INTO Customer (cust_name, cust_street, cust_city) 
-            VALUES (%s, %s, %s)
-            """
-            cursor.execute(query, (cust_name, cust_street, cust_city))
-            connection.commit()
-            
-            cust_id = cursor.lastrowid
-            cursor.close()
+            with db.cursor(session) as cursor:
+                query = """
+                INSERT INTO Customer (cust_name, cust_street, cust_city)
+                VALUES (%s, %s, %s)
+                """
+                cursor.execute(query, (cust_name, cust_street, cust_city))
+                
+                cust_id = cursor.lastrowid
             
             return Customer(cust_id, cust_name, cust_street, cust_city)
         except Error as e:
-            if connection:
-                connection.rollback()
             logging.error(f"Error creating customer: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
     @staticmethod
-    def get_by_id(cust_id):
-        connection = None
+    def get_by_id(cust_id, session=None):
+        """Customer by id, served from the read-through cache"""
+        if session is not None:
+            # Reads inside a unit of work must see its uncommitted writes
+            row = Customer._fetch_by_id(cust_id, session)
+        else:
+            row = cache.get_or_load(customer_key(cust_id), lambda: Customer._fetch_by_id(cust_id))
+        if row:
+            return Customer(**row)
+        return None
+    
+    @staticmethod
+    def _fetch_by_id(cust_id, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = "SELECT * FROM Customer WHERE cust_id = %s"
-            cursor.execute(query, (cust_id,))
-            result = cursor.fetchone()
-            cursor.close()
+            with db.cursor(session, dictionary=True) as cursor:
+                query = "SELECT cust_id, cust_name, cust_street, cust_city FROM Customer WHERE cust_id = %s"
+                cursor.execute(query, (cust_id,))
+                result = cursor.fetchone()
             
-            if result:
-                return Customer(**result)
-            return None
+            return result
         except Error as e:
             logging.error(f"Error fetching customer: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
     @staticmethod
-    def get_all():
-        connection = None
+    def get_all(session=None):
+        """Every customer as tuples in CUSTOMER_COLUMNS order"""
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
+            with db.cursor(session) as cursor:
+                cursor.execute(Customer._all_query())
+                results = cursor.fetchall()
             
-            query = "SELECT * FROM Customer"
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
-            
-            return [Customer(**row) for row in results]
+            return results
         except Error as e:
             logging.error(f"Error fetching customers: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
-    def update(self):
-        connection = None
+    @staticmethod
+    def iter_all(chunk_size=1000):
+        """Yield every customer row by cust_id from a server-side cursor, without building objects"""
+        return db.stream(Customer._all_query(), chunk_size=chunk_size)
+    
+    @staticmethod
+    def _all_query():
+        return f"SELECT {', '.join(CUSTOMER_COLUMNS)} FROM Customer ORDER BY cust_id"
+    
+    def update(self, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = """
-            UPDATE Customer 
-            SET cust_name = %s, cust_street = %s, cust_city = %s 
-            WHERE cust_id = %s
-            """
-            cursor.execute(query, (self.cust_name, self.cust_street, self.cust_city, self.cust_id))
-            connection.commit()
-            cursor.close()
+            with db.cursor(session) as cursor:
+                query = """
+                UPDATE Customer
+                SET cust_name = %s, cust_street = %s, cust_city = %s
+                WHERE cust_id = %s
+                """
+                cursor.execute(query, (self.cust_name, self.cust_street, self.cust_city, self.cust_id))
+                
+                # Cached account rows embed the customer's name and address
+                keys = Customer._cache_keys(cursor, self.cust_id)
             
+            db.after_commit(session, lambda: cache.invalidate(*keys))
             return True
         except Error as e:
-            if connection:
-                connection.rollback()
             logging.error(f"Error updating customer: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
-    def delete(self):
-        connection = None
+    def delete(self, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = "DELETE FROM Customer WHERE cust_id = %s"
-            cursor.execute(query, (self.cust_id,))
-            connection.commit()
-            cursor.close()
+            with db.cursor(session, transaction=True) as cursor:
+                # Collect the accounts first: the delete cascades to them
+                keys = Customer._cache_keys(cursor, self.cust_id)
+                
+                # ... but not to their transactions (Transaction is partitioned)
+                query = """
+                DELETE t FROM Transaction t
+                JOIN Account a ON t.acc_no = a.acc_no
+                WHERE a.cust_id = %s
+                """
+                cursor.execute(query, (self.cust_id,))
+                
+                query = "DELETE FROM Customer WHERE cust_id = %s"
+                cursor.execute(query, (self.cust_id,))
             
+            db.after_commit(session, lambda: cache.invalidate(*keys))
             return True
         except Error as e:
-            if connection:
-                connection.rollback()
             logging.error(f"Error deleting customer: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
+    
+    @staticmethod
+    def _cache_keys(cursor, cust_id):
+        """Cache keys of the customer and every account that embeds it"""
+        cursor.execute("SELECT acc_no FROM Account WHERE cust_id = %s", (cust_id,))
+        return [customer_key(cust_id)] + [account_key(row[0]) for row in cursor.fetchall()]
     
     def to_dict(self):
         return {
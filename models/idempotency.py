@@ -0,0 +1,114 @@
+from database.connection import db
+from models.cache import LRUCache
+from models.metrics import instrument
+from mysql.connector import Error, errorcode
+from config import Config
+from datetime import datetime, timedelta
+import hashlib
+import logging
+
+class IdempotencyConflictError(Exception):
+    """Raised when an Idempotency-Key is reused with a different request body"""
+    def __init__(self, key):
+        super().__init__(f"Idempotency-Key {key} was used for a different request")
+        self.key = key
+
+class StoredResponse:
+    def __init__(self, status_code=None, body=None):
+        self.status_code = status_code
+        self.body = body
+
+@instrument
+class Idempotency:
+    """
+    Stored responses of money-moving requests, keyed by (endpoint, Idempotency-Key).
+    
+    ``reserve`` inserts the key in the caller's session before the ledger
+    write and ``complete`` stores the response in the same transaction, so
+    the key commits exactly when the balance change does. A concurrent
+    duplicate blocks on the uncommitted key row and then replays the stored
+    response; if the first attempt rolled back it goes ahead instead. Rows
+    expire after IDEMPOTENCY_TTL hours; completed responses are also kept in
+    a small per-process LRU so hot replays skip the database.
+    """
+    _recent = LRUCache(max_entries=Config.IDEMPOTENCY_CACHE_ENTRIES, ttl=Config.IDEMPOTENCY_CACHE_TTL)
+    
+    @staticmethod
+    def request_hash(body):
+        return hashlib.sha256(body).hexdigest()
+    
+    @staticmethod
+    def cached(endpoint, key, request_hash):
+        """Completed response from the in-process cache, or None"""
+        entry = Idempotency._recent.get(f"{endpoint}:{key}")
+        if entry is None:
+            return None
+        if entry[0] != request_hash:
+            raise IdempotencyConflictError(key)
+        return StoredResponse(entry[1], entry[2])
+    
+    @staticmethod
+    def reserve(endpoint, key, request_hash, session):
+        """
+        Claim the key inside ``session``.
+        
+        Returns None when the caller should process the request, or the
+        StoredResponse of an earlier attempt to replay.
+        """
+        try:
+            with db.cursor(session) as cursor:
+                insert = """
+                INSERT INTO IdempotencyKey (endpoint, idem_key, request_hash, expires_at)
+                VALUES (%s, %s, %s, %s)
+                """
+                params = (endpoint, key, request_hash, datetime.now() + timedelta(hours=Config.IDEMPOTENCY_TTL))
+                try:
+                    cursor.execute(insert, params)
+                    return None
+                except Error as e:
+                    if e.errno != errorcode.ER_DUP_ENTRY:
+                        raise e
+                
+                # Locking read: sees the committed row even inside our snapshot
+                cursor.execute(
+                    """
+                    SELECT request_hash, status_code, response_body, expires_at
+                    FROM IdempotencyKey
+                    WHERE endpoint = %s AND idem_key = %s
+                    LOCK IN SHARE MODE
+                    """,
+                    (endpoint, key)
+                )
+                row = cursor.fetchone()
+                if row is None or row[3] < datetime.now():
+                    # Expired (or purged meanwhile): the key is free again
+                    cursor.execute("DELETE FROM IdempotencyKey WHERE endpoint = %s AND idem_key = %s", (endpoint, key))
+                    cursor.execute(insert, params)
+                    return None
+            
+            stored_hash, status_code, body, _ = row
+            if stored_hash != request_hash:
+                raise IdempotencyConflictError(key)
+            Idempotency._recent.set(f"{endpoint}:{key}", (stored_hash, status_code, body))
+            return StoredResponse(status_code, body)
+        except Error as e:
+            logging.error(f"Error reserving idempotency key: {e}")
+            raise e
+    
+    @staticmethod
+    def complete(endpoint, key, request_hash, status_code, body, session):
+        """Store the response for the reserved key in the same transaction as the work"""
+        try:
+            with db.cursor(session) as cursor:
+                query = """
+                UPDATE IdempotencyKey
+                SET status_code = %s, response_body = %s
+                WHERE endpoint = %s AND idem_key = %s
+                """
+                cursor.execute(query, (status_code, body, endpoint, key))
+            
+            session.after_commit(lambda: Idempotency._recent.set(f"{endpoint}:{key}", (request_hash, status_code, body)))
+            return True
+        except Error as e:
+            logging.error(f"Error storing idempotent response: {e}")
+            raise e
@@ -0,0 +1,277 @@
+from database.connection import db
+from models.transaction import Transaction
+from models.account_stats import AccountStats
+from models.cache import cache, account_key
+from models.ledger_queue import ledger_queue
+from models.metrics import instrument
+from mysql.connector import Error
+from datetime import datetime
+import logging
+
+class LedgerError(Exception):
+    """Base class for business-rule failures of a balance mutation"""
+
+class AccountNotFoundError(LedgerError):
+    """Raised when a balance mutation targets an account that does not exist"""
+    def __init__(self, acc_no):
+        super().__init__(f"Account {acc_no} not found")
+        self.acc_no = acc_no
+
+class InsufficientBalanceError(LedgerError):
+    """Raised when a debit would take an account below zero"""
+    def __init__(self, acc_no, current_balance, requested_amount):
+        super().__init__(f"Insufficient balance in account {acc_no}")
+        self.acc_no = acc_no
+        self.current_balance = current_balance
+        self.requested_amount = requested_amount
+
+class BalanceChange:
+    def __init__(self, acc_no=None, previous_balance=None, new_balance=None, transaction=None):
+        self.acc_no = acc_no
+        self.previous_balance = previous_balance
+        self.new_balance = new_balance
+        self.transaction = transaction
+
+@instrument
+class Ledger:
+    """
+    Balance mutation engine.
+    
+    Every operation runs as a single database transaction on one pooled
+    connection: a conditional ``UPDATE ... SET balance = balance +/- x`` that
+    the row lock makes race-free across replicas, followed by the ledger insert
+    and the AccountStats update. With the ledger queue enabled the ledger rows
+    are queued, durably and before the commit, instead, and the balance UPDATE
+    also stores the change's commit marker on the account (see ``LedgerQueue``).
+    """
+    
+    @staticmethod
+    def deposit(acc_no, amount, session=None):
+        try:
+            marker = ledger_queue.marker()
+            with db.cursor(session, transaction=True) as cursor:
+                new_balance, prev = Ledger._credit(cursor, acc_no, amount, marker)
+                transaction, = Ledger._post(cursor, [(acc_no, 'deposit', amount, prev)], marker)
+            
+            Ledger._after_commit(session, [transaction])
+            return BalanceChange(acc_no, new_balance - amount, new_balance, transaction)
+        except Error as e:
+            logging.error(f"Error processing deposit: {e}")
+            raise e
+    
+    @staticmethod
+    def withdraw(acc_no, amount, session=None):
+        try:
+            marker = ledger_queue.marker()
+            with db.cursor(session, transaction=True) as cursor:
+                new_balance, prev = Ledger._debit(cursor, acc_no, amount, marker)
+                transaction, = Ledger._post(cursor, [(acc_no, 'withdrawal', amount, prev)], marker)
+            
+            Ledger._after_commit(session, [transaction])
+            return BalanceChange(acc_no, new_balance + amount, new_balance, transaction)
+        except Error as e:
+            logging.error(f"Error processing withdrawal: {e}")
+            raise e
+    
+    @staticmethod
+    def transfer(from_acc_no, to_acc_no, amount, session=None):
+        """Move funds between two accounts, returning (debit, credit) BalanceChanges"""
+        try:
+            marker = ledger_queue.marker()
+            with db.cursor(session, transaction=True) as cursor:
+                # Touch rows in ascending acc_no order so that two opposite
+                # transfers between the same pair of accounts cannot deadlock
+                new_balances = {}
+                prevs = {}
+                for acc_no in sorted((from_acc_no, to_acc_no), key=int):
+                    if acc_no == from_acc_no:
+                        new_balances[acc_no], prevs[acc_no] = Ledger._debit(cursor, acc_no, amount, marker)
+                    else:
+                        new_balances[acc_no], prevs[acc_no] = Ledger._credit(cursor, acc_no, amount, marker)
+                
+                withdrawal_txn, deposit_txn = Ledger._post(cursor, [
+                    (from_acc_no, 'transfer_out', amount, prevs[from_acc_no]),
+                    (to_acc_no, 'transfer_in', amount, prevs[to_acc_no])
+                ], marker)
+            
+            Ledger._after_commit(session, [withdrawal_txn, deposit_txn])
+            
+            from_balance = new_balances[from_acc_no]
+            to_balance = new_balances[to_acc_no]
+            return (
+                BalanceChange(from_acc_no, from_balance + amount, from_balance, withdrawal_txn),
+                BalanceChange(to_acc_no, to_balance - amount, to_balance, deposit_txn)
+            )
+        except Error as e:
+            logging.error(f"Error processing transfer: {e}")
+            raise e
+    
+    @staticmethod
+    def _marker_assignment(marker):
+        # MySQL assigns left to right, so ledger_prev gets the marker replaced
+        return (", ledger_prev = ledger_marker, ledger_marker = %s", (marker,)) if marker else ("", ())
+    
+    @staticmethod
+    def _credit(cursor, acc_no, amount, marker=None):
+        """Add ``amount`` to the balance; returns (new balance, ledger_prev)"""
+        assignment, params = Ledger._marker_assignment(marker)
+        query = f"UPDATE Account SET balance = balance + %s{assignment} WHERE acc_no = %s"
+        cursor.execute(query, (amount, *params, acc_no))
+        if cursor.rowcount == 0:
+            raise AccountNotFoundError(acc_no)
+        return Ledger._current_balance(cursor, acc_no)
+    
+    @staticmethod
+    def _debit(cursor, acc_no, amount, marker=None):
+        """Take ``amount`` from the balance unless it would go below zero; returns (new balance, ledger_prev)"""
+        assignment, params = Ledger._marker_assignment(marker)
+        query = f"""
+        UPDATE Account
+        SET balance = balance - %s{assignment}
+        WHERE acc_no = %s AND balance >= %s
+        """
+        cursor.execute(query, (amount, *params, acc_no, amount))
+        if cursor.rowcount == 0:
+            current = Ledger._current_balance(cursor, acc_no)
+            if current is None:
+                raise AccountNotFoundError(acc_no)
+            raise InsufficientBalanceError(acc_no, current[0], amount)
+        return Ledger._current_balance(cursor, acc_no)
+    
+    @staticmethod
+    def _current_balance(cursor, acc_no):
+        # Reads inside the mutating transaction see our own locked row version
+        cursor.execute("SELECT balance, ledger_prev FROM Account WHERE acc_no = %s", (acc_no,))
+        return cursor.fetchone()
+    
+    @staticmethod
+    def _post(cursor, entries, marker=None):
+        """
+        Ledger rows for (acc_no, type, amount, ledger_prev) ``entries``,
+        written together with their AccountStats update.
+        
+        With a ledger queue ``marker`` the rows are queued under it instead,
+        in the same transaction, and keep ``txn_id`` None until flushed.
+        """
+        now = datetime.now()
+        transactions = [Transaction(None, acc_no, txn_type, amount, now) for acc_no, txn_type, amount, _ in entries]
+        if marker:
+            ledger_queue.append(marker, [(acc_no, txn_type, amount, now, prev) for acc_no, txn_type, amount, prev in entries])
+            for transaction in transactions:
+                transaction.queue_marker = marker
+            return transactions
+        
+        query = """
+        INSERT INTO Transaction (acc_no, type, amount, date_time)
+        VALUES (%s, %s, %s, %s)
+        """
+        for transaction in transactions:
+            cursor.execute(query, (transaction.acc_no, transaction.type, transaction.amount, transaction.date_time))
+            transaction.txn_id = cursor.lastrowid
+        AccountStats.record(cursor, [entry[:3] for entry in entries])
+        return transactions
+    
+    @staticmethod
+    def _after_commit(session, transactions):
+        """Show the queued ledger rows and invalidate the touched accounts once the change commits"""
+        def committed():
+            marker = getattr(transactions[0], 'queue_marker', None)
+            if marker:
+                ledger_queue.committed(marker)
+            cache.invalidate(*[account_key(transaction.acc_no) for transaction in transactions])
+        
+        db.after_commit(session, committed)
+    
+    @staticmethod
+    def transfer_batch(transfers, commit_size=200):
+        """
+        Apply many (from_acc_no, to_acc_no, amount) transfers with grouped commits.
+        
+        Items are applied in order, ``commit_size`` per database transaction.
+        Each group locks every account it touches with one
+        ``SELECT ... ORDER BY acc_no FOR UPDATE`` (ascending, so concurrent
+        groups and single transfers cannot deadlock), writes the new balances
+        with one UPDATE and the ledger rows with one multi-row INSERT.
+        
+        Returns one entry per input item: a (debit, credit) pair of
+        BalanceChanges, or the exception that made that item fail.
+        """
+        results = []
+        for start in range(0, len(transfers), commit_size):
+            results.extend(Ledger._apply_transfer_group(transfers[start:start + commit_size]))
+        return results
+    
+    @staticmethod
+    def _apply_transfer_group(transfers):
+        try:
+            with db.cursor(transaction=True) as cursor:
+                acc_nos = sorted({int(acc_no) for item in transfers for acc_no in item[:2]})
+                placeholders = ', '.join(['%s'] * len(acc_nos))
+                cursor.execute(
+                    f"SELECT acc_no, balance FROM Account WHERE acc_no IN ({placeholders}) "
+                    f"ORDER BY acc_no FOR UPDATE",
+                    acc_nos
+                )
+                balances = dict(cursor.fetchall())
+                
+                results, ledger_rows, touched = Ledger._plan_transfer_group(transfers, balances)
+                
+                if touched:
+                    cursor.execute(*Ledger._balance_update_query(touched, balances))
+                    cursor.executemany(
+                        "INSERT INTO Transaction (acc_no, type, amount, date_time) VALUES (%s, %s, %s, %s)",
+                        ledger_rows
+                    )
+                    AccountStats.record(cursor, [row[:3] for row in ledger_rows])
+            
+            cache.invalidate(*[account_key(acc_no) for acc_no in touched])
+            return results
+        except Error as e:
+            logging.error(f"Error processing transfer batch: {e}")
+            return [e] * len(transfers)
+    
+    @staticmethod
+    def _plan_transfer_group(transfers, balances):
+        """
+        Apply a group of transfers to locked ``balances`` (acc_no -> balance) in memory.
+        
+        Returns the per-item results, the ledger rows to insert and the sorted
+        account numbers whose balance changed.
+        """
+        results = []
+        ledger_rows = []
+        touched = set()
+        now = datetime.now()
+        for from_acc_no, to_acc_no, amount in transfers:
+            from_key, to_key = int(from_acc_no), int(to_acc_no)
+            if from_key not in balances:
+                results.append(AccountNotFoundError(from_acc_no))
+                continue
+            if to_key not in balances:
+                results.append(AccountNotFoundError(to_acc_no))
+                continue
+            if balances[from_key] < amount:
+                results.append(InsufficientBalanceError(from_acc_no, balances[from_key], amount))
+                continue
+            
+            balances[from_key] -= amount
+            balances[to_key] += amount
+            touched.update((from_key, to_key))
+            ledger_rows.append((from_key, 'transfer_out', amount, now))
+            ledger_rows.append((to_key, 'transfer_in', amount, now))
+            results.append((
+                BalanceChange(from_acc_no, balances[from_key] + amount, balances[from_key]),
+                BalanceChange(to_acc_no, balances[to_key] - amount, balances[to_key])
+            ))
+        return results, ledger_rows, sorted(touched)
+    
+    @staticmethod
+    def _balance_update_query(touched, balances):
+        """Single UPDATE writing the new balance of every account in ``touched``"""
+        cases = ' '.join(['WHEN %s THEN %s'] * len(touched))
+        params = [value for acc_no in touched for value in (acc_no, balances[acc_no])]
+        query = (
+            f"UPDATE Account SET balance = CASE acc_no {cases} END "
+            f"WHERE acc_no IN ({', '.join(['%s'] * len(touched))})"
+        )
+        return query, params + list(touched)
@@ -0,0 +1,490 @@
+from database.connection import db
+from models.account_stats import AccountStats
+from mysql.connector import Error
+from config import Config
+from datetime import datetime
+from decimal import Decimal
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+# MySQL named lock held by the one process allowed to queue ledger rows
+LOCK_NAME = 'banking_ledger_queue'
+# Seconds a queued change may go without its commit callback before the
+# flusher asks MySQL whether it committed (a rollback or a lost COMMIT reply)
+RESOLVE_AFTER = 5.0
+
+class LedgerQueueUnavailableError(Exception):
+    """Raised when a balance change cannot be queued: this process does not own the ledger queue"""
+
+class LedgerQueue:
+    """
+    Optional write-ahead queue for ledger rows (LEDGER_QUEUE_ENABLED).
+    
+    With the queue on, the ledger still updates balances synchronously, so
+    overdraft checks stay exact, but its Transaction rows are appended to a
+    local segment file instead of being inserted one by one. The append
+    happens inside the balance change's transaction, right before it
+    commits, and returns once the entry is fsynced, so a balance change
+    never commits without its ledger rows on disk. Appends are
+    group-committed: one fsync makes every line written before it durable.
+    
+    Whether a queued change committed is known from ``committed`` (its
+    after-commit callback) or, when that never came, from the Account rows:
+    the balance UPDATE of a queued change stores a fresh marker in
+    Account.ledger_marker and the one it replaced in ledger_prev (see
+    ``Ledger``), which adds no row to the change. The committed changes of
+    an account form a chain from its ledger_marker through the prev of
+    their entries, so a change committed exactly when its marker is still
+    the account's ledger_marker or the prev of a later entry.
+    
+    The queue is single-process: the chain is complete, and ``pending()``
+    (the unflushed rows the read endpoints merge) shows every queued row,
+    only if every queued change is in this process's segments. The flusher
+    takes a MySQL named lock (LOCK_NAME) for the process's lifetime and
+    ``marker`` refuses to queue without it, so with the queue on the posting
+    service runs as one process (GUNICORN_WORKERS=1, one replica).
+    
+    Once it holds the lock, the flusher drains the segments a previous
+    owner left behind, then moves committed entries to MySQL every
+    LEDGER_QUEUE_FLUSH_INTERVAL seconds, in queue order, as multi-row
+    INSERTs of up to LEDGER_QUEUE_BATCH_SIZE rows. Entries of rolled-back
+    changes and of accounts deleted since are dropped. Applied rows are
+    folded into AccountStats and the segment's offset advanced in
+    LedgerQueueOffset in the same transaction, so no entry is ever applied
+    twice. LEDGER_QUEUE_DIR should be on a persistent volume: a committed
+    change's rows are only in its segment until flushed.
+    """
+    
+    def __init__(self, directory, enabled):
+        self.directory = directory
+        self.enabled = enabled
+        self._reset_state()
+    
+    def _reset_state(self):
+        self._segment = None
+        self._file = None
+        self._written = 0
+        self._synced = 0
+        self._pending = []  # (end offset, marker, prev, entry, appended at) not flushed yet, oldest first
+        self._outcomes = {}  # marker -> True (committed), False (rolled back) or None (unknown yet)
+        self._owner = None  # Connection holding LOCK_NAME
+        self._ready = threading.Event()
+        self._last_error = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._flusher = None
+        self._metrics = {
+            'appended': 0,
+            'flushed': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'fsyncs': 0,
+            'resolved': 0,
+            'flush_errors': 0,
+            'recovered_segments': 0
+        }
+    
+    def start(self):
+        """Start the background flusher, which takes ownership of the queue"""
+        if not self.enabled:
+            return
+        with self._start_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name='ledger-queue-flusher', daemon=True)
+                self._flusher.start()
+    
+    def reset_after_fork(self):
+        """Forget state inherited from the parent process without touching its files"""
+        self._reset_state()
+    
+    def marker(self):
+        """
+        Fresh commit marker for one balance change, or None with the queue
+        off. Waits up to POOL_TIMEOUT for this process to own the queue.
+        """
+        if not self.enabled:
+            return None
+        self.start()
+        if not self._ready.wait(Config.POOL_TIMEOUT):
+            raise LedgerQueueUnavailableError(f"Ledger queue is not available: {self._last_error}")
+        return uuid.uuid4().hex
+    
+    def append(self, marker, entries):
+        """
+        Durably queue (acc_no, type, amount, date_time, prev) ledger entries
+        of the balance change that wrote ``marker``, ``prev`` being the
+        account's ledger_marker it replaced. Call it inside that change's
+        transaction, right before committing, and ``committed`` once it has.
+        """
+        lines = [
+            (json.dumps({
+                'acc_no': int(acc_no),
+                'type': txn_type,
+                'amount': str(amount),
+                'date_time': date_time.isoformat(),
+                'marker': marker,
+                'prev': prev
+            }) + '\n').encode()
+            for acc_no, txn_type, amount, date_time, prev in entries
+        ]
+        with self._lock:
+            if self._file is None:
+                raise LedgerQueueUnavailableError("Ledger queue is closed")
+            appended_at = time.monotonic()
+            for (acc_no, txn_type, amount, date_time, prev), line in zip(entries, lines):
+                self._file.write(line)
+                self._written += len(line)
+                self._pending.append((self._written, marker, prev, (int(acc_no), txn_type, amount, date_time), appended_at))
+            self._outcomes[marker] = None
+            self._file.flush()
+            position = self._written
+            self._metrics['appended'] += len(entries)
+        self._sync(position)
+    
+    def committed(self, marker):
+        """Show the entries queued under ``marker`` in ``pending()``"""
+        with self._lock:
+            if marker in self._outcomes:
+                self._outcomes[marker] = True
+    
+    def pending(self, acc_no, date_from=None, date_to=None):
+        """Unflushed committed rows for an account, newest first, as tuples in TRANSACTION_COLUMNS order"""
+        if not self.enabled:
+            return []
+        with self._lock:
+            entries = [
+                entry for _, marker, _, entry, _ in self._pending
+                if entry[0] == int(acc_no) and self._outcomes.get(marker)
+            ]
+        return [
+            (None, entry_acc_no, txn_type, amount, date_time)
+            for entry_acc_no, txn_type, amount, date_time in reversed(entries)
+            if (date_from is None or date_time >= date_from) and (date_to is None or date_time < date_to)
+        ]
+    
+    def flush(self, resolve_after=RESOLVE_AFTER):
+        """
+        Move one batch of durable entries to MySQL, in queue order; returns
+        how many left the queue. The batch stops at the first change whose
+        commit is unknown and younger than ``resolve_after`` seconds; older
+        unknown ones are looked up in MySQL.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = [
+                    item for item in self._pending[:Config.LEDGER_QUEUE_BATCH_SIZE]
+                    if item[0] <= self._synced
+                ]
+                outcomes = {item[1]: self._outcomes[item[1]] for item in batch}
+            
+            deadline = time.monotonic() - resolve_after
+            for index, item in enumerate(batch):
+                if outcomes[item[1]] is None and item[4] > deadline:
+                    batch = batch[:index]
+                    break
+            outcomes = {item[1]: outcomes[item[1]] for item in batch}
+            unknown = [item for item in batch if outcomes[item[1]] is None]
+            if unknown:
+                resolved = self._resolve(unknown, self._pending_prevs)
+                outcomes.update((item[1], item[1] in resolved) for item in unknown)
+                with self._lock:
+                    self._metrics['resolved'] += len({item[1] for item in unknown})
+            if not batch:
+                return 0
+            
+            self._write_batch(self._segment, batch, {marker for marker, outcome in outcomes.items() if outcome})
+            with self._lock:
+                del self._pending[:len(batch)]
+                # A change's entries are adjacent; keep the outcome of one
+                # the batch split
+                following = self._pending[0][1] if self._pending else None
+                for marker in outcomes:
+                    if marker != following:
+                        self._outcomes.pop(marker, None)
+                    else:
+                        self._outcomes[marker] = outcomes[marker]
+            return len(batch)
+    
+    def close(self):
+        """Stop the flusher, drain this process's segment, remove it and give up the queue"""
+        self._stopping.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=Config.LEDGER_QUEUE_FLUSH_INTERVAL * 10)
+        if self._file is not None:
+            try:
+                # No request is in flight any more: look up every unknown commit now
+                while self.flush(resolve_after=0):
+                    pass
+            except Error as e:
+                # The segment stays on disk for the next owner
+                logging.error(f"Error draining ledger queue on shutdown: {e}")
+            with self._lock:
+                handle, self._file = self._file, None
+                drained = not self._pending
+            if drained:
+                self._remove_segment(self._segment)
+            handle.close()
+        self._release_ownership()
+    
+    def stats(self):
+        """Queue depth and flush counters for this process"""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats['pending'] = len(self._pending)
+        stats['enabled'] = self.enabled
+        stats['owner'] = self._ready.is_set()
+        stats['last_error'] = self._last_error
+        stats['segment'] = self._segment
+        return stats
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                if self._ready.is_set():
+                    self._check_ownership()
+                else:
+                    self._take_ownership()
+                while self.flush() == Config.LEDGER_QUEUE_BATCH_SIZE:
+                    pass
+                self._rotate()
+                self._last_error = None
+            except (Error, OSError, LedgerQueueUnavailableError) as e:
+                self._metrics['flush_errors'] += 1
+                if str(e) != self._last_error:
+                    logging.error(f"Error flushing ledger queue: {e}")
+                self._last_error = str(e)
+            self._stopping.wait(Config.LEDGER_QUEUE_FLUSH_INTERVAL)
+    
+    def _take_ownership(self):
+        """Take LOCK_NAME for this process, drain what a previous owner left and open a segment"""
+        connection = db.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+            acquired = cursor.fetchone()[0] == 1
+            cursor.close()
+            if not acquired:
+                raise LedgerQueueUnavailableError(
+                    "Another process owns the ledger queue; with LEDGER_QUEUE_ENABLED run a single process"
+                )
+            os.makedirs(self.directory, exist_ok=True)
+            self._recover_orphans()
+            with self._sync_lock, self._lock:
+                if self._file is None:
+                    self._open_segment()
+        except BaseException:
+            connection.close()
+            raise
+        self._owner = connection
+        self._ready.set()
+    
+    def _check_ownership(self):
+        try:
+            cursor = self._owner.cursor()
+            cursor.execute("SELECT IS_USED_LOCK(%s) = CONNECTION_ID()", (LOCK_NAME,))
+            owned = cursor.fetchone()[0] == 1
+            cursor.close()
+        except Error:
+            owned = False
+        if not owned:
+            self._release_ownership()
+            raise LedgerQueueUnavailableError("Lost the ledger queue lock")
+    
+    def _release_ownership(self):
+        self._ready.clear()
+        owner, self._owner = self._owner, None
+        if owner is not None:
+            try:
+                owner.close()
+            except Error as e:
+                logging.error(f"Error releasing the ledger queue lock: {e}")
+    
+    def _open_segment(self):
+        name = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.log"
+        path = os.path.join(self.directory, name)
+        # Lock the file under a name recovery ignores before publishing it,
+        # so no other flusher can take a new segment for an orphan
+        handle = open(f"{path}.new", 'ab')
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.rename(f"{path}.new", path)
+        self._segment = name
+        self._file = handle
+        self._written = 0
+        self._synced = 0
+    
+    def _sync(self, position):
+        # Group commit: whoever gets the lock fsyncs everything written so
+        # far, and the appenders queued behind it find their bytes synced
+        with self._sync_lock:
+            if self._synced >= position:
+                return
+            with self._lock:
+                target = self._written
+            os.fsync(self._file.fileno())
+            self._synced = target
+            self._metrics['fsyncs'] += 1
+    
+    def _rotate(self):
+        """Start a fresh segment once the current one is large and fully flushed"""
+        with self._sync_lock, self._lock:
+            if self._pending or self._written < Config.LEDGER_QUEUE_SEGMENT_BYTES:
+                return
+            old_segment, old_file = self._segment, self._file
+            self._open_segment()
+        self._remove_segment(old_segment)
+        old_file.close()
+    
+    def _pending_prevs(self):
+        with self._lock:
+            return {item[2] for item in self._pending}
+    
+    @staticmethod
+    def _resolve(items, later_prevs):
+        """
+        Markers of the (end offset, marker, prev, entry, ...) ``items`` whose
+        change committed. The locking read waits for a change still holding
+        its accounts, so every committed change is queued by the time
+        ``later_prevs()`` returns the prev of each entry queued after them.
+        """
+        acc_nos = sorted({item[3][0] for item in items})
+        with db.cursor(transaction=True) as cursor:
+            cursor.execute(
+                f"SELECT acc_no, ledger_marker FROM Account WHERE acc_no IN ({', '.join(['%s'] * len(acc_nos))}) "
+                f"LOCK IN SHARE MODE",
+                acc_nos
+            )
+            heads = dict(cursor.fetchall())
+        prevs = later_prevs()
+        return {item[1] for item in items if heads.get(item[3][0]) == item[1] or item[1] in prevs}
+    
+    def _write_batch(self, segment, batch, committed):
+        """Insert the entries of ``committed`` changes in ``batch`` and advance the segment offset in one transaction"""
+        with db.cursor(transaction=True) as cursor:
+            cursor.execute(
+                "SELECT flushed_offset FROM LedgerQueueOffset WHERE segment = %s FOR UPDATE",
+                (segment,)
+            )
+            row = cursor.fetchone()
+            flushed_offset = row[0] if row else 0
+            
+            # Skip anything a previous attempt already committed
+            batch = [item for item in batch if item[0] > flushed_offset]
+            entries = [item[3] for item in batch if item[1] in committed]
+            
+            # Account.delete removes an account's ledger, so rows still queued
+            # for it are dropped. A delete committing after this read makes
+            # the AccountStats foreign key fail the batch, and the retry
+            # drops them.
+            if entries:
+                acc_nos = sorted({entry[0] for entry in entries})
+                cursor.execute(
+                    f"SELECT acc_no FROM Account WHERE acc_no IN ({', '.join(['%s'] * len(acc_nos))})",
+                    acc_nos
+                )
+                existing = {row[0] for row in cursor.fetchall()}
+                entries = [entry for entry in entries if entry[0] in existing]
+            if entries:
+                cursor.executemany(
+                    "INSERT INTO Transaction (acc_no, type, amount, date_time) VALUES (%s, %s, %s, %s)",
+                    entries
+                )
+                AccountStats.record(cursor, [entry[:3] for entry in entries])
+            cursor.execute(
+                """
+                INSERT INTO LedgerQueueOffset (segment, flushed_offset) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE flushed_offset = VALUES(flushed_offset)
+                """,
+                (segment, batch[-1][0] if batch else flushed_offset)
+            )
+        
+        with self._lock:
+            self._metrics['flushed'] += len(entries)
+            self._metrics['dropped'] += len(batch) - len(entries)
+            self._metrics['flushes'] += 1
+    
+    def _recover_orphans(self):
+        for name in os.listdir(self.directory):
+            if name == self._segment or not name.endswith('.log'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                handle = open(path, 'rb')
+            except FileNotFoundError:
+                continue
+            try:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Its writer is alive
+                try:
+                    if os.stat(path).st_ino != os.fstat(handle.fileno()).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue  # Drained and removed by another flusher meanwhile
+                self._drain(name, handle)
+                self._remove_segment(name)
+                self._metrics['recovered_segments'] += 1
+                logging.info(f"Recovered ledger queue segment {name}")
+            finally:
+                handle.close()
+    
+    def _drain(self, segment, handle):
+        """Apply the unflushed entries of a dead process's segment; none of their commits is known"""
+        with db.cursor() as cursor:
+            cursor.execute("SELECT flushed_offset FROM LedgerQueueOffset WHERE segment = %s", (segment,))
+            row = cursor.fetchone()
+        start = row[0] if row else 0
+        
+        handle.seek(start)
+        prevs = {record['prev'] for record in self._records(handle)}
+        handle.seek(start)
+        batch = []
+        for item in self._items(handle, start):
+            batch.append(item)
+            if len(batch) == Config.LEDGER_QUEUE_BATCH_SIZE:
+                self._write_batch(segment, batch, self._resolve(batch, lambda: prevs))
+                batch = []
+        if batch:
+            self._write_batch(segment, batch, self._resolve(batch, lambda: prevs))
+    
+    @staticmethod
+    def _records(handle):
+        for line in handle:
+            if not line.endswith(b'\n'):
+                break  # Torn final write
+            yield json.loads(line)
+    
+    @staticmethod
+    def _items(handle, position):
+        for line in handle:
+            if not line.endswith(b'\n'):
+                break
+            position += len(line)
+            record = json.loads(line)
+            yield (position, record['marker'], record['prev'], (
+                record['acc_no'],
+                record['type'],
+                Decimal(record['amount']),
+                datetime.fromisoformat(record['date_time'])
+            ), None)
+    
+    def _remove_segment(self, segment):
+        """Delete a fully flushed segment file, then its offset row"""
+        try:
+            os.remove(os.path.join(self.directory, segment))
+            with db.cursor() as cursor:
+                cursor.execute("DELETE FROM LedgerQueueOffset WHERE segment = %s", (segment,))
+        except (Error, OSError) as e:
+            logging.error(f"Error removing ledger queue segment {segment}: {e}")
+
+# Global ledger queue; inert unless LEDGER_QUEUE_ENABLED
+ledger_queue = LedgerQueue(Config.LEDGER_QUEUE_DIR, Config.LEDGER_QUEUE_ENABLED)
@@ -1,7 +1,12 @@
 from database.connection import db
+from models.metrics import instrument
 from mysql.connector import Error
 import logging
 
+# Column order of the tuple rows returned by find
+LOAN_COLUMNS = ('loan_no', 'branch_name', 'amount', 'status', 'installments_remaining', 'cust_id', 'cust_name')
+
+@instrument
 class Loan:
     def __init__(self, loan_no=None, branch_name=None, amount=None, status=None, installments_remaining=None):
         self.loan_no = loan_no
@@ -11,128 +16,131 @@ class Loan:
         self.installments_remaining = installments_remaining
     
     @staticmethod
-    def create(branch_name, amount, installments_remaining, cust_id):
-        connection = None
+    def create(branch_name, amount, installments_remaining, cust_id, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            # Create loan
-            loan_query = """
-            INSERT INTO Loan (branch_name, amount, status, installments_remaining) 
-            VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(loan_query, (branch_name, amount, 'pending', installments_remaining))
-            loan_no = cursor.lastrowid
-            
-            # Create borrower relationship
-            borrower_query = "INSERT INTO Borrower (cust_id, loan_no) VALUES (%s, %s)"
-            cursor.execute(borrower_query, (cust_id, loan_no))
-            
-            connection.commit()
-            cursor.close()
+            with db.cursor(session, transaction=True) as cursor:
+                # Create loan
+                loan_query = """
+                INSERT INTO Loan (branch_name, amount, status, installments_remaining)
+                VALUES (%s, %s, %s, %s)
+                """
+                cursor.execute(loan_query, (branch_name, amount, 'pending', installments_remaining))
+                loan_no = cursor.lastrowid
+                
+                # Create borrower relationship
+                borrower_query = "INSERT INTO Borrower (cust_id, loan_no) VALUES (%s, %s)"
+                cursor.execute(borrower_query, (cust_id, loan_no))
             
             return Loan(loan_no, branch_name, amount, 'pending', installments_remaining)
         except Error as e:
-            if connection:
-                connection.rollback()
             logging.error(f"Error creating loan: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
     @staticmethod
-    def get_by_id(loan_no):
-        connection = None
+    def get_by_id(loan_no, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-            SELECT l.*, c.cust_name, c.cust_id 
-            FROM Loan l 
-            JOIN Borrower b ON l.loan_no = b.loan_no 
-            JOIN Customer c ON b.cust_id = c.cust_id 
-            WHERE l.loan_no = %s
-            """
-            cursor.execute(query, (loan_no,))
-            result = cursor.fetchone()
-            cursor.close()
+            with db.cursor(session, dictionary=True) as cursor:
+                query = """
+                SELECT l.*, c.cust_name, c.cust_id
+                FROM Loan l
+                JOIN Borrower b ON l.loan_no = b.loan_no
+                JOIN Customer c ON b.cust_id = c.cust_id
+                WHERE l.loan_no = %s
+                """
+                cursor.execute(query, (loan_no,))
+                result = cursor.fetchone()
             
             return result
         except Error as e:
             logging.error(f"Error fetching loan: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
     @staticmethod
-    def get_all():
-        connection = None
+    def find(status=None, branch_name=None, cust_id=None, min_amount=None, max_amount=None,
+             limit=None, after_loan_no=None, session=None):
+        """
+        Fetch loans matching the given filters, ordered by loan_no, as
+        tuples in LOAN_COLUMNS order.
+        
+        ``after_loan_no`` is a keyset cursor: only loans with a higher number
+        are returned. With a status filter this is a range scan of the
+        (status, loan_no) index, so cost follows the matching loans rather
+        than the size of the loan book.
+        """
+        query, params = Loan._find_query(status, branch_name, cust_id, min_amount, max_amount, limit, after_loan_no)
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-            SELECT l.*, c.cust_name, c.cust_id 
-            FROM Loan l 
-            JOIN Borrower b ON l.loan_no = b.loan_no 
-            JOIN Customer c ON b.cust_id = c.cust_id
-            """
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
+            with db.cursor(session) as cursor:
+                cursor.execute(query, params)
+                results = cursor.fetchall()
             
             return results
         except Error as e:
             logging.error(f"Error fetching loans: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
-    def approve(self):
-        connection = None
+    @staticmethod
+    def iter_find(status=None, branch_name=None, cust_id=None, min_amount=None, max_amount=None,
+                  after_loan_no=None, chunk_size=1000):
+        """Yield every loan matching the filters of ``find``, by loan_no, from a server-side cursor"""
+        query, params = Loan._find_query(status, branch_name, cust_id, min_amount, max_amount, None, after_loan_no)
+        return db.stream(query, params, chunk_size=chunk_size)
+    
+    @staticmethod
+    def _find_query(status, branch_name, cust_id, min_amount, max_amount, limit, after_loan_no):
+        query = f"""
+        SELECT l.{', l.'.join(LOAN_COLUMNS[:5])}, c.{', c.'.join(LOAN_COLUMNS[5:])}
+        FROM Loan l
+        JOIN Borrower b ON l.loan_no = b.loan_no
+        JOIN Customer c ON b.cust_id = c.cust_id
+        """
+        conditions = []
+        params = []
+        if status is not None:
+            conditions.append("l.status = %s")
+            params.append(status)
+        if branch_name is not None:
+            conditions.append("l.branch_name = %s")
+            params.append(branch_name)
+        if cust_id is not None:
+            conditions.append("b.cust_id = %s")
+            params.append(cust_id)
+        if min_amount is not None:
+            conditions.append("l.amount >= %s")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("l.amount <= %s")
+            params.append(max_amount)
+        if after_loan_no is not None:
+            conditions.append("l.loan_no > %s")
+            params.append(after_loan_no)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY l.loan_no"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, tuple(params)
+    
+    def approve(self, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = "UPDATE Loan SET status = 'approved' WHERE loan_no = %s"
-            cursor.execute(query, (self.loan_no,))
-            connection.commit()
-            cursor.close()
+            with db.cursor(session) as cursor:
+                query = "UPDATE Loan SET status = 'approved' WHERE loan_no = %s"
+                cursor.execute(query, (self.loan_no,))
             
             self.status = 'approved'
             return True
         except Error as e:
-            if connection:
-                connection.rollback()
             logging.error(f"Error approving loan: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
-    def update_installments(self, remaining):
-        connection = None
+    def update_installments(self, remaining, session=None):
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
-            
-            query = "UPDATE Loan SET installments_remaining = %s WHERE loan_no = %s"
-            cursor.execute(query, (remaining, self.loan_no))
-            connection.commit()
-            cursor.close()
+            with db.cursor(session) as cursor:
+                query = "UPDATE Loan SET installments_remaining = %s WHERE loan_no = %s"
+                cursor.execute(query, (remaining, self.loan_no))
             
             self.installments_remaining = remaining
             return True
         except Error as e:
-            if connection:
-                connection.rollback()
             logging.error(f"Error updating installments: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
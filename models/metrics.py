@@ -0,0 +1,238 @@
+from config import Config
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond primary-key lookups to
+# requests stuck behind the pool timeout
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+HELP = {
+    'banking_http_request_duration_seconds': 'Request latency by route',
+    'banking_http_request_db_seconds': 'Time spent executing SQL per request',
+    'banking_http_request_queries': 'SQL statements executed per request',
+    'banking_http_request_pool_checkouts': 'Connection pool checkouts per request',
+    'banking_sql_duration_seconds': 'SQL statement latency by model operation'
+}
+
+# db.stats() / adb.stats() keys exposed on /metrics: (metric name, type, help)
+POOL_METRICS = {
+    'checkouts': ('banking_pool_checkouts_total', 'counter', 'Connections checked out of the pool'),
+    'overflow_checkouts': ('banking_pool_overflow_checkouts_total', 'counter', 'Checkouts served by an overflow connection'),
+    'exhaustion_events': ('banking_pool_exhaustion_events_total', 'counter', 'Checkouts refused because the pool was exhausted'),
+    'wait_time_total': ('banking_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection'),
+    'wait_time_max': ('banking_pool_wait_seconds_max', 'gauge', 'Longest wait for a connection'),
+    'in_use': ('banking_pool_connections_in_use', 'gauge', 'Connections checked out right now'),
+    'waiting': ('banking_pool_waiting', 'gauge', 'Requests waiting for a connection'),
+    'pool_size': ('banking_pool_size', 'gauge', 'Configured pool size')
+}
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (not thread-safe on its own)"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class RequestStats:
+    """What one request spent on the database, filled in as it runs"""
+    __slots__ = ('started', 'db_time', 'queries', 'checkouts')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.checkouts = 0
+
+_request = ContextVar('request_stats', default=None)
+_operation = ContextVar('sql_operation', default='unnamed')
+
+class Metrics:
+    """
+    Per-process request and SQL metrics, rendered in the Prometheus text format.
+    
+    The app opens a RequestStats per request (``start_request``) and records
+    it with the route when the response is ready (``finish_request``). The
+    database layer reports every statement (``record_statement``) and pool
+    checkout (``record_checkout``), attributed to the current request and to
+    the model operation that ran it (see ``instrument``). Context variables
+    carry both, so threads and asyncio tasks keep their own.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+    
+    def start_request(self):
+        if self.enabled:
+            _request.set(RequestStats())
+    
+    def finish_request(self, method, route, status):
+        stats = _request.get()
+        if stats is None:
+            return
+        _request.set(None)
+        elapsed = time.perf_counter() - stats.started
+        self.observe('banking_http_request_duration_seconds', (('method', method), ('route', route), ('status', str(status))), elapsed, LATENCY_BUCKETS)
+        self.observe('banking_http_request_db_seconds', (('route', route),), stats.db_time, LATENCY_BUCKETS)
+        self.observe('banking_http_request_queries', (('route', route),), stats.queries, COUNT_BUCKETS)
+        self.observe('banking_http_request_pool_checkouts', (('route', route),), stats.checkouts, COUNT_BUCKETS)
+    
+    def record_statement(self, elapsed):
+        if not self.enabled:
+            return
+        stats = _request.get()
+        if stats is not None:
+            stats.db_time += elapsed
+            stats.queries += 1
+        self.observe('banking_sql_duration_seconds', (('operation', _operation.get()),), elapsed, LATENCY_BUCKETS)
+    
+    def record_checkout(self):
+        stats = _request.get()
+        if stats is not None:
+            stats.checkouts += 1
+    
+    def current_operation(self):
+        return _operation.get()
+    
+    @contextmanager
+    def operation(self, name):
+        """Attribute the statements run inside the block to ``name``"""
+        token = _operation.set(name)
+        try:
+            yield
+        finally:
+            _operation.reset(token)
+    
+    def observe(self, name, labels, value, buckets):
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram(buckets)
+            histogram.observe(value)
+    
+    def render(self, pool=None):
+        """
+        Prometheus text exposition (format 0.0.4) of every histogram, plus
+        the connection pool's ``stats()`` when given.
+        """
+        with self._lock:
+            snapshot = sorted(
+                ((name, labels, list(h.counts), h.sum, h.count, h.buckets) for (name, labels), h in self._histograms.items()),
+                key=lambda item: (item[0], item[1])
+            )
+        
+        lines = []
+        current = None
+        for name, labels, counts, total, count, buckets in snapshot:
+            if name != current:
+                current = name
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        
+        for key, (name, kind, description) in POOL_METRICS.items():
+            if pool and key in pool:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {pool[key]}")
+        return '\n'.join(lines) + '\n'
+    
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def instrument(cls):
+    """
+    Class decorator naming the SQL of every public method ``Class.method``.
+    
+    Statements a method runs, including those of generators it returns, are
+    recorded under its name in banking_sql_duration_seconds; a nested
+    instrumented call takes over the name while it runs. Private helpers
+    keep the name of the public method that called them.
+    """
+    if not metrics.enabled:
+        return cls
+    for attribute, member in list(vars(cls).items()):
+        if attribute.startswith('_'):
+            continue
+        if isinstance(member, staticmethod):
+            setattr(cls, attribute, staticmethod(_named(f"{cls.__name__}.{attribute}", member.__func__)))
+        elif isinstance(member, classmethod):
+            setattr(cls, attribute, classmethod(_named(f"{cls.__name__}.{attribute}", member.__func__)))
+        elif inspect.isfunction(member):
+            setattr(cls, attribute, _named(f"{cls.__name__}.{attribute}", member))
+    return cls
+
+def _named(name, function):
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def run_async(*args, **kwargs):
+            token = _operation.set(name)
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                _operation.reset(token)
+        return run_async
+    
+    @functools.wraps(function)
+    def run(*args, **kwargs):
+        token = _operation.set(name)
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            _operation.reset(token)
+        if inspect.isgenerator(result):
+            return _named_generator(name, result)
+        if inspect.isasyncgen(result):
+            return _named_async_generator(name, result)
+        return result
+    return run
+
+def _named_generator(name, generator):
+    # Streams run their query lazily, on the first next()
+    with metrics.operation(name):
+        first = next(generator, _END)
+    if first is _END:
+        return
+    yield first
+    yield from generator
+
+async def _named_async_generator(name, generator):
+    with metrics.operation(name):
+        try:
+            first = await generator.__anext__()
+        except StopAsyncIteration:
+            return
+    yield first
+    async for item in generator:
+        yield item
+
+_END = object()
+
+# Global metrics registry
+metrics = Metrics(enabled=Config.METRICS_ENABLED)
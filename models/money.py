@@ -0,0 +1,34 @@
+from decimal import Decimal, InvalidOperation
+
+# Money is carried as Decimal end to end. The MySQL drivers return DECIMAL
+# columns as Decimal, request bodies are parsed with parse_float=Decimal
+# (services.serializers.loads) and responses encode Decimal as a JSON number
+# with the same digits, so an amount never passes through a binary float.
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+def parse_money(value):
+    """
+    Amount from a request value: a Decimal or int from a JSON body, or a
+    numeric string. Raises ValueError unless it is a finite whole number
+    of cents.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if isinstance(value, float):
+        # Bodies decoded without parse_float=Decimal; repr is the shortest
+        # text that reads back as this float, i.e. what the client sent
+        value = repr(value)
+    try:
+        amount = value if type(value) is Decimal else Decimal(value)
+        if amount.is_finite():
+            cents = amount.quantize(CENT)
+            if cents == amount:
+                return cents
+    except (InvalidOperation, TypeError) as e:
+        raise ValueError(f"Invalid amount: {value!r}") from e
+    raise ValueError(f"Invalid amount: {value!r}")
+
+def money_or_zero(value):
+    return value if value is not None else ZERO
@@ -0,0 +1,106 @@
+from database.connection import db
+from models.metrics import instrument
+from mysql.connector import Error
+import logging
+
+class InterleavedIdsError(Exception):
+    """Raised when a multi-row INSERT did not get one consecutive block of ids"""
+
+@instrument
+class Onboarding:
+    """
+    Bulk creation of customers, each with one account.
+    
+    Rows are (cust_name, cust_street, cust_city, branch_name, initial_balance)
+    tuples. Each chunk is one unit of work with one multi-row INSERT per
+    table. A multi-row INSERT gets consecutive auto-increment ids starting
+    at ``lastrowid`` under innodb_autoinc_lock_mode 0 and 1. Under mode 2
+    (the MySQL 8 default) concurrent inserts may interleave, so the block is
+    read back and checked before it is trusted. A chunk whose INSERT fails or
+    interleaves is redone row by row, each row in its own savepoint, so one
+    bad row only fails itself.
+    """
+    _autoinc_lock_mode = None
+    
+    @staticmethod
+    def create_batch(rows, chunk_size=500):
+        """
+        Create every row, ``chunk_size`` per transaction.
+        
+        Returns one entry per row: a (cust_id, acc_no) pair, or the exception
+        that made that row fail.
+        """
+        results = []
+        for start in range(0, len(rows), chunk_size):
+            results.extend(Onboarding._create_chunk(rows[start:start + chunk_size]))
+        return results
+    
+    @staticmethod
+    def _create_chunk(rows):
+        try:
+            with db.session() as session:
+                try:
+                    with db.cursor(session, transaction=True) as cursor:
+                        return Onboarding._insert(cursor, rows)
+                except (Error, InterleavedIdsError) as e:
+                    if len(rows) == 1:
+                        return [e]
+                    logging.info(f"Onboarding chunk of {len(rows)} rows falls back to single-row inserts: {e}")
+                
+                results = []
+                for row in rows:
+                    try:
+                        with db.cursor(session, transaction=True) as cursor:
+                            results.extend(Onboarding._insert(cursor, [row]))
+                    except Error as e:
+                        results.append(e)
+                return results
+        except Error as e:
+            logging.error(f"Error onboarding customers: {e}")
+            return [e] * len(rows)
+    
+    @staticmethod
+    def _insert(cursor, rows):
+        """Insert customers and their accounts; returns [(cust_id, acc_no), ...] in row order"""
+        customers = [row[:3] for row in rows]
+        cursor.execute(
+            f"INSERT INTO Customer (cust_name, cust_street, cust_city) VALUES {Onboarding._values(3, len(rows))}",
+            [value for customer in customers for value in customer]
+        )
+        first_id = cursor.lastrowid
+        cust_ids = list(range(first_id, first_id + len(rows)))
+        
+        if len(rows) > 1 and Onboarding._lock_mode(cursor) >= 2:
+            cursor.execute(
+                "SELECT cust_name, cust_street, cust_city FROM Customer "
+                "WHERE cust_id BETWEEN %s AND %s ORDER BY cust_id",
+                (cust_ids[0], cust_ids[-1])
+            )
+            if [tuple(row) for row in cursor.fetchall()] != customers:
+                raise InterleavedIdsError(f"Customer ids from {first_id} were interleaved with another insert")
+        
+        # Every new customer has exactly one account, so cust_id identifies
+        # the account rows whatever ids they were given
+        accounts = [(row[3], row[4], cust_id) for row, cust_id in zip(rows, cust_ids)]
+        cursor.execute(
+            f"INSERT INTO Account (branch_name, balance, cust_id) VALUES {Onboarding._values(3, len(rows))}",
+            [value for account in accounts for value in account]
+        )
+        cursor.execute(
+            f"SELECT cust_id, acc_no FROM Account WHERE cust_id IN ({', '.join(['%s'] * len(cust_ids))})",
+            cust_ids
+        )
+        acc_nos = dict(cursor.fetchall())
+        return [(cust_id, acc_nos[cust_id]) for cust_id in cust_ids]
+    
+    @staticmethod
+    def _values(columns, rows):
+        row = f"({', '.join(['%s'] * columns)})"
+        return ', '.join([row] * rows)
+    
+    @staticmethod
+    def _lock_mode(cursor):
+        if Onboarding._autoinc_lock_mode is None:
+            cursor.execute("SELECT @@innodb_autoinc_lock_mode")
+            Onboarding._autoinc_lock_mode = int(cursor.fetchone()[0])
+        return Onboarding._autoinc_lock_mode
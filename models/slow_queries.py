@@ -0,0 +1,118 @@
+from config import Config
+from collections import OrderedDict
+from datetime import datetime
+import logging
+import re
+import threading
+
+# Statement kinds MySQL can EXPLAIN
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b|%s")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROW_LIST = re.compile(r"(\(\?(?:, \.\.\.)?\))(?:\s*,\s*\(\?(?:, \.\.\.)?\))+")
+_CASE_LIST = re.compile(r"(WHEN \? THEN \?)(?:\s+WHEN \? THEN \?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(statement):
+    """
+    Statement with every value replaced by ``?`` and repeated lists folded,
+    so batches of different sizes share one entry and nothing bound to the
+    query (balances, names) is ever logged.
+    """
+    text = _WHITESPACE.sub(' ', statement).strip()
+    text = _LITERAL.sub('?', text)
+    text = _PLACEHOLDER_LIST.sub('?, ...', text)
+    text = _ROW_LIST.sub(r'\1, ...', text)
+    return _CASE_LIST.sub(r'\1 ...', text)
+
+class SlowQueryLog:
+    """
+    Statements slower than SLOW_QUERY_MS, grouped by fingerprint.
+    
+    The cursor proxies in database/ and asgi/ report every statement; slow
+    ones are logged (values redacted) and counted under their fingerprint
+    with the model operation that ran them. The last parameters of each
+    entry are kept in memory only, so the admin endpoint can EXPLAIN the
+    statement as it really ran (``pending_explains``); plans are cached
+    until it asks for a refresh.
+    Holds at most SLOW_QUERY_MAX_ENTRIES fingerprints (least recent out).
+    """
+    def __init__(self, threshold_ms, max_entries):
+        self.threshold = threshold_ms / 1000
+        self.enabled = threshold_ms > 0
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+    
+    def observe(self, operation, statement, params, elapsed):
+        if not self.enabled or elapsed < self.threshold:
+            return
+        key = fingerprint(statement)
+        logging.warning(f"Slow query ({elapsed * 1000:.1f} ms) in {operation}: {key}")
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                entry = {
+                    'fingerprint': key,
+                    'operations': [],
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'plan': None
+                }
+            if operation not in entry['operations']:
+                entry['operations'].append(operation)
+            entry['count'] += 1
+            entry['total_ms'] += elapsed * 1000
+            entry['max_ms'] = max(entry['max_ms'], elapsed * 1000)
+            entry['last_seen'] = datetime.now().isoformat()
+            entry['_statement'] = statement
+            entry['_params'] = _explain_params(params)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def pending_explains(self, refresh=False):
+        """(fingerprint, statement, params) of the entries still without a plan"""
+        with self._lock:
+            return [
+                (key, entry['_statement'], entry['_params'])
+                for key, entry in self._entries.items()
+                if (refresh or entry['plan'] is None) and explainable(entry['_statement'])
+            ]
+    
+    def set_plan(self, key, plan):
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]['plan'] = plan
+    
+    def entries(self):
+        """Public view of every entry, slowest in total first"""
+        with self._lock:
+            entries = [
+                {name: list(value) if name == 'operations' else value for name, value in entry.items() if not name.startswith('_')}
+                for entry in self._entries.values()
+            ]
+        for entry in entries:
+            entry['total_ms'] = round(entry['total_ms'], 3)
+            entry['max_ms'] = round(entry['max_ms'], 3)
+            entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 3)
+        return sorted(entries, key=lambda entry: entry['total_ms'], reverse=True)
+    
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+def explainable(statement):
+    words = statement.split(None, 1)
+    return bool(words) and words[0].upper() in EXPLAINABLE
+
+def _explain_params(params):
+    # executemany reports every row; one is enough to plan the statement
+    if isinstance(params, list) and params and isinstance(params[0], (tuple, list)):
+        return params[0]
+    return params
+
+# Global slow-query log
+slow_queries = SlowQueryLog(Config.SLOW_QUERY_MS, Config.SLOW_QUERY_MAX_ENTRIES)
@@ -1,8 +1,18 @@
 from database.connection import db
+from models.money import money_or_zero
+from models.metrics import instrument
+from models.transaction_archive import transaction_archive, add_months, naive
 from mysql.connector import Error
+from config import Config
 from datetime import datetime
 import logging
 
+# Column order of the tuple rows returned by get_by_account; get_all adds
+# the account's branch and customer name
+TRANSACTION_COLUMNS = ('txn_id', 'acc_no', 'type', 'amount', 'date_time')
+TRANSACTION_LIST_COLUMNS = TRANSACTION_COLUMNS + ('branch_name', 'cust_name')
+
+@instrument
 class Transaction:
     def __init__(self, txn_id=None, acc_no=None, type=None, amount=None, date_time=None):
         self.txn_id = txn_id
@@ -12,88 +22,220 @@ class Transaction:
         self.date_time = date_time
     
     @staticmethod
-    def create(acc_no, transaction_type, amount):
-        connection = None
+    def get_by_account(acc_no, limit=None, before=None, after=None, date_from=None, date_to=None, session=None):
+        """
+        Fetch an account's transactions newest first, as tuples in
+        TRANSACTION_COLUMNS order.
+        
+        ``before``/``after`` are (date_time, txn_id) keyset cursors selecting
+        rows older/newer than that position; ``date_from`` (inclusive) and
+        ``date_to`` (exclusive) bound the range. All of them are served by the
+        (acc_no, date_time, txn_id) index as a single range scan per window
+        of partitions (see ``_windows``). Rows of archived partitions are
+        older than every live row, so a page that runs out of live rows
+        continues in the transaction archive.
+        """
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor()
+            # Paging towards newer rows starts in the archive
+            archived = []
+            if after:
+                archived = transaction_archive.account_rows(acc_no, limit, after=after, date_from=date_from, date_to=date_to)
+                if archived:
+                    after = Transaction._position(archived[-1])
             
-            query = """
-            INSERT INTO Transaction (acc_no, type, amount, date_time) 
-            VALUES (%s, %s, %s, %s)
-            """
-            current_time = datetime.now()
-            cursor.execute(query, (acc_no, transaction_type, amount, current_time))
-            connection.commit()
+            results = []
+            with db.cursor(session) as cursor:
+                for window_from, window_to in Transaction._windows(before, after, date_from, date_to):
+                    remaining = Transaction._remaining(limit, len(archived) + len(results))
+                    if remaining == 0:
+                        break
+                    query, params = Transaction._account_query(acc_no, remaining, before, after, window_from, window_to)
+                    cursor.execute(query, params)
+                    results.extend(cursor.fetchall())
             
-            txn_id = cursor.lastrowid
-            cursor.close()
-            
-            return Transaction(txn_id, acc_no, transaction_type, amount, current_time)
-        except Error as e:
-            if connection:
-                connection.rollback()
-            logging.error(f"Error creating transaction: {e}")
-            raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
-    
-    @staticmethod
-    def get_by_account(acc_no):
-        connection = None
-        try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            query = """
-            SELECT * FROM Transaction 
-            WHERE acc_no = %s 
-            ORDER BY date_time DESC
-            """
-            cursor.execute(query, (acc_no,))
-            results = cursor.fetchall()
-            cursor.close()
+            if after:
+                results = archived + results
+                results.reverse()
+                return results
             
+            remaining = Transaction._remaining(limit, len(results))
+            if remaining != 0:
+                older = Transaction._position(results[-1]) if results else before
+                results.extend(transaction_archive.account_rows(acc_no, remaining, older, None, date_from, date_to))
             return results
         except Error as e:
             logging.error(f"Error fetching transactions: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
     
     @staticmethod
-    def get_all():
-        connection = None
+    def _account_query(acc_no, limit, before, after, date_from, date_to):
+        query = f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM Transaction WHERE acc_no = %s"
+        params = [acc_no]
+        if date_from:
+            query += " AND date_time >= %s"
+            params.append(date_from)
+        if date_to:
+            query += " AND date_time < %s"
+            params.append(date_to)
+        # The plain date_time bound ahead of each cursor condition lets
+        # MySQL prune partitions; the OR alone is opaque to the pruner
+        if before:
+            query += " AND date_time <= %s AND (date_time < %s OR (date_time = %s AND txn_id < %s))"
+            params.extend([before[0], before[0], before[0], before[1]])
+        if after:
+            query += " AND date_time >= %s AND (date_time > %s OR (date_time = %s AND txn_id > %s))"
+            params.extend([after[0], after[0], after[0], after[1]])
+        
+        # Paging towards newer rows walks the index forwards from the
+        # cursor; the page is flipped back to newest first below
+        direction = 'ASC' if after else 'DESC'
+        query += f" ORDER BY date_time {direction}, txn_id {direction}"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, tuple(params)
+    
+    @staticmethod
+    def _windows(before, after, date_from, date_to):
+        """
+        (date_from, date_to) ranges to query in page order. Transaction is
+        partitioned by month, and an ORDER BY ... LIMIT over every partition
+        has to open each of them; most pages are filled by the last
+        TRANSACTION_RECENT_MONTHS partitions, so those are read first and the
+        older ones only when the page is still short (newest first), or the
+        other way round when paging forwards from ``after``. Windows the
+        bounds already exclude are skipped.
+        """
+        if Config.TRANSACTION_RECENT_MONTHS <= 0:
+            return [(date_from, date_to)]
+        recent = add_months(datetime.now(), 1 - Config.TRANSACTION_RECENT_MONTHS)
+        lower = max((naive(value) for value in (date_from, after and after[0]) if value), default=None)
+        upper = min((naive(value) for value in (date_to, before and before[0]) if value), default=None)
+        
+        windows = []
+        if upper is None or upper >= recent:
+            windows.append((max(naive(date_from), recent) if date_from else recent, date_to))
+        if lower is None or lower < recent:
+            windows.append((date_from, min(naive(date_to), recent) if date_to else recent))
+        if after:
+            windows.reverse()
+        return windows
+    
+    @staticmethod
+    def _remaining(limit, count):
+        return None if limit is None else max(limit - count, 0)
+    
+    @staticmethod
+    def _position(row):
+        """(date_time, txn_id) keyset position of a TRANSACTION_COLUMNS row"""
+        return row[4], row[0]
+    
+    @staticmethod
+    def get_all(limit=None, before=None, session=None):
+        """
+        Fetch transactions newest first, with the account's branch and
+        customer name, as tuples in TRANSACTION_LIST_COLUMNS order.
+        
+        ``before`` is a (date_time, txn_id) keyset cursor: only rows strictly
+        older than it are returned, so deep pages cost the same as the first.
+        Like get_by_account, the recent partitions are read first and a
+        short page continues in the transaction archive.
+        """
         try:
-            connection = db.get_connection()
-            cursor = connection.cursor(dictionary=True)
+            results = []
+            with db.cursor(session) as cursor:
+                for window_from, window_to in Transaction._windows(before, None, None, None):
+                    remaining = Transaction._remaining(limit, len(results))
+                    if remaining == 0:
+                        break
+                    query, params = Transaction._all_query(remaining, before, window_from, window_to)
+                    cursor.execute(query, params)
+                    results.extend(cursor.fetchall())
             
-            query = """
-            SELECT t.*, a.branch_name, c.cust_name 
-            FROM Transaction t 
-            JOIN Account a ON t.acc_no = a.acc_no 
-            JOIN Customer c ON a.cust_id = c.cust_id 
-            ORDER BY t.date_time DESC
-            """
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
+            remaining = Transaction._remaining(limit, len(results))
+            if remaining != 0:
+                older = Transaction._position(results[-1]) if results else before
+                archived = transaction_archive.newest_rows(remaining, older)
+                if archived:
+                    with db.cursor(session) as cursor:
+                        cursor.execute(*Transaction._names_query({row[1] for row in archived}))
+                        names = {acc_no: (branch_name, cust_name) for acc_no, branch_name, cust_name in cursor.fetchall()}
+                    results.extend(row + names.get(row[1], (None, None)) for row in archived)
             
             return results
         except Error as e:
             logging.error(f"Error fetching all transactions: {e}")
             raise e
-        finally:
-            if connection:
-                db.return_connection(connection)
+    
+    @staticmethod
+    def iter_all(before=None, chunk_size=1000):
+        """
+        Yield every transaction newest first, as dicts of
+        TRANSACTION_LIST_COLUMNS: the live rows from a server-side cursor,
+        then the archived months ``chunk_size`` rows at a time, so an export
+        covers the whole ledger like paging through get_all does.
+        """
+        position = before
+        for row in db.stream(*Transaction._all_query(None, before), chunk_size=chunk_size):
+            position = (row['date_time'], row['txn_id'])
+            yield row
+        
+        while True:
+            archived = transaction_archive.newest_rows(chunk_size, position)
+            if not archived:
+                return
+            with db.cursor() as cursor:
+                cursor.execute(*Transaction._names_query({row[1] for row in archived}))
+                names = {acc_no: (branch_name, cust_name) for acc_no, branch_name, cust_name in cursor.fetchall()}
+            for row in archived:
+                yield dict(zip(TRANSACTION_LIST_COLUMNS, row + names.get(row[1], (None, None))))
+            position = Transaction._position(archived[-1])
+    
+    @staticmethod
+    def _all_query(limit, before, date_from=None, date_to=None):
+        conditions = []
+        params = []
+        if date_from:
+            conditions.append("t.date_time >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("t.date_time < %s")
+            params.append(date_to)
+        if before:
+            conditions.append("t.date_time <= %s AND (t.date_time < %s OR (t.date_time = %s AND t.txn_id < %s))")
+            params.extend([before[0], before[0], before[0], before[1]])
+        
+        query = f"""
+        SELECT t.{', t.'.join(TRANSACTION_COLUMNS)}, a.branch_name, c.cust_name
+        FROM Transaction t
+        JOIN Account a ON t.acc_no = a.acc_no
+        JOIN Customer c ON a.cust_id = c.cust_id
+        """
+        if conditions:
+            query += f"WHERE {' AND '.join(conditions)} "
+        query += "ORDER BY t.date_time DESC, t.txn_id DESC"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, tuple(params)
+    
+    @staticmethod
+    def _names_query(acc_nos):
+        """Branch and customer name of each account, for archived rows of get_all"""
+        placeholders = ', '.join(['%s'] * len(acc_nos))
+        query = f"""
+        SELECT a.acc_no, a.branch_name, c.cust_name
+        FROM Account a
+        JOIN Customer c ON a.cust_id = c.cust_id
+        WHERE a.acc_no IN ({placeholders})
+        """
+        return query, tuple(acc_nos)
     
     def to_dict(self):
         return {
             'txn_id': self.txn_id,
             'acc_no': self.acc_no,
             'type': self.type,
-            'amount': float(self.amount) if self.amount else 0,
+            'amount': money_or_zero(self.amount),
             'date_time': self.date_time.isoformat() if self.date_time else None
         }
@@ -0,0 +1,342 @@
+from models.account_stats import TRANSACTION_TYPES
+from config import Config
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import zlib
+
+# Archive files: MAGIC, zlib-compressed column chunks, a JSON footer with
+# the row groups (row count, min/max acc_no and date_time, chunk offsets),
+# the footer length (uint32 LE) and MAGIC again. Every row is stored twice:
+# in ``groups`` sorted by account and time for account history, and in
+# ``time_groups`` sorted by time for the newest-first listing of all accounts
+MAGIC = b'BTXA1'
+ARCHIVE_SUFFIX = '.btxa'
+MANIFEST = 'manifest.json'
+GROUP_ROWS = 8192
+EPOCH = datetime(1970, 1, 1)
+
+# Column -> array typecode: ids as is, type as its TRANSACTION_TYPES index,
+# amount in cents, date_time in seconds since EPOCH (TIMESTAMP has no fraction)
+COLUMNS = (('txn_id', 'q'), ('acc_no', 'q'), ('type', 'b'), ('amount', 'q'), ('date_time', 'q'))
+
+def naive(value):
+    """Compare-ready datetime: aware values are converted to local time, as MySQL stores them"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+def add_months(value, months):
+    """First day of the month ``months`` after (or before) ``value``'s month"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def _seconds(value):
+    return (value - EPOCH) // timedelta(seconds=1)
+
+def _encode(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return zlib.compress(column.tobytes(), 6)
+
+def _decode(typecode, data):
+    column = array(typecode)
+    column.frombytes(zlib.decompress(data))
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+def write_partition(path, rows, time_rows):
+    """
+    Write a partition to an archive file at ``path``: ``rows`` are its
+    TRANSACTION_COLUMNS tuples sorted by acc_no, date_time, txn_id and
+    ``time_rows`` the same rows sorted by date_time, txn_id. Returns the row
+    count. The file is written next to ``path`` and renamed into place once
+    it is on disk.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as handle:
+        handle.write(MAGIC)
+        groups, total = _write_groups(handle, rows)
+        time_groups, time_total = _write_groups(handle, time_rows)
+        if time_total != total:
+            raise ValueError(f"{path}: {total} rows by account but {time_total} by time")
+        
+        footer = json.dumps({
+            'columns': [name for name, _ in COLUMNS],
+            'rows': total,
+            'groups': groups,
+            'time_groups': time_groups
+        }).encode()
+        handle.write(footer)
+        handle.write(struct.pack('<I', len(footer)))
+        handle.write(MAGIC)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    return total
+
+def _write_groups(handle, rows):
+    """Write ``rows`` as row groups of GROUP_ROWS; returns (groups, row count)"""
+    type_index = {txn_type: index for index, txn_type in enumerate(TRANSACTION_TYPES)}
+    groups = []
+    total = 0
+    
+    def flush(batch):
+        group = {
+            'rows': len(batch),
+            'acc_no': [min(row[1] for row in batch), max(row[1] for row in batch)],
+            'date_time': [min(row[4] for row in batch), max(row[4] for row in batch)],
+            'chunks': {}
+        }
+        for position, (name, typecode) in enumerate(COLUMNS):
+            data = _encode(typecode, (row[position] for row in batch))
+            group['chunks'][name] = [handle.tell(), len(data)]
+            handle.write(data)
+        groups.append(group)
+    
+    batch = []
+    for txn_id, acc_no, txn_type, amount, date_time in rows:
+        cents = int(Decimal(amount).scaleb(2).to_integral_value())
+        batch.append((txn_id, acc_no, type_index[txn_type], cents, _seconds(naive(date_time))))
+        if len(batch) == GROUP_ROWS:
+            flush(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        flush(batch)
+        total += len(batch)
+    return groups, total
+
+class ArchiveFile:
+    """Read side of one archive file; the footer is read once and kept"""
+    
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            handle.seek(-(len(MAGIC) + 4), os.SEEK_END)
+            tail = handle.read()
+            if tail[4:] != MAGIC:
+                raise ValueError(f"{path} is not a transaction archive")
+            (length,) = struct.unpack('<I', tail[:4])
+            handle.seek(-(len(MAGIC) + 4 + length), os.SEEK_END)
+            footer = json.loads(handle.read(length))
+        self.rows = footer['rows']
+        self.groups = footer['groups']
+        if 'time_groups' not in footer:
+            raise ValueError(f"{path} has no time-ordered row groups")
+        self.time_groups = footer['time_groups']
+    
+    def _columns(self, handle, group, names):
+        columns = {}
+        for name, typecode in COLUMNS:
+            if name in names:
+                offset, length = group['chunks'][name]
+                handle.seek(offset)
+                columns[name] = _decode(typecode, handle.read(length))
+        return columns
+    
+    @staticmethod
+    def _row(columns, index):
+        return (
+            columns['txn_id'][index],
+            columns['acc_no'][index],
+            TRANSACTION_TYPES[columns['type'][index]],
+            Decimal(columns['amount'][index]).scaleb(-2),
+            EPOCH + timedelta(seconds=columns['date_time'][index])
+        )
+    
+    def account_rows(self, acc_no):
+        """Every row of ``acc_no``, oldest first"""
+        rows = []
+        with open(self.path, 'rb') as handle:
+            for group in self.groups:
+                low, high = group['acc_no']
+                if not low <= acc_no <= high:
+                    continue
+                accounts = self._columns(handle, group, ('acc_no',))['acc_no']
+                start, end = bisect_left(accounts, acc_no), bisect_right(accounts, acc_no)
+                if start == end:
+                    continue
+                columns = self._columns(handle, group, ('txn_id', 'type', 'amount', 'date_time'))
+                columns['acc_no'] = accounts
+                rows.extend(self._row(columns, index) for index in range(start, end))
+        rows.sort(key=lambda row: (row[4], row[0]))
+        return rows
+    
+    def newest_rows(self, limit, before=None):
+        """
+        The ``limit`` newest rows (all of them for None) strictly older than
+        the (date_time, txn_id) position ``before``, newest first. Reads the
+        time-ordered groups from the newest down and stops at a full page,
+        so a page costs about one row group however large the file is.
+        """
+        bound = (_seconds(before[0]), before[1]) if before else None
+        rows = []
+        with open(self.path, 'rb') as handle:
+            for group in reversed(self.time_groups):
+                if bound and group['date_time'][0] > bound[0]:
+                    continue
+                columns = self._columns(handle, group, dict(COLUMNS))
+                end = group['rows']
+                if bound:
+                    end = bisect_left(list(zip(columns['date_time'], columns['txn_id'])), bound)
+                start = 0 if limit is None else max(end - (limit - len(rows)), 0)
+                rows.extend(self._row(columns, index) for index in range(end - 1, start - 1, -1))
+                if limit is not None and len(rows) >= limit:
+                    break
+        return rows
+
+class TransactionArchive:
+    """
+    Transaction partitions exported from MySQL to TRANSACTION_ARCHIVE_DIR.
+    
+    ``scripts/partitions.py archive`` writes each closed partition to one
+    compressed columnar file (row groups with min/max statistics, once by
+    account and once by time) and lists it in manifest.json before
+    the partition is dropped. The read side lets Transaction.get_by_account
+    and get_all continue past the oldest live row into the archive, so the
+    history endpoints page through it transparently. The manifest is
+    re-read when it changes; opened file footers are kept per process.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest_mtime = None
+        self._partitions = []
+        self._files = {}
+    
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST)
+    
+    def partitions(self):
+        """Archived partitions, oldest first, with their start/end as datetimes"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                with open(self.manifest_path, encoding='utf-8') as handle:
+                    entries = json.load(handle)['partitions']
+                for entry in entries:
+                    entry['start'] = datetime.fromisoformat(entry['start']) if entry['start'] else None
+                    entry['end'] = datetime.fromisoformat(entry['end'])
+                self._partitions = sorted(entries, key=lambda entry: entry['end'])
+                self._manifest_mtime = mtime
+            return self._partitions
+    
+    def boundary(self):
+        """End of the archived range: everything older lives in the archive only"""
+        partitions = self.partitions()
+        return partitions[-1]['end'] if partitions else None
+    
+    def _file(self, entry):
+        path = os.path.join(self.directory, entry['file'])
+        with self._lock:
+            archive_file = self._files.get(path)
+        if archive_file is None:
+            archive_file = ArchiveFile(path)
+            with self._lock:
+                self._files[path] = archive_file
+        return archive_file
+    
+    def account_rows(self, acc_no, limit=None, before=None, after=None, date_from=None, date_to=None):
+        """
+        Archived rows of ``acc_no`` with the same bounds as
+        Transaction.get_by_account: newest first, or oldest first after
+        ``after`` (the caller flips the merged page).
+        """
+        before = (naive(before[0]), before[1]) if before else None
+        after = (naive(after[0]), after[1]) if after else None
+        date_from, date_to = naive(date_from), naive(date_to)
+        
+        partitions = [
+            entry for entry in self.partitions()
+            if not (before and entry['start'] and entry['start'] > before[0])
+            and not (after and entry['end'] <= after[0])
+            and not (date_from and entry['end'] <= date_from)
+            and not (date_to and entry['start'] and entry['start'] >= date_to)
+        ]
+        if not after:
+            partitions.reverse()
+        
+        results = []
+        for entry in partitions:
+            rows = [
+                row for row in self._file(entry).account_rows(acc_no)
+                if not (before and (row[4], row[0]) >= before)
+                and not (after and (row[4], row[0]) <= after)
+                and not (date_from and row[4] < date_from)
+                and not (date_to and row[4] >= date_to)
+            ]
+            if not after:
+                rows.reverse()
+            results.extend(rows)
+            # Partitions do not overlap in time, so a full page stops here
+            if limit is not None and len(results) >= limit:
+                return results[:limit]
+        return results
+    
+    def newest_rows(self, limit=None, before=None):
+        """Archived rows of every account, newest first, strictly older than ``before``"""
+        before = (naive(before[0]), before[1]) if before else None
+        results = []
+        for entry in reversed(self.partitions()):
+            if before and entry['start'] and entry['start'] > before[0]:
+                continue
+            remaining = None if limit is None else limit - len(results)
+            results.extend(self._file(entry).newest_rows(remaining, before))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+    
+    def add_partition(self, name, start, end, rows, time_rows):
+        """
+        Write partition ``name`` covering [start, end) from ``rows`` (by
+        account) and ``time_rows`` (by time), see ``write_partition``, and
+        list it in the manifest; returns the number of rows written.
+        Re-archiving a partition replaces its file and entry.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"{name}{ARCHIVE_SUFFIX}"
+        path = os.path.join(self.directory, file_name)
+        count = write_partition(path, rows, time_rows)
+        
+        entries = [
+            {**entry, 'start': entry['start'].isoformat() if entry['start'] else None, 'end': entry['end'].isoformat()}
+            for entry in self.partitions() if entry['name'] != name
+        ]
+        entries.append({
+            'name': name,
+            'file': file_name,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat(),
+            'rows': count,
+            'bytes': os.path.getsize(path),
+            'archived_at': datetime.now().isoformat()
+        })
+        entries.sort(key=lambda entry: entry['end'])
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump({'partitions': entries}, handle, indent=2)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.manifest_path)
+        with self._lock:
+            self._files.pop(path, None)
+        logging.info(f"Archived transaction partition {name}: {count} rows")
+        return count
+
+# Global transaction archive
+transaction_archive = TransactionArchive(Config.TRANSACTION_ARCHIVE_DIR)
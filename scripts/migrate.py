@@ -0,0 +1,286 @@
+"""
+Versioned schema migrations for the Banking System.
+
+Migrations are the ``NNNN_name.sql`` files in scripts/migrations, applied
+in version order and recorded in the SchemaMigration table with a checksum
+of their text. MySQL cannot roll DDL back, so every migration must be safe
+to re-run after a partial failure; the runner helps with the statements
+that usually are not:
+
+    CREATE [UNIQUE] INDEX name ON table (columns)
+        skipped when an index of that name exists or (non-unique only) an
+        existing index already starts with the same columns; otherwise
+        built online as ALTER TABLE ... ADD INDEX, ALGORITHM=INPLACE,
+        LOCK=NONE, so reads and writes continue during the build
+    DROP INDEX name ON table
+        skipped when missing, otherwise dropped in place without a lock
+    CREATE TRIGGER name
+        skipped when a trigger of that name exists
+    ALTER TABLE table ADD COLUMN name ...
+        skipped when the table already has a column of that name
+    ALTER TABLE table DROP FOREIGN KEY name
+        skipped when the table has no such foreign key
+    ALTER TABLE table PARTITION BY ...
+        skipped when the table is already partitioned (partitions are
+        then managed by scripts/partitions.py)
+
+Online DDL still needs a brief metadata lock at the start and end; it is
+requested with a short lock_wait_timeout and retried, so a long-running
+transaction makes the migration wait instead of queueing all traffic
+behind the ALTER.
+
+Used by ``scripts/setup_database.py`` (``--migrate``, ``--migration-status``)
+and ``benchmarks/seed.py``.
+"""
+
+from mysql.connector import Error, errorcode
+import hashlib
+import os
+import re
+import time
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+MIGRATION_TABLE = """
+CREATE TABLE IF NOT EXISTS SchemaMigration (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    duration_ms INT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+_FILE_NAME = re.compile(r'^(\d+)_(\w+)\.sql$')
+_CREATE_INDEX = re.compile(r'^CREATE\s+(UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)\s*\((.+)\)$', re.IGNORECASE | re.DOTALL)
+_DROP_INDEX = re.compile(r'^DROP\s+INDEX\s+(\w+)\s+ON\s+(\w+)$', re.IGNORECASE)
+_CREATE_TRIGGER = re.compile(r'^CREATE\s+TRIGGER\s+(\w+)', re.IGNORECASE)
+_ADD_COLUMN = re.compile(r'^ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)\b', re.IGNORECASE)
+_DROP_FOREIGN_KEY = re.compile(r'^ALTER\s+TABLE\s+(\w+)\s+DROP\s+FOREIGN\s+KEY\s+(\w+)$', re.IGNORECASE)
+_PARTITION_BY = re.compile(r'^ALTER\s+TABLE\s+(\w+)\s+PARTITION\s+BY\b', re.IGNORECASE)
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding='utf-8') as handle:
+            self.sql = handle.read()
+        self.checksum = hashlib.sha256(self.sql.encode()).hexdigest()
+    
+    def __repr__(self):
+        return f"{self.version:04d}_{self.name}"
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Every migration in ``directory``, by version; versions must be unique"""
+    migrations = []
+    for file_name in sorted(os.listdir(directory)):
+        match = _FILE_NAME.match(file_name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, file_name)))
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+def split_sql_statements(sql_script):
+    """
+    Split a SQL script into statements, honouring ``DELIMITER`` lines (used
+    around trigger bodies) and skipping comment-only chunks.
+    """
+    statements = []
+    delimiter = ';'
+    current = []
+    for line in sql_script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not current and (not stripped or stripped.startswith('--')):
+            continue
+        current.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(current).strip()[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            current = []
+    if current:
+        statements.append('\n'.join(current).strip())
+    return statements
+
+def applied_migrations(cursor):
+    """{version: checksum} of the migrations recorded in the current database"""
+    cursor.execute(MIGRATION_TABLE)
+    cursor.execute("SELECT version, checksum FROM SchemaMigration")
+    return dict(cursor.fetchall())
+
+def migrate(cursor, database='banking_system', target=None, lock_wait_timeout=5, retries=5, directory=MIGRATIONS_DIR):
+    """Create ``database`` if needed and apply every pending migration up to ``target``"""
+    try:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+        cursor.execute(f"USE {database}")
+        cursor.execute(f"SET SESSION lock_wait_timeout = {int(lock_wait_timeout)}")
+        applied = applied_migrations(cursor)
+        
+        pending = []
+        for migration in load_migrations(directory):
+            if target is not None and migration.version > target:
+                break
+            if migration.version not in applied:
+                pending.append(migration)
+            elif applied[migration.version] != migration.checksum:
+                print(f"⚠️  {migration} changed after it was applied; edits to applied migrations are not re-run")
+        
+        if not pending:
+            print(f"✓ {database} is up to date")
+            return True
+        
+        for migration in pending:
+            started = time.monotonic()
+            for statement in split_sql_statements(migration.sql):
+                _run_with_retry(cursor, database, statement, retries)
+            duration_ms = int((time.monotonic() - started) * 1000)
+            cursor.execute(
+                "INSERT INTO SchemaMigration (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+                (migration.version, migration.name, migration.checksum, duration_ms)
+            )
+            print(f"✓ Applied {migration} in {duration_ms} ms")
+        return True
+    except (Error, ValueError) as e:
+        print(f"✗ Migration failed: {e}")
+        return False
+
+def migration_status(cursor, database='banking_system', directory=MIGRATIONS_DIR):
+    """Print every migration with whether it has been applied; True if none are pending"""
+    try:
+        cursor.execute(f"USE {database}")
+        applied = applied_migrations(cursor)
+        pending = 0
+        for migration in load_migrations(directory):
+            if migration.version not in applied:
+                pending += 1
+                print(f"  pending  {migration}")
+            elif applied[migration.version] != migration.checksum:
+                print(f"  changed  {migration}")
+            else:
+                print(f"  applied  {migration}")
+        print(f"{'✓' if not pending else '⚠️ '} {pending} pending migration(s)")
+        return not pending
+    except (Error, ValueError) as e:
+        print(f"✗ Error reading migration status: {e}")
+        return False
+
+def _run_with_retry(cursor, database, statement, retries):
+    for attempt in range(retries + 1):
+        try:
+            return _run(cursor, database, statement)
+        except Error as e:
+            if e.errno != errorcode.ER_LOCK_WAIT_TIMEOUT or attempt == retries:
+                raise
+            print(f"  … waiting for a metadata lock ({attempt + 1}/{retries})")
+            time.sleep(2 ** attempt)
+
+def _run(cursor, database, statement):
+    text = statement.strip()
+    
+    match = _CREATE_INDEX.match(text)
+    if match:
+        unique, index_name, table, columns = match.groups()
+        column_names = [column.strip().split()[0].strip('`') for column in columns.split(',')]
+        existing = _indexes(cursor, database, table)
+        if index_name in existing:
+            print(f"  ✓ Index {table}.{index_name} exists")
+            return
+        covering = None if unique else next(
+            (name for name, names in existing.items() if names[:len(column_names)] == column_names), None
+        )
+        if covering:
+            print(f"  ✓ Index {table}.{index_name} ({', '.join(column_names)}) covered by {covering}")
+            return
+        started = time.monotonic()
+        cursor.execute(
+            f"ALTER TABLE {table} ADD {'UNIQUE ' if unique else ''}INDEX {index_name} ({columns}), "
+            f"ALGORITHM=INPLACE, LOCK=NONE"
+        )
+        print(f"  ✓ Built index {table}.{index_name} ({', '.join(column_names)}) in {time.monotonic() - started:.1f}s")
+        return
+    
+    match = _DROP_INDEX.match(text)
+    if match:
+        index_name, table = match.groups()
+        if index_name not in _indexes(cursor, database, table):
+            print(f"  ✓ Index {table}.{index_name} already dropped")
+            return
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {index_name}, ALGORITHM=INPLACE, LOCK=NONE")
+        print(f"  ✓ Dropped index {table}.{index_name}")
+        return
+    
+    match = _CREATE_TRIGGER.match(text)
+    if match:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.triggers WHERE trigger_schema = %s AND trigger_name = %s",
+            (database, match.group(1))
+        )
+        if cursor.fetchall()[0][0]:
+            print(f"  ✓ Trigger {match.group(1)} exists")
+            return
+    
+    match = _ADD_COLUMN.match(text)
+    if match:
+        table, column = match.groups()
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s AND column_name = %s
+            """,
+            (database, table, column)
+        )
+        if cursor.fetchall()[0][0]:
+            print(f"  ✓ Column {table}.{column} exists")
+            return
+    
+    match = _DROP_FOREIGN_KEY.match(text)
+    if match:
+        table, constraint = match.groups()
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.referential_constraints
+            WHERE constraint_schema = %s AND table_name = %s AND constraint_name = %s
+            """,
+            (database, table, constraint)
+        )
+        if not cursor.fetchall()[0][0]:
+            print(f"  ✓ Foreign key {table}.{constraint} already dropped")
+            return
+    
+    match = _PARTITION_BY.match(text)
+    if match:
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.partitions
+            WHERE table_schema = %s AND table_name = %s AND partition_name IS NOT NULL
+            """,
+            (database, match.group(1))
+        )
+        if cursor.fetchall()[0][0]:
+            print(f"  ✓ {match.group(1)} is already partitioned")
+            return
+    
+    cursor.execute(text)
+    if cursor.with_rows:
+        cursor.fetchall()
+
+def _indexes(cursor, database, table):
+    """{index name: [column, ...]} of ``table``, columns in index order"""
+    cursor.execute(
+        """
+        SELECT index_name, column_name FROM information_schema.statistics
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY index_name, seq_in_index
+        """,
+        (database, table)
+    )
+    indexes = {}
+    for index_name, column_name in cursor.fetchall():
+        indexes.setdefault(index_name, []).append(column_name)
+    return indexes
@@ -1,6 +1,5 @@
--- Create Banking System Database
-CREATE DATABASE IF NOT EXISTS banking_system;
-USE banking_system;
+-- Initial Banking System schema. The migration runner creates the
+-- database and selects it before running this script.
 
 -- Create Customer table
 CREATE TABLE IF NOT EXISTS Customer (
@@ -35,6 +34,7 @@ CREATE TABLE IF NOT EXISTS Loan (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_status (status),
+    INDEX idx_status_loan (status, loan_no),
     INDEX idx_branch (branch_name)
 );
 
@@ -57,10 +57,46 @@ CREATE TABLE IF NOT EXISTS Transaction (
     date_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (acc_no) REFERENCES Account(acc_no) ON DELETE CASCADE,
     INDEX idx_account (acc_no),
+    INDEX idx_account_date (acc_no, date_time, txn_id),
     INDEX idx_type (type),
     INDEX idx_date (date_time)
 );
 
+-- Create AccountStats table (running per-account aggregates maintained by the ledger)
+CREATE TABLE IF NOT EXISTS AccountStats (
+    acc_no INT PRIMARY KEY,
+    deposit_count INT NOT NULL DEFAULT 0,
+    deposit_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    withdrawal_count INT NOT NULL DEFAULT 0,
+    withdrawal_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    transfer_in_count INT NOT NULL DEFAULT 0,
+    transfer_in_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    transfer_out_count INT NOT NULL DEFAULT 0,
+    transfer_out_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (acc_no) REFERENCES Account(acc_no) ON DELETE CASCADE
+);
+
+-- Create IdempotencyKey table (stored responses of retried money-moving requests)
+CREATE TABLE IF NOT EXISTS IdempotencyKey (
+    endpoint VARCHAR(64) NOT NULL,
+    idem_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code INT NULL,
+    response_body MEDIUMTEXT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (endpoint, idem_key),
+    INDEX idx_idempotency_expires (expires_at)
+);
+
+-- Create LedgerQueueOffset table (how far each ledger queue segment has been flushed)
+CREATE TABLE IF NOT EXISTS LedgerQueueOffset (
+    segment VARCHAR(255) PRIMARY KEY,
+    flushed_offset BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
 -- Add constraints and triggers for data integrity
 DELIMITER //
 
@@ -91,6 +127,3 @@ CREATE INDEX idx_customer_name ON Customer(cust_name);
 CREATE INDEX idx_account_balance ON Account(balance);
 CREATE INDEX idx_loan_amount ON Loan(amount);
 CREATE INDEX idx_transaction_amount ON Transaction(amount);
-
--- Display table creation status
-SELECT 'Database and tables created successfully!' as Status;
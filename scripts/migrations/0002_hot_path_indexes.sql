@@ -0,0 +1,21 @@
+-- Indexes behind the hot query paths. The runner skips any of them that
+-- an existing index already covers (same leading columns), so on most
+-- databases only the new ones are built, online.
+
+-- Account history, newest first, with keyset paging (Transaction.get_by_account)
+CREATE INDEX idx_account_date ON Transaction (acc_no, date_time, txn_id);
+
+-- Ledger-wide listing, newest first, with keyset paging (Transaction.get_all)
+CREATE INDEX idx_date_txn ON Transaction (date_time, txn_id);
+
+-- Loans by status, keyset paged by loan number (Loan.find)
+CREATE INDEX idx_status_loan ON Loan (status, loan_no);
+
+-- Loan to borrower join (Loan.find)
+CREATE INDEX idx_borrower_loan ON Borrower (loan_no);
+
+-- Loans of one customer (Loan.find with cust_id)
+CREATE INDEX idx_borrower_customer ON Borrower (cust_id);
+
+-- Accounts of one customer (Customer.update/delete cache invalidation)
+CREATE INDEX idx_customer ON Account (cust_id);
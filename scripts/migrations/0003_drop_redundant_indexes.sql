@@ -0,0 +1,6 @@
+-- Indexes made redundant by 0002: every write maintains them, and
+-- idx_account_date / idx_date_txn serve the same Transaction lookups (the
+-- acc_no foreign key included), idx_status_loan the Loan ones.
+DROP INDEX idx_account ON Transaction;
+DROP INDEX idx_date ON Transaction;
+DROP INDEX idx_status ON Loan;
@@ -0,0 +1,51 @@
+-- Monthly range partitions on Transaction.date_time. The table starts with
+-- p_history and p_future split at November 2026; run
+-- `python -m scripts.partitions maintain` right after this migration, in the
+-- same window, to split p_history into months from the oldest row and
+-- p_future into months up to now (rows are moved whenever this runs). It
+-- then keeps new months split off p_future ahead of time; closed months
+-- are exported to the transaction archive and dropped by `... archive`.
+--
+-- MySQL requires the partitioning column in every unique key and allows no
+-- foreign keys on a partitioned table, so the primary key becomes
+-- (txn_id, date_time) and deletes of accounts and customers remove their
+-- transactions explicitly. Unlike 0002/0003 these ALTERs copy the table
+-- and block writes to it while they run: apply in a maintenance window.
+
+ALTER TABLE Transaction DROP FOREIGN KEY Transaction_ibfk_1;
+
+ALTER TABLE Transaction
+    MODIFY date_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (txn_id, date_time);
+
+ALTER TABLE Transaction
+PARTITION BY RANGE (UNIX_TIMESTAMP(date_time)) (
+    PARTITION p_history VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- Per-account totals of the archived partitions, so AccountStats can still
+-- be rebuilt and verified from the ledger (setup_database.py --rebuild-stats)
+CREATE TABLE IF NOT EXISTS ArchivedLedgerStats (
+    acc_no INT PRIMARY KEY,
+    deposit_count INT NOT NULL DEFAULT 0,
+    deposit_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    withdrawal_count INT NOT NULL DEFAULT 0,
+    withdrawal_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    transfer_in_count INT NOT NULL DEFAULT 0,
+    transfer_in_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    transfer_out_count INT NOT NULL DEFAULT 0,
+    transfer_out_total DECIMAL(19, 2) NOT NULL DEFAULT 0.00,
+    FOREIGN KEY (acc_no) REFERENCES Account(acc_no) ON DELETE CASCADE
+);
+
+-- Partitions whose totals are in ArchivedLedgerStats, so a re-run of an
+-- interrupted archive never counts them twice
+CREATE TABLE IF NOT EXISTS ArchivedPartition (
+    name VARCHAR(64) PRIMARY KEY,
+    range_start DATETIME NULL,
+    range_end DATETIME NOT NULL,
+    row_count BIGINT NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
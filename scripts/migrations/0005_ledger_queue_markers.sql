@@ -0,0 +1,7 @@
+-- Commit markers of the ledger queue. A queued balance change stores a
+-- fresh marker in ledger_marker with the same UPDATE that moves the
+-- balance, and the marker it replaced in ledger_prev; the flusher reads
+-- them to tell whether a queued change committed (see
+-- models/ledger_queue.py). Both stay NULL with the queue off.
+ALTER TABLE Account ADD COLUMN ledger_marker CHAR(32) NULL;
+ALTER TABLE Account ADD COLUMN ledger_prev CHAR(32) NULL;
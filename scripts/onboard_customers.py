@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Bulk customer onboarding for the Banking System.
+
+Streams a CSV (with a header row) or NDJSON file of customers and creates
+each one with an account, ONBOARDING_CHUNK_SIZE rows per transaction with
+multi-row INSERTs. Every record needs cust_name, cust_street, cust_city,
+branch_name and initial_balance. Failed rows are reported with their
+record number, and written as NDJSON to --errors if given.
+
+Run from the repository root:
+    python -m scripts.onboard_customers customers.csv
+    python -m scripts.onboard_customers customers.ndjson --errors failed.ndjson
+"""
+
+from models.onboarding import Onboarding
+from services.common import parse_onboarding_batch, format_onboarding_outcome
+from services.serializers import dumps, loads
+from database.connection import db
+from config import Config
+import argparse
+import csv
+import time
+
+def read_records(path, file_format):
+    """Yield one dict per CSV row or NDJSON line without loading the file"""
+    with open(path, newline='', encoding='utf-8') as handle:
+        if file_format == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                yield None  # Reported as a failed row
+
+def chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def onboard(path, file_format, chunk_size, errors_path=None):
+    """Onboard every record in ``path``; returns True if all of them succeeded"""
+    started = time.monotonic()
+    created = 0
+    failed = 0
+    errors = open(errors_path, 'w', encoding='utf-8') if errors_path else None
+    try:
+        offset = 0
+        for chunk in chunks(read_records(path, file_format), chunk_size):
+            results, valid_indexes, valid_rows = parse_onboarding_batch(chunk)
+            outcomes = Onboarding.create_batch(valid_rows, chunk_size=chunk_size)
+            for index, row, outcome in zip(valid_indexes, valid_rows, outcomes):
+                results[index] = format_onboarding_outcome(index, row, outcome)
+            
+            for index, result in enumerate(results):
+                if result['status'] == 'completed':
+                    created += 1
+                    continue
+                failed += 1
+                record_no = offset + index + 1
+                print(f"✗ Record {record_no}: {result['error']}")
+                if errors:
+                    errors.write(dumps({'record': record_no, 'error': result['error'], 'data': chunk[index]}) + '\n')
+            
+            offset += len(chunk)
+            elapsed = time.monotonic() - started
+            print(f"… {offset} records processed ({offset / elapsed:.0f}/s)")
+    finally:
+        if errors:
+            errors.close()
+    
+    print(f"✓ Created {created} customers and accounts in {time.monotonic() - started:.1f}s")
+    if failed:
+        print(f"✗ {failed} records failed" + (f"; see {errors_path}" if errors_path else ""))
+    return failed == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk onboard customers with one account each")
+    parser.add_argument('path', help="CSV or NDJSON file of customers")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="file format (default: from the extension)")
+    parser.add_argument('--chunk-size', type=int, default=Config.ONBOARDING_CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument('--errors', help="write failed records to this NDJSON file")
+    args = parser.parse_args()
+    
+    file_format = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+    try:
+        success = onboard(args.path, file_format, args.chunk_size, args.errors)
+    finally:
+        db.close()
+    exit(0 if success else 1)
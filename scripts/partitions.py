@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance and archival for the Transaction ledger.
+
+Migration 0004 range-partitions Transaction by month of date_time: one
+partition per month (pYYYYMM), p_history for everything before the first
+month and p_future (MAXVALUE) catching whatever is ahead of the last one.
+It starts with only p_history and p_future; ``maintain`` splits them.
+
+    status    List the partitions and the archived ones
+    maintain  Split p_history into one partition per month from its oldest
+              row, and p_future so partitions exist TRANSACTION_PARTITIONS_AHEAD
+              months ahead. Run it once right after migration 0004, in the
+              same maintenance window (the first run copies the existing
+              ledger), then daily (cron) so inserts never land in p_future
+              and p_future stays empty, which keeps the split cheap
+    archive   Export every partition that ended more than
+              TRANSACTION_RETENTION_MONTHS ago to TRANSACTION_ARCHIVE_DIR,
+              oldest first, and drop it. Each file is verified against the
+              partition's row count, and the partition's per-account totals
+              go to ArchivedLedgerStats, before anything is dropped; an
+              interrupted run can simply be repeated.
+
+The history endpoints read archived months from TRANSACTION_ARCHIVE_DIR,
+so it must be shared with (mounted into) the transactions service.
+
+Run from the repository root:
+    python -m scripts.partitions status
+    python -m scripts.partitions maintain --ahead 3
+    python -m scripts.partitions archive --retention-months 12
+"""
+
+from scripts.setup_database import get_connection_config, STAT_COLUMNS, STAT_TYPES
+from models.transaction_archive import transaction_archive, add_months
+from mysql.connector import Error
+from config import Config
+from datetime import datetime
+import argparse
+import mysql.connector
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+def partition_bound(month):
+    """VALUES LESS THAN expression for a month boundary (session time zone, like the stored rows)"""
+    return f"UNIX_TIMESTAMP('{month:%Y-%m-%d %H:%M:%S}')"
+
+def list_partitions(cursor, database):
+    """[(name, end, estimated rows)] of Transaction in order; end is None for MAXVALUE"""
+    cursor.execute(
+        """
+        SELECT partition_name,
+               IF(partition_description = 'MAXVALUE', NULL, FROM_UNIXTIME(partition_description)),
+               table_rows
+        FROM information_schema.partitions
+        WHERE table_schema = %s AND table_name = 'Transaction' AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+        """,
+        (database,)
+    )
+    return cursor.fetchall()
+
+def status(cursor, database):
+    partitions = list_partitions(cursor, database)
+    if not partitions:
+        print("✗ Transaction is not partitioned; run scripts/setup_database.py --migrate")
+        return False
+    print("Live partitions:")
+    for name, end, rows in partitions:
+        print(f"  {name:<12} {'until ' + end.isoformat() if end else 'MAXVALUE':<28} ~{rows} rows")
+    archived = transaction_archive.partitions()
+    print(f"Archived partitions ({transaction_archive.directory}):")
+    for entry in archived:
+        print(f"  {entry['name']:<12} until {entry['end'].isoformat():<22} {entry['rows']} rows, {entry['bytes']} bytes")
+    if not archived:
+        print("  (none)")
+    return True
+
+def split_history(cursor, partitions):
+    """Split p_history into monthly partitions from its oldest row; returns the new months"""
+    name, end, _ = partitions[0]
+    if name != 'p_history':
+        return []
+    cursor.execute("SELECT MIN(date_time) FROM Transaction PARTITION (p_history)")
+    oldest = cursor.fetchall()[0][0]
+    if oldest is None:
+        return []
+    
+    months = []
+    month = add_months(oldest, 0)
+    while month < end:
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        return []
+    
+    definitions = ', '.join(
+        f"PARTITION {partition_name(month)} VALUES LESS THAN ({partition_bound(min(add_months(month, 1), end))})"
+        for month in months
+    )
+    cursor.execute(
+        f"ALTER TABLE Transaction REORGANIZE PARTITION p_history INTO "
+        f"(PARTITION p_history VALUES LESS THAN ({partition_bound(months[0])}), {definitions})"
+    )
+    return months
+
+def maintain(cursor, database, ahead):
+    """
+    Split p_history into monthly partitions down to its oldest row and
+    p_future into monthly partitions up to ``ahead`` months from now. Rows
+    already in p_future (0004 applied after its first month) move into the
+    new months with the split.
+    """
+    partitions = list_partitions(cursor, database)
+    if len(partitions) < 2 or partitions[-1][1] is not None:
+        print("✗ Transaction is not partitioned by month; run scripts/setup_database.py --migrate")
+        return False
+    
+    history = split_history(cursor, partitions)
+    if history:
+        print(f"✓ Split p_history into {partition_name(history[0])} … {partition_name(history[-1])}")
+    
+    target = add_months(datetime.now(), ahead + 1)
+    months = []
+    month = partitions[-2][1]
+    while month < target:
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        print(f"✓ Partitions exist until {partitions[-2][1].isoformat()}")
+        return True
+    
+    definitions = ', '.join(
+        f"PARTITION {partition_name(month)} VALUES LESS THAN ({partition_bound(add_months(month, 1))})"
+        for month in months
+    )
+    cursor.execute(
+        f"ALTER TABLE Transaction REORGANIZE PARTITION p_future INTO "
+        f"({definitions}, PARTITION p_future VALUES LESS THAN MAXVALUE)"
+    )
+    print(f"✓ Added partitions {', '.join(partition_name(month) for month in months)}")
+    return True
+
+def archive(connection, database, retention_months):
+    """Archive and drop every partition that ended before the retention cutoff, oldest first"""
+    cursor = connection.cursor()
+    cutoff = add_months(datetime.now(), -retention_months)
+    start = transaction_archive.boundary()
+    archived = 0
+    for name, end, _ in list_partitions(cursor, database):
+        if end is None or end > cutoff:
+            break
+        
+        cursor.execute(f"SELECT COUNT(*) FROM Transaction PARTITION ({name})")
+        expected = cursor.fetchall()[0][0]
+        
+        # Stream the partition in both of the archive's sort orders straight
+        # into the file; each pass needs its own connection to stay unbuffered
+        rows = connection.cursor()
+        rows.execute(
+            f"SELECT txn_id, acc_no, type, amount, date_time FROM Transaction PARTITION ({name}) "
+            f"ORDER BY acc_no, date_time, txn_id"
+        )
+        time_connection = mysql.connector.connect(database=database, **get_connection_config())
+        try:
+            time_rows = time_connection.cursor()
+            time_rows.execute(
+                f"SELECT txn_id, acc_no, type, amount, date_time FROM Transaction PARTITION ({name}) "
+                f"ORDER BY date_time, txn_id"
+            )
+            written = transaction_archive.add_partition(name, start, end, rows, time_rows)
+            time_rows.close()
+        finally:
+            time_connection.close()
+        rows.close()
+        if written != expected:
+            print(f"✗ {name}: archived {written} of {expected} rows; partition kept")
+            return False
+        
+        cursor.execute("START TRANSACTION")
+        cursor.execute("SELECT COUNT(*) FROM ArchivedPartition WHERE name = %s FOR UPDATE", (name,))
+        if not cursor.fetchall()[0][0]:
+            sums = ', '.join(
+                f"SUM(t.type = '{txn_type}'), COALESCE(SUM(CASE WHEN t.type = '{txn_type}' THEN t.amount END), 0)"
+                for txn_type in STAT_TYPES
+            )
+            updates = ', '.join(f"{column} = {column} + VALUES({column})" for column in STAT_COLUMNS)
+            cursor.execute(
+                f"""
+                INSERT INTO ArchivedLedgerStats (acc_no, {', '.join(STAT_COLUMNS)})
+                SELECT t.acc_no, {sums}
+                FROM Transaction PARTITION ({name}) t
+                JOIN Account a ON a.acc_no = t.acc_no
+                GROUP BY t.acc_no
+                ON DUPLICATE KEY UPDATE {updates}
+                """
+            )
+            cursor.execute(
+                "INSERT INTO ArchivedPartition (name, range_start, range_end, row_count) VALUES (%s, %s, %s, %s)",
+                (name, start, end, written)
+            )
+        cursor.execute("COMMIT")
+        
+        cursor.execute(f"ALTER TABLE Transaction DROP PARTITION {name}")
+        print(f"✓ Archived {name} ({written} rows) and dropped it")
+        start = end
+        archived += 1
+    
+    print(f"✓ {archived} partition(s) archived; keeping everything since {cutoff.date().isoformat()}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaction partition maintenance and archival")
+    parser.add_argument('command', choices=['status', 'maintain', 'archive'])
+    parser.add_argument('--database', default=Config.MYSQL_DATABASE)
+    parser.add_argument('--ahead', type=int, default=Config.TRANSACTION_PARTITIONS_AHEAD,
+                        help="months of partitions to keep ready ahead of now (maintain)")
+    parser.add_argument('--retention-months', type=int, default=Config.TRANSACTION_RETENTION_MONTHS,
+                        help="months of partitions to keep in MySQL (archive)")
+    args = parser.parse_args()
+    
+    connection = None
+    try:
+        connection = mysql.connector.connect(database=args.database, **get_connection_config())
+        cursor = connection.cursor()
+        # DDL waits briefly for its metadata lock instead of queueing traffic behind it
+        cursor.execute("SET SESSION lock_wait_timeout = 5")
+        if args.command == 'status':
+            return status(cursor, args.database)
+        if args.command == 'maintain':
+            return maintain(cursor, args.database, args.ahead)
+        return archive(connection, args.database, args.retention_months)
+    except (Error, OSError, ValueError) as e:
+        print(f"✗ Partition {args.command} failed: {e}")
+        return False
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
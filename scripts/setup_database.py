@@ -2,10 +2,28 @@
 """
 Database Setup Script for Banking System
 This script creates the database, tables, and inserts sample data.
+
+The schema is created and upgraded by the versioned migrations in
+scripts/migrations (see scripts/migrate.py).
+
+Maintenance commands:
+    --migrate         Apply pending schema migrations (online index builds)
+    --migration-status
+                      List applied and pending migrations
+    --rebuild-stats   Recompute AccountStats from the Transaction ledger
+    --verify-stats    Compare AccountStats with the ledger and report drift
+    --purge-idempotency
+                      Delete expired Idempotency-Key responses in small batches
 """
 
 import mysql.connector
 from mysql.connector import Error
+try:
+    from scripts.migrate import migrate, migration_status, split_sql_statements
+except ImportError:
+    # Run as ``python scripts/setup_database.py``
+    from migrate import migrate, migration_status, split_sql_statements
+import argparse
 import os
 from dotenv import load_dotenv
 
@@ -24,13 +42,10 @@ def read_sql_file(file_path):
 def execute_sql_script(cursor, sql_script, script_name):
     """Execute SQL script with proper error handling"""
     try:
-        # Split the script into individual statements
-        statements = sql_script.split(';')
-        
-        for statement in statements:
-            statement = statement.strip()
-            if statement and not statement.startswith('--'):
-                cursor.execute(statement)
+        for statement in split_sql_statements(sql_script):
+            cursor.execute(statement)
+            if cursor.with_rows:
+                cursor.fetchall()
         
         print(f"✓ {script_name} executed successfully")
         return True
@@ -38,19 +53,123 @@ def execute_sql_script(cursor, sql_script, script_name):
         print(f"✗ Error executing {script_name}: {e}")
         return False
 
-def setup_database():
-    """Main function to set up the database"""
-    print("🏦 Banking System Database Setup")
-    print("=" * 40)
-    
-    # Database connection parameters
-    config = {
+STAT_TYPES = ('deposit', 'withdrawal', 'transfer_in', 'transfer_out')
+STAT_COLUMNS = [column for txn_type in STAT_TYPES for column in (f"{txn_type}_count", f"{txn_type}_total")]
+
+# One row per account with the same columns as AccountStats, straight from the
+# ledger plus the totals of its archived partitions (see scripts/partitions.py)
+LEDGER_STATS_QUERY = f"""
+SELECT acc_no, {', '.join(f"SUM({column})" for column in STAT_COLUMNS)}
+FROM (
+    SELECT acc_no, {', '.join(
+        f"SUM(type = '{txn_type}') AS {txn_type}_count, "
+        f"COALESCE(SUM(CASE WHEN type = '{txn_type}' THEN amount END), 0) AS {txn_type}_total"
+        for txn_type in STAT_TYPES
+    )}
+    FROM Transaction
+    GROUP BY acc_no
+    UNION ALL
+    SELECT acc_no, {', '.join(STAT_COLUMNS)} FROM ArchivedLedgerStats
+) ledger
+GROUP BY acc_no
+"""
+
+def get_connection_config():
+    """MySQL connection parameters from the environment"""
+    return {
         'host': os.environ.get('MYSQL_HOST', 'localhost'),
         'user': os.environ.get('MYSQL_USER', 'root'),
         'password': os.environ.get('MYSQL_PASSWORD', ''),
         'port': int(os.environ.get('MYSQL_PORT', 3306)),
         'autocommit': True
     }
+
+def rebuild_stats(cursor, database='banking_system'):
+    """Recompute every AccountStats row from the ledger in one bulk statement (after --migrate)"""
+    try:
+        cursor.execute(f"USE {database}")
+        cursor.execute("START TRANSACTION")
+        cursor.execute("DELETE FROM AccountStats")
+        cursor.execute(f"INSERT INTO AccountStats (acc_no, {', '.join(STAT_COLUMNS)}) {LEDGER_STATS_QUERY}")
+        rebuilt = cursor.rowcount
+        cursor.execute("COMMIT")
+        print(f"✓ Rebuilt account stats for {rebuilt} accounts")
+        return True
+    except Error as e:
+        cursor.execute("ROLLBACK")
+        print(f"✗ Error rebuilding account stats: {e}")
+        return False
+
+def verify_stats(cursor, database='banking_system'):
+    """Report accounts whose AccountStats row has drifted from the ledger"""
+    try:
+        cursor.execute(f"USE {database}")
+        cursor.execute(LEDGER_STATS_QUERY)
+        expected = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+        cursor.execute(f"SELECT acc_no, {', '.join(STAT_COLUMNS)} FROM AccountStats")
+        actual = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+        
+        empty = tuple(0 for _ in STAT_COLUMNS)
+        drifted = 0
+        for acc_no in sorted(expected.keys() | actual.keys()):
+            ledger_values = expected.get(acc_no, empty)
+            stats_values = actual.get(acc_no, empty)
+            if ledger_values == stats_values:
+                continue
+            drifted += 1
+            differences = ', '.join(
+                f"{column}: stats={stat} ledger={ledger}"
+                for column, stat, ledger in zip(STAT_COLUMNS, stats_values, ledger_values)
+                if stat != ledger
+            )
+            print(f"✗ Account {acc_no}: {differences}")
+        
+        if drifted:
+            print(f"✗ {drifted} of {len(expected.keys() | actual.keys())} accounts have drifted; run --rebuild-stats")
+            return False
+        print(f"✓ Account stats match the ledger for {len(expected)} accounts")
+        return True
+    except Error as e:
+        print(f"✗ Error verifying account stats: {e}")
+        return False
+
+def purge_idempotency(cursor, database='banking_system', batch_size=1000):
+    """Delete expired IdempotencyKey rows a batch at a time to keep locks short"""
+    try:
+        cursor.execute(f"USE {database}")
+        removed = 0
+        while True:
+            cursor.execute("DELETE FROM IdempotencyKey WHERE expires_at < NOW() LIMIT %s", (batch_size,))
+            removed += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+        print(f"✓ Purged {removed} expired idempotency keys")
+        return True
+    except Error as e:
+        print(f"✗ Error purging idempotency keys: {e}")
+        return False
+
+def run_stats_command(command):
+    """Connect and run a maintenance command (rebuild_stats, verify_stats, ...)"""
+    connection = None
+    try:
+        connection = mysql.connector.connect(**get_connection_config())
+        cursor = connection.cursor()
+        return command(cursor)
+    except Error as e:
+        print(f"✗ Database connection error: {e}")
+        return False
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+def setup_database():
+    """Main function to set up the database"""
+    print("🏦 Banking System Database Setup")
+    print("=" * 40)
+    
+    # Database connection parameters
+    config = get_connection_config()
     
     try:
         # Connect to MySQL server (without specifying database)
@@ -60,22 +179,15 @@ def setup_database():
         
         print("✓ Connected to MySQL server successfully")
         
-        # Read and execute database creation script
-        print("\n📋 Creating database and tables...")
-        create_script = read_sql_file('scripts/create_database.sql')
-        if create_script:
-            if execute_sql_script(cursor, create_script, "Database Creation Script"):
-                print("✓ Database and tables created successfully")
-            else:
-                print("✗ Failed to create database and tables")
-                return False
-        else:
-            print("✗ Could not read database creation script")
+        # Create or upgrade the schema
+        print("\n📋 Applying schema migrations...")
+        if not migrate(cursor):
+            print("✗ Failed to migrate the database")
             return False
         
         # Read and execute sample data script
         print("\n📊 Inserting sample data...")
-        seed_script = read_sql_file('scripts/seed_sample_data.sql')
+        seed_script = read_sql_file('scripts/seed.sql')
         if seed_script:
             if execute_sql_script(cursor, seed_script, "Sample Data Script"):
                 print("✓ Sample data inserted successfully")
@@ -108,6 +220,10 @@ def setup_database():
         
         print(f"✓ Sample data: {customer_count} customers, {account_count} accounts, {loan_count} loans, {transaction_count} transactions")
         
+        # Seed data inserts ledger rows directly, so derive the aggregates from it
+        if not rebuild_stats(cursor):
+            return False
+        
         print("\n🎉 Database setup completed successfully!")
         print("\n📝 Next steps:")
         print("1. Update your .env file with the correct database credentials")
@@ -132,5 +248,25 @@ def setup_database():
             print("\n📡 MySQL connection closed")
 
 if __name__ == "__main__":
-    success = setup_database()
+    parser = argparse.ArgumentParser(description="Banking System database setup and maintenance")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--migrate', action='store_true', help="apply pending schema migrations")
+    group.add_argument('--migration-status', action='store_true', help="list applied and pending migrations")
+    group.add_argument('--rebuild-stats', action='store_true', help="recompute AccountStats from the ledger")
+    group.add_argument('--verify-stats', action='store_true', help="report AccountStats drift from the ledger")
+    group.add_argument('--purge-idempotency', action='store_true', help="delete expired Idempotency-Key responses")
+    args = parser.parse_args()
+    
+    if args.migrate:
+        success = run_stats_command(migrate)
+    elif args.migration_status:
+        success = run_stats_command(migration_status)
+    elif args.rebuild_stats:
+        success = run_stats_command(rebuild_stats)
+    elif args.verify_stats:
+        success = run_stats_command(verify_stats)
+    elif args.purge_idempotency:
+        success = run_stats_command(purge_idempotency)
+    else:
+        success = setup_database()
     exit(0 if success else 1)
@@ -1,6 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from models.customer import Customer
 from models.account import Account
+from models.onboarding import Onboarding
+from models.money import parse_money, money_or_zero
+from database.connection import db
+from services.common import (
+    format_account, format_accounts, format_customers,
+    parse_onboarding_batch, format_onboarding_outcome, batch_summary,
+    EXPORT_COLUMNS, EXPORT_MIMETYPES, ExportWriter, export_options, export_headers, export_stream
+)
+from config import Config
 import logging
 #complete account services
 accounts_bp = Blueprint('accounts', __name__)
@@ -17,34 +26,87 @@ def create_account():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        # Create customer first
-        customer = Customer.create(
-            cust_name=data['cust_name'],
-            cust_street=data['cust_street'],
-            cust_city=data['cust_city']
-        )
-        
-        # Create account for the customer
-        account = Account.create(
-            branch_name=data['branch_name'],
-            balance=data['initial_balance'],
-            cust_id=customer.cust_id
-        )
+        # Customer and account are created in one unit of work
+        with db.session() as session:
+            # Create customer first
+            customer = Customer.create(
+                cust_name=data['cust_name'],
+                cust_street=data['cust_street'],
+                cust_city=data['cust_city'],
+                session=session
+            )
+            
+            # Create account for the customer
+            account = Account.create(
+                branch_name=data['branch_name'],
+                balance=parse_money(data['initial_balance']),
+                cust_id=customer.cust_id,
+                session=session
+            )
         
         return jsonify({
             'message': 'Account created successfully',
             'account': {
                 'acc_no': account.acc_no,
                 'branch_name': account.branch_name,
-                'balance': float(account.balance) if account.balance is not None else 0.0,
+                'balance': money_or_zero(account.balance),
                 'customer': customer.to_dict()
             }
         }), 201
         
+    except ValueError:
+        return jsonify({'error': 'Invalid initial_balance format'}), 400
     except Exception as e:
         logging.error(f"Error creating account: {e}")
         return jsonify({'error': 'Failed to create account'}), 500
 
+@accounts_bp.route('/accounts:batch', methods=['POST'])
+def create_accounts_batch():
+    """Onboard many customers, each with one account, using chunked multi-row inserts"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('accounts'), list):
+            return jsonify({'error': 'Missing required field: accounts'}), 400
+        
+        items = data['accounts']
+        if len(items) > Config.ONBOARDING_MAX_ITEMS:
+            return jsonify({
+                'error': f'Batch too large (max {Config.ONBOARDING_MAX_ITEMS} accounts)'
+            }), 400
+        
+        # Validate every item up front; only valid ones reach the database
+        results, valid_indexes, valid_rows = parse_onboarding_batch(items)
+        outcomes = Onboarding.create_batch(valid_rows, chunk_size=Config.ONBOARDING_CHUNK_SIZE)
+        
+        for index, row, outcome in zip(valid_indexes, valid_rows, outcomes):
+            results[index] = format_onboarding_outcome(index, row, outcome)
+        
+        return jsonify(batch_summary(results, message='Batch onboarding processed')), 200
+        
+    except Exception as e:
+        logging.error(f"Error onboarding accounts: {e}")
+        return jsonify({'error': 'Failed to process onboarding batch'}), 500
+
+@accounts_bp.route('/accounts/export', methods=['GET'])
+def export_accounts():
+    """Stream every account as CSV or NDJSON (``format``), gzipped if the client accepts it"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        rows = Account.iter_all(chunk_size=Config.STREAM_CHUNK_SIZE)
+        writer = ExportWriter(EXPORT_COLUMNS['accounts'], file_format, compress)
+        return Response(
+            export_stream(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('accounts', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format. Use: csv or ndjson'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting accounts: {e}")
+        return jsonify({'error': 'Failed to export accounts'}), 500
+
 @accounts_bp.route('/accounts/<int:acc_no>', methods=['GET'])
 def get_account(acc_no):
     """Get account details by account number"""
@@ -54,19 +116,7 @@ def get_account(acc_no):
         if not account:
             return jsonify({'error': 'Account not found'}), 404
         
-        return jsonify({
-            'account': {
-                'acc_no': account['acc_no'],
-                'branch_name': account['branch_name'],
-                'balance': float(account['balance']) if account['balance'] is not None else 0.0,
-                'customer': {
-                    'cust_id': account['cust_id'],
-                    'cust_name': account['cust_name'],
-                    'cust_street': account['cust_street'],
-                    'cust_city': account['cust_city']
-                }
-            }
-        }), 200
+        return jsonify({'account': format_account(account)}), 200
         
     except Exception as e:
         logging.error(f"Error fetching account: {e}")
@@ -78,47 +128,41 @@ def update_account(acc_no):
     try:
         data = request.get_json()
         
-        # Get existing account
-        account_data = Account.get_by_id(acc_no)
-        if not account_data:
-            return jsonify({'error': 'Account not found'}), 404
-        
-        # Update account details
-        account = Account(
-            acc_no=acc_no,
-            branch_name=data.get('branch_name', account_data['branch_name']),
-            balance=data.get('balance', account_data['balance']),
-            cust_id=account_data['cust_id']
-        )
-        account.update()
-        
-        # Update customer details if provided
-        if any(field in data for field in ['cust_name', 'cust_street', 'cust_city']):
-            customer = Customer.get_by_id(account_data['cust_id'])
-            if customer:
-                customer.cust_name = data.get('cust_name', customer.cust_name)
-                customer.cust_street = data.get('cust_street', customer.cust_street)
-                customer.cust_city = data.get('cust_city', customer.cust_city)
-                customer.update()
-        
-        # Get updated account data
-        updated_account = Account.get_by_id(acc_no)
+        # All reads and writes share one connection and commit once
+        with db.session() as session:
+            # Get existing account
+            account_data = Account.get_by_id(acc_no, session=session)
+            if not account_data:
+                return jsonify({'error': 'Account not found'}), 404
+            
+            # Update account details
+            account = Account(
+                acc_no=acc_no,
+                branch_name=data.get('branch_name', account_data['branch_name']),
+                balance=parse_money(data['balance']) if 'balance' in data else None,
+                cust_id=account_data['cust_id']
+            )
+            account.update(session=session)
+            
+            # Update customer details if provided
+            if any(field in data for field in ['cust_name', 'cust_street', 'cust_city']):
+                customer = Customer.get_by_id(account_data['cust_id'], session=session)
+                if customer:
+                    customer.cust_name = data.get('cust_name', customer.cust_name)
+                    customer.cust_street = data.get('cust_street', customer.cust_street)
+                    customer.cust_city = data.get('cust_city', customer.cust_city)
+                    customer.update(session=session)
+            
+            # Get updated account data
+            updated_account = Account.get_by_id(acc_no, session=session)
         
         return jsonify({
             'message': 'Account updated successfully',
-            'account': {
-                'acc_no': updated_account['acc_no'],
-                'branch_name': updated_account['branch_name'],
-                'balance': float(updated_account['balance']) if updated_account['balance'] is not None else 0.0,
-                'customer': {
-                    'cust_id': updated_account['cust_id'],
-                    'cust_name': updated_account['cust_name'],
-                    'cust_street': updated_account['cust_street'],
-                    'cust_city': updated_account['cust_city']
-                }
-            }
+            'account': format_account(updated_account)
         }), 200
         
+    except ValueError:
+        return jsonify({'error': 'Invalid balance format'}), 400
     except Exception as e:
         logging.error(f"Error updating account: {e}")
         return jsonify({'error': 'Failed to update account'}), 500
@@ -127,14 +171,15 @@ def update_account(acc_no):
 def delete_account(acc_no):
     """Delete account"""
     try:
-        # Check if account exists
-        account_data = Account.get_by_id(acc_no)
-        if not account_data:
-            return jsonify({'error': 'Account not found'}), 404
-        
-        # Delete account
-        account = Account(acc_no=acc_no)
-        account.delete()
+        with db.session() as session:
+            # Check if account exists
+            account_data = Account.get_by_id(acc_no, session=session)
+            if not account_data:
+                return jsonify({'error': 'Account not found'}), 404
+            
+            # Delete account
+            account = Account(acc_no=acc_no)
+            account.delete(session=session)
         
         return jsonify({'message': 'Account deleted successfully'}), 200
         
@@ -146,21 +191,7 @@ def delete_account(acc_no):
 def list_accounts():
     """List all accounts"""
     try:
-        accounts = Account.get_all()
-        
-        account_list = []
-        for account in accounts:
-            account_list.append({
-                'acc_no': account['acc_no'],
-                'branch_name': account['branch_name'],
-                'balance': float(account['balance']) if account['balance'] is not None else 0.0,
-                'customer': {
-                    'cust_id': account['cust_id'],
-                    'cust_name': account['cust_name'],
-                    'cust_street': account['cust_street'],
-                    'cust_city': account['cust_city']
-                }
-            })
+        account_list = format_accounts(Account.get_all())
         
         return jsonify({
             'accounts': account_list,
@@ -176,9 +207,7 @@ def list_accounts():
 def list_customers():
     """List all customers"""
     try:
-        customers = Customer.get_all()
-        
-        customer_list = [customer.to_dict() for customer in customers]
+        customer_list = format_customers(Customer.get_all())
         
         return jsonify({
             'customers': customer_list,
@@ -189,6 +218,25 @@ def list_customers():
         logging.error(f"Error listing customers: {e}")
         return jsonify({'error': 'Failed to list customers'}), 500
 
+@accounts_bp.route('/customers/export', methods=['GET'])
+def export_customers():
+    """Stream every customer as CSV or NDJSON (``format``), gzipped if the client accepts it"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        rows = Customer.iter_all(chunk_size=Config.STREAM_CHUNK_SIZE)
+        writer = ExportWriter(EXPORT_COLUMNS['customers'], file_format, compress)
+        return Response(
+            export_stream(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('customers', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format. Use: csv or ndjson'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting customers: {e}")
+        return jsonify({'error': 'Failed to export customers'}), 500
+
 @accounts_bp.route('/customers/<int:cust_id>', methods=['GET'])
 def get_customer(cust_id):
     """Get customer details"""
@@ -0,0 +1,107 @@
+from flask import Blueprint, Response, request, jsonify, g
+from database.connection import db
+from models.metrics import metrics
+from models.profiler import profiler, format_stats, ProfilerBusyError
+from models.slow_queries import slow_queries
+from mysql.connector import Error
+from services.common import admin_authorized, sample_options, profile_sort
+from config import Config
+from functools import wraps
+import logging
+
+admin_bp = Blueprint('admin', __name__)
+
+def admin_required(view):
+    """Operator-only endpoint: 404 unless ADMIN_TOKEN is set, 401 without it"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not Config.ADMIN_TOKEN:
+            return jsonify({'error': 'Not found'}), 404
+        if not admin_authorized(request.headers):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/admin/profile', methods=['GET'])
+@admin_required
+def sample_profile():
+    """
+    Sample every thread of this worker for ``seconds`` (default 10) and
+    return collapsed stacks for a flame graph. Only the worker that takes
+    the request is profiled.
+    """
+    try:
+        seconds, interval = sample_options(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        stacks, ticks = profiler.sample(seconds, interval)
+    except ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        logging.error(f"Error sampling profile: {e}")
+        return jsonify({'error': 'Failed to sample profile'}), 500
+    
+    return Response(stacks, mimetype='text/plain', headers={'X-Profile-Samples': str(ticks)})
+
+@admin_bp.route('/admin/slow-queries', methods=['GET'])
+@admin_required
+def get_slow_queries():
+    """
+    This worker's slow statements by fingerprint, slowest in total first,
+    each with its EXPLAIN plan (run once and cached; ``?refresh=1`` re-runs them).
+    """
+    refresh = request.args.get('refresh') == '1'
+    for key, statement, params in slow_queries.pending_explains(refresh):
+        try:
+            with metrics.operation('admin.explain'), db.cursor(dictionary=True) as cursor:
+                cursor.execute(f"EXPLAIN {statement}", params)
+                slow_queries.set_plan(key, cursor.fetchall())
+        except Error as e:
+            logging.error(f"Error explaining slow query: {e}")
+            slow_queries.set_plan(key, {'error': str(e)})
+    
+    return jsonify({
+        'threshold_ms': Config.SLOW_QUERY_MS,
+        'queries': slow_queries.entries()
+    }), 200
+
+def install_request_profiling(app):
+    """
+    ``?profile=1`` on any request (with the admin token) runs it under
+    cProfile and returns the pstats report instead of the response body,
+    with the response's own status code.
+    """
+    @app.before_request
+    def start_request_profile():
+        if request.args.get('profile') != '1':
+            return None
+        if not admin_authorized(request.headers):
+            return jsonify({'error': 'Unauthorized'}), 401
+        try:
+            g.profile_sort = profile_sort(request.args)
+            g.profile = profiler.profile_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except ProfilerBusyError as e:
+            return jsonify({'error': str(e)}), 409
+        g.profile.enable()
+        return None
+    
+    @app.after_request
+    def finish_request_profile(response):
+        profile = g.get('profile')
+        if profile is None:
+            return response
+        profile.disable()
+        # The body is replaced, so release whatever a streamed one holds
+        response.close()
+        return Response(format_stats(profile, g.profile_sort), status=response.status_code, mimetype='text/plain')
+    
+    @app.teardown_request
+    def stop_request_profile(error=None):
+        # after_request is skipped when the view raises; this always runs
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.disable()
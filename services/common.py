@@ -0,0 +1,488 @@
+from models.ledger import AccountNotFoundError, InsufficientBalanceError
+from models.account import ACCOUNT_COLUMNS
+from models.customer import CUSTOMER_COLUMNS
+from models.loan import LOAN_COLUMNS
+from models.transaction import TRANSACTION_COLUMNS, TRANSACTION_LIST_COLUMNS
+from models.money import parse_money
+from services.serializers import RowSerializer
+from config import Config
+from decimal import Decimal
+from datetime import datetime, timedelta
+import base64
+import binascii
+import csv
+import hmac
+import io
+import json
+import zlib
+
+# Request parsing and response shaping shared by the Flask blueprints in
+# services/ and their asyncio counterparts in asgi/, so both serve
+# identical JSON.
+
+LOAN_STATUSES = ('pending', 'approved', 'rejected')
+
+def parse_account_number(value):
+    """
+    Account number from a JSON body. Raises ValueError for anything but an
+    integer or a string of digits: MySQL would coerce "12abc" to 12, and
+    int() truncates the Decimal that 12.5 is decoded as, so either would
+    post to the wrong account.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    raise ValueError('Invalid account number')
+
+def page_limit(args):
+    """Page size from the ``limit`` query parameter, capped at MAX_PAGE_SIZE"""
+    limit = args.get('limit', Config.DEFAULT_PAGE_SIZE, type=int)
+    if limit <= 0:
+        raise ValueError('limit must be positive')
+    return min(limit, Config.MAX_PAGE_SIZE)
+
+def parse_date(value, end_of_day=False):
+    """Parse an ISO date/datetime query parameter; a bare end date covers that whole day"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def encode_cursor(date_time, txn_id):
+    """Opaque keyset cursor for a (date_time, txn_id) position"""
+    raw = f"{date_time.isoformat()}|{txn_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def row_cursor(row, columns):
+    """Keyset cursor for a transaction tuple row in ``columns`` order"""
+    return encode_cursor(row[columns.index('date_time')], row[columns.index('txn_id')])
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        date_time, txn_id = base64.urlsafe_b64decode(token.encode()).decode().split('|')
+        return datetime.fromisoformat(date_time), int(txn_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError('Malformed cursor') from e
+
+def history_query(args):
+    """Keyword arguments for Transaction.get_by_account from the request's query string"""
+    return {
+        'limit': page_limit(args),
+        'before': decode_cursor(args.get('before')),
+        'after': decode_cursor(args.get('after')),
+        'date_from': parse_date(args.get('from')),
+        'date_to': parse_date(args.get('to'), end_of_day=True)
+    }
+
+def split_history_page(transactions, limit, before=None, after=None):
+    """
+    Trim a page of TRANSACTION_COLUMNS rows fetched with ``limit + 1`` rows
+    and work out its cursors.
+    
+    The extra row only tells us whether another page exists in the direction
+    we were paging. Returns (transactions, next_cursor, prev_cursor).
+    """
+    has_more = len(transactions) > limit
+    if has_more:
+        transactions = transactions[1:] if after else transactions[:limit]
+    
+    next_cursor = None
+    prev_cursor = None
+    if transactions:
+        if has_more or after:
+            next_cursor = row_cursor(transactions[-1], TRANSACTION_COLUMNS)
+        if (has_more and after) or before:
+            prev_cursor = row_cursor(transactions[0], TRANSACTION_COLUMNS)
+    return transactions, next_cursor, prev_cursor
+
+# Response shapes. Model list queries return tuple rows in their *_COLUMNS
+# order, serialized by the plural format_* helpers; single dictionary rows
+# (detail endpoints, cached reads, streams) by the singular ones.
+
+# Transaction row joined with account and customer, as listed by GET /transactions
+TRANSACTION = RowSerializer({
+    'txn_id': 'txn_id',
+    'acc_no': 'acc_no',
+    'type': 'type',
+    'amount': 'amount',
+    'date_time': ('date_time', 'iso'),
+    'account_info': {
+        'branch_name': 'branch_name',
+        'customer_name': 'cust_name'
+    }
+})
+
+HISTORY_ENTRY = RowSerializer({
+    'txn_id': 'txn_id',
+    'type': 'type',
+    'amount': 'amount',
+    'date_time': ('date_time', 'iso')
+})
+
+# Account row joined with its customer
+ACCOUNT = RowSerializer({
+    'acc_no': 'acc_no',
+    'branch_name': 'branch_name',
+    'balance': ('balance', 'money_or_zero'),
+    'customer': {
+        'cust_id': 'cust_id',
+        'cust_name': 'cust_name',
+        'cust_street': 'cust_street',
+        'cust_city': 'cust_city'
+    }
+})
+
+# Short account header used by the history and summary endpoints
+ACCOUNT_OVERVIEW = RowSerializer({
+    'acc_no': 'acc_no',
+    'branch_name': 'branch_name',
+    'current_balance': 'balance',
+    'customer': {
+        'cust_id': 'cust_id',
+        'cust_name': 'cust_name'
+    }
+})
+
+CUSTOMER = RowSerializer({
+    'cust_id': 'cust_id',
+    'cust_name': 'cust_name',
+    'cust_street': 'cust_street',
+    'cust_city': 'cust_city'
+})
+
+# Loan row joined with its borrower
+LOAN = RowSerializer({
+    'loan_no': 'loan_no',
+    'branch_name': 'branch_name',
+    'amount': 'amount',
+    'status': 'status',
+    'installments_remaining': 'installments_remaining',
+    'customer': {
+        'cust_id': 'cust_id',
+        'cust_name': 'cust_name'
+    }
+})
+
+format_transaction = TRANSACTION.mapping
+format_history_entry = HISTORY_ENTRY.mapping
+format_account = ACCOUNT.mapping
+format_account_overview = ACCOUNT_OVERVIEW.mapping
+format_loan = LOAN.mapping
+
+def format_history(transactions):
+    """History entries for TRANSACTION_COLUMNS rows"""
+    return HISTORY_ENTRY.rows(TRANSACTION_COLUMNS, transactions)
+
+def format_transactions(transactions):
+    """List entries for TRANSACTION_LIST_COLUMNS rows"""
+    return TRANSACTION.rows(TRANSACTION_LIST_COLUMNS, transactions)
+
+def format_accounts(accounts):
+    return ACCOUNT.rows(ACCOUNT_COLUMNS, accounts)
+
+def format_customers(customers):
+    return CUSTOMER.rows(CUSTOMER_COLUMNS, customers)
+
+def format_summary(stats):
+    """Summary block from per-type {'count', 'total'} aggregates"""
+    total_deposits = stats['deposit']['total']
+    total_withdrawals = stats['withdrawal']['total']
+    total_transfers_in = stats['transfer_in']['total']
+    total_transfers_out = stats['transfer_out']['total']
+    return {
+        'total_deposits': total_deposits,
+        'total_withdrawals': total_withdrawals,
+        'total_transfers_in': total_transfers_in,
+        'total_transfers_out': total_transfers_out,
+        'deposit_count': stats['deposit']['count'],
+        'withdrawal_count': stats['withdrawal']['count'],
+        'transfer_in_count': stats['transfer_in']['count'],
+        'transfer_out_count': stats['transfer_out']['count'],
+        'total_transactions': sum(entry['count'] for entry in stats.values()),
+        'net_change': total_deposits + total_transfers_in - total_withdrawals - total_transfers_out
+    }
+
+def loan_filters(args, status=None):
+    """Loan.find filter arguments from the request's query string"""
+    min_amount = args.get('min_amount')
+    max_amount = args.get('max_amount')
+    try:
+        return {
+            'status': status,
+            'branch_name': args.get('branch_name'),
+            'cust_id': args.get('cust_id', type=int),
+            'min_amount': parse_money(min_amount) if min_amount else None,
+            'max_amount': parse_money(max_amount) if max_amount else None,
+            'after_loan_no': args.get('after', type=int)
+        }
+    except ValueError as e:
+        raise ValueError('Invalid amount filter') from e
+
+def loan_page(loans, limit):
+    """Response body for a page of LOAN_COLUMNS rows fetched with ``limit + 1`` rows"""
+    next_cursor = None
+    if len(loans) > limit:
+        loans = loans[:limit]
+        next_cursor = loans[-1][LOAN_COLUMNS.index('loan_no')]
+    
+    loan_list = LOAN.rows(LOAN_COLUMNS, loans)
+    return {
+        'loans': loan_list,
+        'total': len(loan_list),
+        'next_cursor': next_cursor
+    }
+
+# Column limits of Customer and Account, checked before anything is sent
+ONBOARDING_FIELDS = {
+    'cust_name': 100,
+    'cust_street': 200,
+    'cust_city': 100,
+    'branch_name': 100
+}
+
+def parse_onboarding_batch(items):
+    """
+    Validate bulk onboarding items without touching the database.
+    
+    Returns (results, valid_indexes, valid_rows) like ``parse_transfer_batch``;
+    rows are (cust_name, cust_street, cust_city, branch_name, initial_balance).
+    """
+    results = [None] * len(items)
+    valid_indexes = []
+    valid_rows = []
+    for index, item in enumerate(items):
+        error = None
+        if not isinstance(item, dict) or any(item.get(field) in (None, '') for field in (*ONBOARDING_FIELDS, 'initial_balance')):
+            error = f"Missing required field: {', '.join(ONBOARDING_FIELDS)} and initial_balance are required"
+        else:
+            too_long = [field for field, length in ONBOARDING_FIELDS.items() if len(str(item[field])) > length]
+            try:
+                balance = parse_money(item['initial_balance'])
+                if too_long:
+                    error = f"Field too long: {', '.join(too_long)}"
+                elif balance < 0:
+                    error = 'Initial balance must not be negative'
+            except ValueError:
+                error = 'Invalid initial_balance format'
+        
+        if error:
+            results[index] = {'index': index, 'status': 'failed', 'error': error}
+        else:
+            valid_indexes.append(index)
+            valid_rows.append(tuple(str(item[field]) for field in ONBOARDING_FIELDS) + (balance,))
+    return results, valid_indexes, valid_rows
+
+def format_onboarding_outcome(index, row, outcome):
+    """Per-item result for a row created by Onboarding.create_batch"""
+    if isinstance(outcome, Exception):
+        return {'index': index, 'status': 'failed', 'error': 'Failed to create customer and account'}
+    
+    cust_id, acc_no = outcome
+    return {
+        'index': index,
+        'status': 'completed',
+        'cust_id': cust_id,
+        'acc_no': acc_no,
+        'branch_name': row[3],
+        'balance': row[4]
+    }
+
+def parse_transfer_batch(items):
+    """
+    Validate batch transfer items without touching the database.
+    
+    Returns (results, valid_indexes, valid_transfers): ``results`` has a
+    failure entry for every invalid item and None for the valid ones, whose
+    positions and (from_acc_no, to_acc_no, amount) tuples follow.
+    """
+    results = [None] * len(items)
+    valid_indexes = []
+    valid_transfers = []
+    for index, item in enumerate(items):
+        error = None
+        if not isinstance(item, dict) or any(field not in item for field in ('from_acc_no', 'to_acc_no', 'amount')):
+            error = 'Missing required field: from_acc_no, to_acc_no and amount are required'
+        else:
+            try:
+                from_acc_no = parse_account_number(item['from_acc_no'])
+                to_acc_no = parse_account_number(item['to_acc_no'])
+                amount = parse_money(item['amount'])
+                if amount <= 0:
+                    error = 'Transfer amount must be positive'
+                elif from_acc_no == to_acc_no:
+                    error = 'Cannot transfer to the same account'
+            except (ValueError, TypeError):
+                error = 'Invalid account number or amount format'
+        
+        if error:
+            results[index] = {'index': index, 'status': 'failed', 'error': error}
+        else:
+            valid_indexes.append(index)
+            valid_transfers.append((from_acc_no, to_acc_no, amount))
+    return results, valid_indexes, valid_transfers
+
+def format_batch_outcome(index, transfer, outcome):
+    """Per-item result for a transfer applied by Ledger.transfer_batch"""
+    from_acc_no, to_acc_no, amount = transfer
+    if isinstance(outcome, AccountNotFoundError):
+        side = 'Source' if outcome.acc_no == from_acc_no else 'Destination'
+        return {'index': index, 'status': 'failed', 'error': f'{side} account not found'}
+    if isinstance(outcome, InsufficientBalanceError):
+        return {
+            'index': index,
+            'status': 'failed',
+            'error': 'Insufficient balance in source account',
+            'current_balance': outcome.current_balance,
+            'requested_amount': amount
+        }
+    if isinstance(outcome, Exception):
+        return {'index': index, 'status': 'failed', 'error': 'Failed to process transfer'}
+    
+    debit, credit = outcome
+    return {
+        'index': index,
+        'status': 'completed',
+        'from_account': {
+            'acc_no': from_acc_no,
+            'previous_balance': debit.previous_balance,
+            'new_balance': debit.new_balance
+        },
+        'to_account': {
+            'acc_no': to_acc_no,
+            'previous_balance': credit.previous_balance,
+            'new_balance': credit.new_balance
+        },
+        'amount': amount
+    }
+
+def batch_summary(results, message='Batch transfer processed'):
+    succeeded = sum(1 for result in results if result['status'] == 'completed')
+    return {
+        'message': message,
+        'results': results,
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded
+    }
+
+# Columns of each export, in CSV order
+EXPORT_COLUMNS = {
+    'accounts': ACCOUNT_COLUMNS,
+    'customers': CUSTOMER_COLUMNS,
+    'loans': LOAN_COLUMNS,
+    'transactions': TRANSACTION_LIST_COLUMNS
+}
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def export_options(args, headers):
+    """(format, gzip) for an export: ``format`` query parameter and the Accept-Encoding header"""
+    file_format = args.get('format', 'ndjson')
+    if file_format not in EXPORT_MIMETYPES:
+        raise ValueError('format must be csv or ndjson')
+    return file_format, 'gzip' in headers.get('Accept-Encoding', '')
+
+def export_headers(name, file_format, compress):
+    headers = {'Content-Disposition': f'attachment; filename={name}.{file_format}'}
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    return headers
+
+class ExportWriter:
+    """
+    Incremental CSV/NDJSON encoder for export responses.
+    
+    ``write`` takes one row and returns bytes whenever roughly
+    EXPORT_BUFFER_BYTES have accumulated (else b''), so the response is sent
+    in large chunks rather than one per row; ``close`` returns the rest.
+    Amounts are written as exact decimal strings. With ``compress`` the
+    output is a gzip stream.
+    """
+    def __init__(self, columns, file_format, compress=False):
+        self.columns = columns
+        self.file_format = file_format
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer) if file_format == 'csv' else None
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16) if compress else None
+        if self._csv:
+            self._csv.writerow(columns)
+    
+    def write(self, row):
+        values = [export_value(row[column]) for column in self.columns]
+        if self._csv:
+            self._csv.writerow(values)
+        else:
+            self._buffer.write(json.dumps(dict(zip(self.columns, values))) + '\n')
+        if self._buffer.tell() < Config.EXPORT_BUFFER_BYTES:
+            return b''
+        return self._drain()
+    
+    def close(self):
+        chunk = self._drain()
+        if self._compressor:
+            chunk += self._compressor.flush()
+        return chunk
+    
+    def _drain(self):
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if self._compressor:
+            return self._compressor.compress(data)
+        return data
+
+def export_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def export_stream(rows, writer):
+    """Response body generator: rows encoded by ``writer`` in large chunks"""
+    for row in rows:
+        chunk = writer.write(row)
+        if chunk:
+            yield chunk
+    yield writer.close()
+
+async def export_stream_async(rows, writer):
+    """``export_stream`` for an async iterator of rows"""
+    async for row in rows:
+        chunk = writer.write(row)
+        if chunk:
+            yield chunk
+    yield writer.close()
+
+PROFILE_SORTS = ('cumulative', 'tottime', 'calls')
+
+def admin_authorized(headers):
+    """True if the request carries ``Authorization: Bearer <ADMIN_TOKEN>`` (never without a token)"""
+    if not Config.ADMIN_TOKEN:
+        return False
+    scheme, _, token = headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode())
+
+def sample_options(args):
+    """(seconds, interval) for a sampling profile, capped at PROFILE_MAX_SECONDS"""
+    seconds = args.get('seconds', 10, type=float)
+    interval = args.get('interval', Config.PROFILE_INTERVAL, type=float)
+    if not 0 < seconds <= Config.PROFILE_MAX_SECONDS:
+        raise ValueError(f'seconds must be between 0 and {Config.PROFILE_MAX_SECONDS}')
+    if not 0.001 <= interval <= 1:
+        raise ValueError('interval must be between 0.001 and 1 second')
+    return seconds, interval
+
+def profile_sort(args):
+    sort = args.get('profile_sort', 'cumulative')
+    if sort not in PROFILE_SORTS:
+        raise ValueError(f"profile_sort must be one of: {', '.join(PROFILE_SORTS)}")
+    return sort
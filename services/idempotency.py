@@ -0,0 +1,64 @@
+from flask import request, jsonify, make_response
+from database.connection import db
+from models.idempotency import Idempotency, IdempotencyConflictError
+from functools import wraps
+import logging
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+class _Discard(Exception):
+    """Leaves the session with a rollback while still returning ``response``"""
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+def idempotent(view):
+    """
+    Make a POST handler safe to retry with an ``Idempotency-Key`` header.
+    
+    The handler runs inside a unit of work and must pass its ``session``
+    keyword on to the models. The key, the handler's writes and its
+    response commit together; a replay returns the stored response with an
+    ``Idempotent-Replayed: true`` header and never touches balances. 5xx
+    responses roll everything back, so the key stays free for a retry.
+    Requests without the header run exactly as before.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'}), 400
+        
+        endpoint = request.endpoint
+        request_hash = Idempotency.request_hash(request.get_data())
+        try:
+            stored = Idempotency.cached(endpoint, key, request_hash)
+            if stored is None:
+                with db.session() as session:
+                    stored = Idempotency.reserve(endpoint, key, request_hash, session)
+                    if stored is None:
+                        response = make_response(view(*args, session=session, **kwargs))
+                        if response.status_code >= 500:
+                            raise _Discard(response)
+                        Idempotency.complete(
+                            endpoint, key, request_hash,
+                            response.status_code, response.get_data(as_text=True), session
+                        )
+                        return response
+        except _Discard as discarded:
+            return discarded.response
+        except IdempotencyConflictError:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+        except Exception as e:
+            logging.error(f"Error handling idempotent request: {e}")
+            return jsonify({'error': 'Failed to process request'}), 500
+        
+        if stored.status_code is None:
+            return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+        replay = make_response(stored.body, stored.status_code)
+        replay.mimetype = 'application/json'
+        replay.headers['Idempotent-Replayed'] = 'true'
+        return replay
+    return wrapper
@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from models.loan import Loan
 from models.customer import Customer
+from models.money import parse_money
+from database.connection import db
+from services.common import (
+    LOAN_STATUSES, page_limit, loan_filters, loan_page, format_loan,
+    EXPORT_COLUMNS, EXPORT_MIMETYPES, ExportWriter, export_options, export_headers, export_stream
+)
+from config import Config
 import logging
 
 loans_bp = Blueprint('loans', __name__)
@@ -17,38 +24,43 @@ def apply_for_loan():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        # Validate customer exists
-        customer = Customer.get_by_id(data['cust_id'])
-        if not customer:
-            return jsonify({'error': 'Customer not found'}), 404
-        
-        # Validate amount and installments
-        if data['amount'] <= 0:
-            return jsonify({'error': 'Loan amount must be positive'}), 400
-        
-        if data['installments'] <= 0:
-            return jsonify({'error': 'Installments must be positive'}), 400
-        
-        # Create loan
-        loan = Loan.create(
-            branch_name=data['branch_name'],
-            amount=data['amount'],
-            installments_remaining=data['installments'],
-            cust_id=data['cust_id']
-        )
+        with db.session() as session:
+            # Validate customer exists
+            customer = Customer.get_by_id(data['cust_id'], session=session)
+            if not customer:
+                return jsonify({'error': 'Customer not found'}), 404
+            
+            # Validate amount and installments
+            amount = parse_money(data['amount'])
+            if amount <= 0:
+                return jsonify({'error': 'Loan amount must be positive'}), 400
+            
+            if data['installments'] <= 0:
+                return jsonify({'error': 'Installments must be positive'}), 400
+            
+            # Create loan
+            loan = Loan.create(
+                branch_name=data['branch_name'],
+                amount=amount,
+                installments_remaining=data['installments'],
+                cust_id=data['cust_id'],
+                session=session
+            )
         
         return jsonify({
             'message': 'Loan application submitted successfully',
             'loan': {
                 'loan_no': loan.loan_no,
                 'branch_name': loan.branch_name,
-                'amount': float(loan.amount),
+                'amount': loan.amount,
                 'status': loan.status,
                 'installments_remaining': loan.installments_remaining,
                 'customer': customer.to_dict()
             }
         }), 201
         
+    except ValueError:
+        return jsonify({'error': 'Invalid amount format'}), 400
     except Exception as e:
         logging.error(f"Error applying for loan: {e}")
         return jsonify({'error': 'Failed to apply for loan'}), 500
@@ -62,19 +74,7 @@ def get_loan(loan_no):
         if not loan:
             return jsonify({'error': 'Loan not found'}), 404
         
-        return jsonify({
-            'loan': {
-                'loan_no': loan['loan_no'],
-                'branch_name': loan['branch_name'],
-                'amount': float(loan['amount']),
-                'status': loan['status'],
-                'installments_remaining': loan['installments_remaining'],
-                'customer': {
-                    'cust_id': loan['cust_id'],
-                    'cust_name': loan['cust_name']
-                }
-            }
-        }), 200
+        return jsonify({'loan': format_loan(loan)}), 200
         
     except Exception as e:
         logging.error(f"Error fetching loan: {e}")
@@ -84,38 +84,29 @@ def get_loan(loan_no):
 def approve_loan(loan_no):
     """Approve a loan"""
     try:
-        # Check if loan exists
-        loan_data = Loan.get_by_id(loan_no)
-        if not loan_data:
-            return jsonify({'error': 'Loan not found'}), 404
-        
-        # Check if loan is already approved
-        if loan_data['status'] == 'approved':
-            return jsonify({'error': 'Loan is already approved'}), 400
-        
-        # Approve the loan
-        loan = Loan(
-            loan_no=loan_no,
-            status=loan_data['status']
-        )
-        loan.approve()
-        
-        # Get updated loan data
-        updated_loan = Loan.get_by_id(loan_no)
+        with db.session() as session:
+            # Check if loan exists
+            loan_data = Loan.get_by_id(loan_no, session=session)
+            if not loan_data:
+                return jsonify({'error': 'Loan not found'}), 404
+            
+            # Check if loan is already approved
+            if loan_data['status'] == 'approved':
+                return jsonify({'error': 'Loan is already approved'}), 400
+            
+            # Approve the loan
+            loan = Loan(
+                loan_no=loan_no,
+                status=loan_data['status']
+            )
+            loan.approve(session=session)
+            
+            # Get updated loan data
+            updated_loan = Loan.get_by_id(loan_no, session=session)
         
         return jsonify({
             'message': 'Loan approved successfully',
-            'loan': {
-                'loan_no': updated_loan['loan_no'],
-                'branch_name': updated_loan['branch_name'],
-                'amount': float(updated_loan['amount']),
-                'status': updated_loan['status'],
-                'installments_remaining': updated_loan['installments_remaining'],
-                'customer': {
-                    'cust_id': updated_loan['cust_id'],
-                    'cust_name': updated_loan['cust_name']
-                }
-            }
+            'loan': format_loan(updated_loan)
         }), 200
         
     except Exception as e:
@@ -134,7 +125,7 @@ def get_remaining_installments(loan_no):
         return jsonify({
             'loan_no': loan['loan_no'],
             'installments_remaining': loan['installments_remaining'],
-            'amount': float(loan['amount']),
+            'amount': loan['amount'],
             'status': loan['status'],
             'customer': {
                 'cust_id': loan['cust_id'],
@@ -155,32 +146,33 @@ def update_installments(loan_no):
         if 'installments_remaining' not in data:
             return jsonify({'error': 'Missing installments_remaining field'}), 400
         
-        # Check if loan exists
-        loan_data = Loan.get_by_id(loan_no)
-        if not loan_data:
-            return jsonify({'error': 'Loan not found'}), 404
-        
-        # Validate installments
-        new_installments = data['installments_remaining']
-        if new_installments < 0:
-            return jsonify({'error': 'Installments remaining cannot be negative'}), 400
-        
-        # Update installments
-        loan = Loan(
-            loan_no=loan_no,
-            installments_remaining=loan_data['installments_remaining']
-        )
-        loan.update_installments(new_installments)
-        
-        # Get updated loan data
-        updated_loan = Loan.get_by_id(loan_no)
+        with db.session() as session:
+            # Check if loan exists
+            loan_data = Loan.get_by_id(loan_no, session=session)
+            if not loan_data:
+                return jsonify({'error': 'Loan not found'}), 404
+            
+            # Validate installments
+            new_installments = data['installments_remaining']
+            if new_installments < 0:
+                return jsonify({'error': 'Installments remaining cannot be negative'}), 400
+            
+            # Update installments
+            loan = Loan(
+                loan_no=loan_no,
+                installments_remaining=loan_data['installments_remaining']
+            )
+            loan.update_installments(new_installments, session=session)
+            
+            # Get updated loan data
+            updated_loan = Loan.get_by_id(loan_no, session=session)
         
         return jsonify({
             'message': 'Installments updated successfully',
             'loan': {
                 'loan_no': updated_loan['loan_no'],
                 'installments_remaining': updated_loan['installments_remaining'],
-                'amount': float(updated_loan['amount']),
+                'amount': updated_loan['amount'],
                 'status': updated_loan['status']
             }
         }), 200
@@ -191,63 +183,69 @@ def update_installments(loan_no):
 
 @loans_bp.route('/loans', methods=['GET'])
 def list_loans():
-    """List all loans"""
+    """
+    List loans ordered by loan number.
+    
+    Optional filters: ``status``, ``branch_name``, ``cust_id``,
+    ``min_amount``, ``max_amount``. Paginated with ``limit`` and ``after``
+    (pass back ``next_cursor``).
+    """
     try:
-        loans = Loan.get_all()
-        
-        loan_list = []
-        for loan in loans:
-            loan_list.append({
-                'loan_no': loan['loan_no'],
-                'branch_name': loan['branch_name'],
-                'amount': float(loan['amount']),
-                'status': loan['status'],
-                'installments_remaining': loan['installments_remaining'],
-                'customer': {
-                    'cust_id': loan['cust_id'],
-                    'cust_name': loan['cust_name']
-                }
-            })
+        status = request.args.get('status')
+        if status is not None and status not in LOAN_STATUSES:
+            return jsonify({'error': 'Invalid status. Use: pending, approved, or rejected'}), 400
         
-        return jsonify({
-            'loans': loan_list,
-            'total': len(loan_list)
-        }), 200
+        return jsonify(_loan_page(status)), 200
         
+    except ValueError:
+        return jsonify({'error': 'Invalid filter or pagination parameter'}), 400
     except Exception as e:
         logging.error(f"Error listing loans: {e}")
         return jsonify({'error': 'Failed to list loans'}), 500
 
+@loans_bp.route('/loans/export', methods=['GET'])
+def export_loans():
+    """Stream loans as CSV or NDJSON (``format``), with the same filters as GET /loans"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        status = request.args.get('status')
+        if status is not None and status not in LOAN_STATUSES:
+            return jsonify({'error': 'Invalid status. Use: pending, approved, or rejected'}), 400
+        
+        rows = Loan.iter_find(chunk_size=Config.STREAM_CHUNK_SIZE, **loan_filters(request.args, status))
+        writer = ExportWriter(EXPORT_COLUMNS['loans'], file_format, compress)
+        return Response(
+            export_stream(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('loans', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format or filter'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting loans: {e}")
+        return jsonify({'error': 'Failed to export loans'}), 500
+
 @loans_bp.route('/loans/status/<status>', methods=['GET'])
 def get_loans_by_status(status):
     """Get loans by status (pending, approved, rejected)"""
     try:
-        if status not in ['pending', 'approved', 'rejected']:
+        if status not in LOAN_STATUSES:
             return jsonify({'error': 'Invalid status. Use: pending, approved, or rejected'}), 400
         
-        loans = Loan.get_all()
-        filtered_loans = [loan for loan in loans if loan['status'] == status]
-        
-        loan_list = []
-        for loan in filtered_loans:
-            loan_list.append({
-                'loan_no': loan['loan_no'],
-                'branch_name': loan['branch_name'],
-                'amount': float(loan['amount']),
-                'status': loan['status'],
-                'installments_remaining': loan['installments_remaining'],
-                'customer': {
-                    'cust_id': loan['cust_id'],
-                    'cust_name': loan['cust_name']
-                }
-            })
+        page = _loan_page(status)
+        page['status'] = status
         
-        return jsonify({
-            'loans': loan_list,
-            'total': len(loan_list),
-            'status': status
-        }), 200
+        return jsonify(page), 200
         
+    except ValueError:
+        return jsonify({'error': 'Invalid filter or pagination parameter'}), 400
     except Exception as e:
         logging.error(f"Error fetching loans by status: {e}")
         return jsonify({'error': 'Failed to fetch loans by status'}), 500
+
+def _loan_page(status):
+    """Run Loan.find with the request's filters and shape one page of results"""
+    limit = page_limit(request.args)
+    loans = Loan.find(limit=limit + 1, **loan_filters(request.args, status))
+    return loan_page(loans, limit)
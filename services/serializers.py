@@ -0,0 +1,128 @@
+from models.money import money_or_zero
+from decimal import Decimal
+import json
+
+try:
+    import orjson
+    from orjson import Fragment  # Raw JSON for exact Decimal (orjson >= 3.9)
+except ImportError:
+    orjson = None
+
+# Row-to-JSON serialization shared by the Flask and ASGI services.
+#
+# A RowSerializer describes one resource's response shape once and compiles
+# it into a plain function per column order, so turning a cursor row into its
+# JSON object is a single dict literal indexing the tuple directly, with no
+# per-row lookups of field names or formatting rules.
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+CONVERTERS = {
+    'money_or_zero': money_or_zero,
+    'iso': _iso
+}
+
+class RowSerializer:
+    """
+    Precompiled converter from database rows to JSON-ready dicts.
+    
+    ``shape`` maps output keys to a column name, a (column, converter) pair
+    with a converter from CONVERTERS, or a nested shape. ``rows(columns,
+    rows)`` serializes tuple rows in the given column order; ``mapping``
+    serializes one dictionary row (cached reads, detail endpoints).
+    """
+    def __init__(self, shape):
+        self.shape = shape
+        self._compiled = {}
+        self.mapping = self._compile(None)
+    
+    def for_columns(self, columns):
+        """Compiled function for tuple rows in ``columns`` order (built once per order)"""
+        columns = tuple(columns)
+        if columns not in self._compiled:
+            self._compiled[columns] = self._compile(columns)
+        return self._compiled[columns]
+    
+    def rows(self, columns, rows):
+        serialize = self.for_columns(columns)
+        return [serialize(row) for row in rows]
+    
+    def _compile(self, columns):
+        def accessor(column):
+            if columns is None:
+                return f"row[{column!r}]"
+            return f"row[{columns.index(column)}]"
+        
+        def literal(shape):
+            items = []
+            for key, spec in shape.items():
+                if isinstance(spec, dict):
+                    value = literal(spec)
+                elif isinstance(spec, tuple):
+                    column, converter = spec
+                    value = f"_{converter}({accessor(column)})"
+                else:
+                    value = accessor(spec)
+                items.append(f"{key!r}: {value}")
+            return "{" + ", ".join(items) + "}"
+        
+        source = f"def serialize(row):\n    return {literal(self.shape)}\n"
+        namespace = {f"_{name}": converter for name, converter in CONVERTERS.items()}
+        exec(compile(source, f"<serializer {sorted(self.shape)}>", 'exec'), namespace)
+        return namespace['serialize']
+
+def dumps(obj, default=None, sort_keys=False):
+    """
+    Encode a response body, with orjson when it is installed.
+    
+    Decimal amounts are written as JSON numbers with their exact digits
+    (``12.50``), never via float. ``default`` handles anything else
+    (datetime included, so both encoders format it the same way).
+    """
+    if orjson is not None:
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default(default, _decimal_fragment), option=option).decode()
+    
+    # json.dumps builds a new encoder whenever it is given options, so keep
+    # one per (default, sort_keys)
+    key = (default, sort_keys)
+    encoder = _encoders.get(key)
+    if encoder is None:
+        encoder = _encoders[key] = json.JSONEncoder(
+            default=_default(default, _decimal_float), sort_keys=sort_keys, separators=(',', ':')
+        )
+    return encoder.encode(obj)
+
+def loads(data, **kwargs):
+    """Decode a request body, reading non-integer numbers as Decimal"""
+    if kwargs:
+        kwargs.setdefault('parse_float', Decimal)
+        return json.loads(data, **kwargs)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode(json.detect_encoding(data), 'surrogatepass')
+    return _decoder.decode(data)
+
+_encoders = {}
+_decoder = json.JSONDecoder(parse_float=Decimal)
+
+def _decimal_fragment(value):
+    return Fragment(str(value))
+
+def _decimal_float(value):
+    # The stdlib encoder has no raw-number hook. DECIMAL(15, 2) values have
+    # at most 15 significant digits, which a float's shortest repr keeps
+    # exactly; larger aggregates need orjson to stay exact.
+    return float(value)
+
+def _default(default, decimal):
+    """``default`` hook that encodes Decimal before deferring to the caller's"""
+    def encode(value):
+        if isinstance(value, Decimal):
+            return decimal(value)
+        if default is None:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        return default(value)
+    return encode
@@ -1,14 +1,27 @@
-from flask import Blueprint, request, jsonify
-from models.transaction import Transaction
+from flask import Blueprint, Response, request, jsonify
+from models.transaction import Transaction, TRANSACTION_LIST_COLUMNS
 from models.account import Account
-from decimal import Decimal
+from models.account_stats import AccountStats
+from models.ledger import Ledger, AccountNotFoundError, InsufficientBalanceError
+from models.money import parse_money
+from models.ledger_queue import ledger_queue
+from services.idempotency import idempotent
+from services.serializers import dumps
+from services.common import (
+    page_limit, decode_cursor, row_cursor, history_query, split_history_page,
+    format_transaction, format_transactions, format_history, format_account_overview, format_summary,
+    parse_account_number, parse_transfer_batch, format_batch_outcome, batch_summary,
+    EXPORT_COLUMNS, EXPORT_MIMETYPES, ExportWriter, export_options, export_headers, export_stream
+)
+from config import Config
 import logging
 
 transactions_bp = Blueprint('transactions', __name__)
 
 @transactions_bp.route('/transactions/deposit', methods=['POST'])
-def deposit_money():
-    """Deposit money to an account"""
+@idempotent
+def deposit_money(session=None):
+    """Deposit money to an account (retry-safe with an Idempotency-Key header)"""
     try:
         data = request.get_json()
         
@@ -18,42 +31,30 @@ def deposit_money():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        acc_no = data['acc_no']
-        amount = Decimal(str(data['amount']))
+        try:
+            acc_no = parse_account_number(data['acc_no'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        amount = parse_money(data['amount'])
         
         # Validate amount
         if amount <= 0:
             return jsonify({'error': 'Deposit amount must be positive'}), 400
         
-        # Check if account exists
-        account_data = Account.get_by_id(acc_no)
-        if not account_data:
+        # Apply the credit and ledger insert atomically
+        try:
+            change = Ledger.deposit(acc_no, amount, session=session)
+        except AccountNotFoundError:
             return jsonify({'error': 'Account not found'}), 404
         
-        # Calculate new balance
-        current_balance = Decimal(str(account_data['balance']))
-        new_balance = current_balance + amount
-        
-        # Update account balance
-        account = Account(
-            acc_no=acc_no,
-            branch_name=account_data['branch_name'],
-            balance=new_balance,
-            cust_id=account_data['cust_id']
-        )
-        account.update_balance(float(new_balance))
-        
-        # Create transaction record
-        transaction = Transaction.create(acc_no, 'deposit', float(amount))
-        
         return jsonify({
             'message': 'Deposit successful',
-            'transaction': transaction.to_dict(),
+            'transaction': change.transaction.to_dict(),
             'account': {
                 'acc_no': acc_no,
-                'previous_balance': float(current_balance),
-                'new_balance': float(new_balance),
-                'deposited_amount': float(amount)
+                'previous_balance': change.previous_balance,
+                'new_balance': change.new_balance,
+                'deposited_amount': amount
             }
         }), 200
         
@@ -64,8 +65,9 @@ def deposit_money():
         return jsonify({'error': 'Failed to process deposit'}), 500
 
 @transactions_bp.route('/transactions/withdraw', methods=['POST'])
-def withdraw_money():
-    """Withdraw money from an account"""
+@idempotent
+def withdraw_money(session=None):
+    """Withdraw money from an account (retry-safe with an Idempotency-Key header)"""
     try:
         data = request.get_json()
         
@@ -75,50 +77,36 @@ def withdraw_money():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        acc_no = data['acc_no']
-        amount = Decimal(str(data['amount']))
+        try:
+            acc_no = parse_account_number(data['acc_no'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        amount = parse_money(data['amount'])
         
         # Validate amount
         if amount <= 0:
             return jsonify({'error': 'Withdrawal amount must be positive'}), 400
         
-        # Check if account exists
-        account_data = Account.get_by_id(acc_no)
-        if not account_data:
+        # Apply the conditional debit and ledger insert atomically
+        try:
+            change = Ledger.withdraw(acc_no, amount, session=session)
+        except AccountNotFoundError:
             return jsonify({'error': 'Account not found'}), 404
-        
-        # Check sufficient balance
-        current_balance = Decimal(str(account_data['balance']))
-        if current_balance < amount:
+        except InsufficientBalanceError as e:
             return jsonify({
                 'error': 'Insufficient balance',
-                'current_balance': float(current_balance),
-                'requested_amount': float(amount)
+                'current_balance': e.current_balance,
+                'requested_amount': amount
             }), 400
         
-        # Calculate new balance
-        new_balance = current_balance - amount
-        
-        # Update account balance
-        account = Account(
-            acc_no=acc_no,
-            branch_name=account_data['branch_name'],
-            balance=new_balance,
-            cust_id=account_data['cust_id']
-        )
-        account.update_balance(float(new_balance))
-        
-        # Create transaction record
-        transaction = Transaction.create(acc_no, 'withdrawal', float(amount))
-        
         return jsonify({
             'message': 'Withdrawal successful',
-            'transaction': transaction.to_dict(),
+            'transaction': change.transaction.to_dict(),
             'account': {
                 'acc_no': acc_no,
-                'previous_balance': float(current_balance),
-                'new_balance': float(new_balance),
-                'withdrawn_amount': float(amount)
+                'previous_balance': change.previous_balance,
+                'new_balance': change.new_balance,
+                'withdrawn_amount': amount
             }
         }), 200
         
@@ -130,74 +118,110 @@ def withdraw_money():
 
 @transactions_bp.route('/transactions/<int:acc_no>', methods=['GET'])
 def get_transaction_history(acc_no):
-    """Get transaction history for a specific account"""
+    """
+    Get transaction history for a specific account, newest first.
+    
+    Supports ``limit``, keyset ``before``/``after`` cursors (from
+    ``next_cursor``/``prev_cursor``) and a ``from``/``to`` date range.
+    """
     try:
+        query = history_query(request.args)
+        if query['before'] and query['after']:
+            return jsonify({'error': 'Use either before or after, not both'}), 400
+        
         # Check if account exists
         account_data = Account.get_by_id(acc_no)
         if not account_data:
             return jsonify({'error': 'Account not found'}), 404
         
-        # Get transaction history
-        transactions = Transaction.get_by_account(acc_no)
+        # Get one page of transaction history; the extra row only tells us
+        # whether another page exists in the direction we were paging
+        limit = query.pop('limit')
+        transactions = Transaction.get_by_account(acc_no, limit=limit + 1, **query)
+        transactions, next_cursor, prev_cursor = split_history_page(
+            transactions, limit, before=query['before'], after=query['after']
+        )
+        
+        # The newest page also shows ledger rows still in this process's
+        # queue (txn_id null until they are flushed)
+        if not query['before'] and not query['after']:
+            transactions = ledger_queue.pending(acc_no, query['date_from'], query['date_to']) + transactions
         
-        # Format transactions
-        transaction_list = []
-        for txn in transactions:
-            transaction_list.append({
-                'txn_id': txn['txn_id'],
-                'type': txn['type'],
-                'amount': float(txn['amount']),
-                'date_time': txn['date_time'].isoformat() if txn['date_time'] else None
-            })
+        transaction_list = format_history(transactions)
         
         return jsonify({
-            'account': {
-                'acc_no': acc_no,
-                'branch_name': account_data['branch_name'],
-                'current_balance': float(account_data['balance']),
-                'customer': {
-                    'cust_id': account_data['cust_id'],
-                    'cust_name': account_data['cust_name']
-                }
-            },
+            'account': format_account_overview(account_data),
             'transactions': transaction_list,
-            'total_transactions': len(transaction_list)
+            'total_transactions': len(transaction_list),
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
         }), 200
         
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor, limit or date'}), 400
     except Exception as e:
         logging.error(f"Error fetching transaction history: {e}")
         return jsonify({'error': 'Failed to fetch transaction history'}), 500
 
 @transactions_bp.route('/transactions', methods=['GET'])
 def get_all_transactions():
-    """Get all transactions across all accounts"""
+    """
+    Get transactions across all accounts, newest first.
+    
+    Paginated by an opaque keyset ``cursor`` (pass back ``next_cursor``) and
+    ``limit``. ``format=ndjson`` streams every row from the cursor onwards
+    as newline-delimited JSON instead.
+    """
     try:
-        transactions = Transaction.get_all()
-        
-        # Format transactions
-        transaction_list = []
-        for txn in transactions:
-            transaction_list.append({
-                'txn_id': txn['txn_id'],
-                'acc_no': txn['acc_no'],
-                'type': txn['type'],
-                'amount': float(txn['amount']),
-                'date_time': txn['date_time'].isoformat() if txn['date_time'] else None,
-                'account_info': {
-                    'branch_name': txn['branch_name'],
-                    'customer_name': txn['cust_name']
-                }
-            })
+        before = decode_cursor(request.args.get('cursor'))
+        
+        if request.args.get('format') == 'ndjson':
+            rows = Transaction.iter_all(before=before, chunk_size=Config.STREAM_CHUNK_SIZE)
+            lines = (dumps(format_transaction(txn)) + '\n' for txn in rows)
+            return Response(lines, mimetype='application/x-ndjson')
+        
+        limit = page_limit(request.args)
+        transactions = Transaction.get_all(limit=limit + 1, before=before)
+        
+        # The extra row only tells us whether another page exists
+        next_cursor = None
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            next_cursor = row_cursor(transactions[-1], TRANSACTION_LIST_COLUMNS)
+        
+        transaction_list = format_transactions(transactions)
         
         return jsonify({
             'transactions': transaction_list,
-            'total_transactions': len(transaction_list)
+            'total_transactions': len(transaction_list),
+            'next_cursor': next_cursor
         }), 200
         
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
     except Exception as e:
         logging.error(f"Error fetching all transactions: {e}")
         return jsonify({'error': 'Failed to fetch transactions'}), 500
 
+@transactions_bp.route('/transactions/export', methods=['GET'])
+def export_transactions():
+    """Stream transactions newest first as CSV or NDJSON (``format``), optionally from a ``cursor``"""
+    try:
+        file_format, compress = export_options(request.args, request.headers)
+        rows = Transaction.iter_all(before=decode_cursor(request.args.get('cursor')), chunk_size=Config.STREAM_CHUNK_SIZE)
+        writer = ExportWriter(EXPORT_COLUMNS['transactions'], file_format, compress)
+        return Response(
+            export_stream(rows, writer),
+            mimetype=EXPORT_MIMETYPES[file_format],
+            headers=export_headers('transactions', file_format, compress)
+        )
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid export format or cursor'}), 400
+    except Exception as e:
+        logging.error(f"Error exporting transactions: {e}")
+        return jsonify({'error': 'Failed to export transactions'}), 500
+
 @transactions_bp.route('/transactions/summary/<int:acc_no>', methods=['GET'])
 def get_account_summary(acc_no):
     """Get account summary with transaction statistics"""
@@ -207,33 +231,13 @@ def get_account_summary(acc_no):
         if not account_data:
             return jsonify({'error': 'Account not found'}), 404
         
-        # Get transaction history
-        transactions = Transaction.get_by_account(acc_no)
-        
-        # Calculate summary statistics
-        total_deposits = sum(float(txn['amount']) for txn in transactions if txn['type'] == 'deposit')
-        total_withdrawals = sum(float(txn['amount']) for txn in transactions if txn['type'] == 'withdrawal')
-        deposit_count = len([txn for txn in transactions if txn['type'] == 'deposit'])
-        withdrawal_count = len([txn for txn in transactions if txn['type'] == 'withdrawal'])
+        # Running aggregates maintained by the ledger: one primary-key lookup,
+        # plus any ledger rows still queued in this process
+        stats = AccountStats.merge(AccountStats.get(acc_no), ledger_queue.pending(acc_no))
         
         return jsonify({
-            'account': {
-                'acc_no': acc_no,
-                'branch_name': account_data['branch_name'],
-                'current_balance': float(account_data['balance']),
-                'customer': {
-                    'cust_id': account_data['cust_id'],
-                    'cust_name': account_data['cust_name']
-                }
-            },
-            'summary': {
-                'total_deposits': total_deposits,
-                'total_withdrawals': total_withdrawals,
-                'deposit_count': deposit_count,
-                'withdrawal_count': withdrawal_count,
-                'total_transactions': len(transactions),
-                'net_change': total_deposits - total_withdrawals
-            }
+            'account': format_account_overview(account_data),
+            'summary': format_summary(stats)
         }), 200
         
     except Exception as e:
@@ -241,8 +245,9 @@ def get_account_summary(acc_no):
         return jsonify({'error': 'Failed to generate account summary'}), 500
 
 @transactions_bp.route('/transactions/transfer', methods=['POST'])
-def transfer_money():
-    """Transfer money between accounts"""
+@idempotent
+def transfer_money(session=None):
+    """Transfer money between accounts (retry-safe with an Idempotency-Key header)"""
     try:
         data = request.get_json()
         
@@ -252,9 +257,12 @@ def transfer_money():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        from_acc_no = data['from_acc_no']
-        to_acc_no = data['to_acc_no']
-        amount = Decimal(str(data['amount']))
+        try:
+            from_acc_no = parse_account_number(data['from_acc_no'])
+            to_acc_no = parse_account_number(data['to_acc_no'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        amount = parse_money(data['amount'])
         
         # Validate amount
         if amount <= 0:
@@ -264,69 +272,38 @@ def transfer_money():
         if from_acc_no == to_acc_no:
             return jsonify({'error': 'Cannot transfer to the same account'}), 400
         
-        # Check if both accounts exist
-        from_account_data = Account.get_by_id(from_acc_no)
-        to_account_data = Account.get_by_id(to_acc_no)
-        
-        if not from_account_data:
-            return jsonify({'error': 'Source account not found'}), 404
-        
-        if not to_account_data:
+        # Debit, credit and both ledger rows commit or roll back together
+        try:
+            debit, credit = Ledger.transfer(from_acc_no, to_acc_no, amount, session=session)
+        except AccountNotFoundError as e:
+            if e.acc_no == from_acc_no:
+                return jsonify({'error': 'Source account not found'}), 404
             return jsonify({'error': 'Destination account not found'}), 404
-        
-        # Check sufficient balance in source account
-        from_balance = Decimal(str(from_account_data['balance']))
-        if from_balance < amount:
+        except InsufficientBalanceError as e:
             return jsonify({
                 'error': 'Insufficient balance in source account',
-                'current_balance': float(from_balance),
-                'requested_amount': float(amount)
+                'current_balance': e.current_balance,
+                'requested_amount': amount
             }), 400
         
-        # Calculate new balances
-        new_from_balance = from_balance - amount
-        to_balance = Decimal(str(to_account_data['balance']))
-        new_to_balance = to_balance + amount
-        
-        # Update both account balances
-        from_account = Account(
-            acc_no=from_acc_no,
-            branch_name=from_account_data['branch_name'],
-            balance=new_from_balance,
-            cust_id=from_account_data['cust_id']
-        )
-        from_account.update_balance(float(new_from_balance))
-        
-        to_account = Account(
-            acc_no=to_acc_no,
-            branch_name=to_account_data['branch_name'],
-            balance=new_to_balance,
-            cust_id=to_account_data['cust_id']
-        )
-        to_account.update_balance(float(new_to_balance))
-        
-        # Create transaction records
-        withdrawal_txn = Transaction.create(from_acc_no, 'transfer_out', float(amount))
-        deposit_txn = Transaction.create(to_acc_no, 'transfer_in', float(amount))
-        
         return jsonify({
             'message': 'Transfer successful',
             'transfer_details': {
                 'from_account': {
                     'acc_no': from_acc_no,
-                    'previous_balance': float(from_balance),
-                    'new_balance': float(new_from_balance)
+                    'previous_balance': debit.previous_balance,
+                    'new_balance': debit.new_balance
                 },
                 'to_account': {
                     'acc_no': to_acc_no,
-                    'previous_balance': float(to_balance),
-                    'new_balance': float(new_to_balance)
+                    'previous_balance': credit.previous_balance,
+                    'new_balance': credit.new_balance
                 },
-                'amount': float(amount)
+                'amount': amount
             },
             'transactions': [
-                withdrawal_txn.to_dict(),
-                deposit_txn.to_dict()
+                debit.transaction.to_dict(),
+                credit.transaction.to_dict()
             ]
         }), 200
         
@@ -335,3 +312,32 @@ def transfer_money():
     except Exception as e:
         logging.error(f"Error processing transfer: {e}")
         return jsonify({'error': 'Failed to process transfer'}), 500
+
+@transactions_bp.route('/transactions/transfers:batch', methods=['POST'])
+def transfer_money_batch():
+    """Apply many transfers in one request with grouped commits"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('transfers'), list):
+            return jsonify({'error': 'Missing required field: transfers'}), 400
+        
+        items = data['transfers']
+        if len(items) > Config.BATCH_TRANSFER_MAX_ITEMS:
+            return jsonify({
+                'error': f'Batch too large (max {Config.BATCH_TRANSFER_MAX_ITEMS} transfers)'
+            }), 400
+        
+        # Validate every item up front; only valid ones reach the database
+        results, valid_indexes, valid_transfers = parse_transfer_batch(items)
+        
+        outcomes = Ledger.transfer_batch(valid_transfers, commit_size=Config.BATCH_TRANSFER_COMMIT_SIZE)
+        
+        for index, transfer, outcome in zip(valid_indexes, valid_transfers, outcomes):
+            results[index] = format_batch_outcome(index, transfer, outcome)
+        
+        return jsonify(batch_summary(results)), 200
+        
+    except Exception as e:
+        logging.error(f"Error processing transfer batch: {e}")
+        return jsonify({'error': 'Failed to process transfer batch'}), 500
@@ -0,0 +1,70 @@
+"""
+Account numbers in request bodies must be integers: the body is decoded
+with parse_float=Decimal, so {"acc_no": 12.5} arrives as Decimal('12.5'),
+which int() would truncate to account 12. Both the Flask services and
+their asgi counterparts validate through services.common before any
+database access, so these requests never need MySQL.
+"""
+
+from decimal import Decimal
+import asyncio
+import pytest
+
+pytest.importorskip('mysql.connector')
+
+from services.common import parse_account_number, parse_transfer_batch
+
+INVALID = [Decimal('12.5'), Decimal('12.0'), 12.5, 12.0, True, '12abc', '12.5', ' 12', '', None, [12]]
+
+POSTINGS = [
+    ('/api/transactions/deposit', {'acc_no': Decimal('12.5'), 'amount': 10}),
+    ('/api/transactions/withdraw', {'acc_no': Decimal('12.5'), 'amount': 10}),
+    ('/api/transactions/transfer', {'from_acc_no': Decimal('12.5'), 'to_acc_no': 7, 'amount': 10}),
+    ('/api/transactions/transfer', {'from_acc_no': 7, 'to_acc_no': Decimal('12.5'), 'amount': 10})
+]
+
+def body(data):
+    return '{' + ', '.join(f'"{key}": {value}' for key, value in data.items()) + '}'
+
+@pytest.mark.parametrize('value', [12, '12'])
+def test_integer_account_numbers_are_accepted(value):
+    assert parse_account_number(value) == 12
+
+@pytest.mark.parametrize('value', INVALID)
+def test_other_account_numbers_are_rejected(value):
+    with pytest.raises(ValueError):
+        parse_account_number(value)
+
+def test_batch_rejects_fractional_account_numbers():
+    items = [
+        {'from_acc_no': Decimal('12.5'), 'to_acc_no': 7, 'amount': Decimal('10')},
+        {'from_acc_no': 7, 'to_acc_no': Decimal('12.5'), 'amount': Decimal('10')},
+        {'from_acc_no': 7, 'to_acc_no': 12, 'amount': Decimal('10')}
+    ]
+    results, valid_indexes, valid_transfers = parse_transfer_batch(items)
+    assert [result['status'] for result in results[:2]] == ['failed', 'failed']
+    assert valid_indexes == [2]
+    assert valid_transfers == [(7, 12, Decimal('10'))]
+
+@pytest.mark.parametrize('path, data', POSTINGS)
+def test_flask_rejects_fractional_account_numbers(path, data):
+    pytest.importorskip('flask')
+    from app import create_app
+    
+    client = create_app(['transactions']).test_client()
+    response = client.post(path, data=body(data), content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid account number'}
+
+@pytest.mark.parametrize('path, data', POSTINGS)
+def test_asgi_rejects_fractional_account_numbers(path, data):
+    pytest.importorskip('quart')
+    pytest.importorskip('aiomysql')
+    from asgi.app import create_app
+    
+    async def post():
+        client = create_app(['transactions']).test_client()
+        response = await client.post(path, data=body(data), headers={'Content-Type': 'application/json'})
+        return response.status_code, await response.get_json()
+    
+    assert asyncio.run(post()) == (400, {'error': 'Invalid account number'})
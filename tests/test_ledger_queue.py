@@ -0,0 +1,106 @@
+"""
+Queued ledger rows of an account deleted before they were flushed must be
+dropped: the flush would otherwise fail on the AccountStats foreign key,
+roll back and retry the same batch forever. MySQL is replaced by a fake
+that understands the flusher's statements.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+import pytest
+
+pytest.importorskip('mysql.connector')
+
+from mysql.connector import Error
+from models import ledger_queue as ledger_queue_module
+from models.ledger_queue import LedgerQueue
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+    
+    def execute(self, query, params=()):
+        self.rows = []
+        if 'SELECT acc_no, ledger_marker FROM Account' in query:
+            self.rows = [(acc_no, self.database.heads[acc_no]) for acc_no in params if acc_no in self.database.heads]
+        elif 'SELECT acc_no FROM Account' in query:
+            self.rows = [(acc_no,) for acc_no in params if acc_no in self.database.heads]
+        elif 'SELECT flushed_offset FROM LedgerQueueOffset' in query:
+            offset = self.database.offsets.get(params[0])
+            self.rows = [(offset,)] if offset is not None else []
+        elif 'INSERT INTO LedgerQueueOffset' in query:
+            self.database.offsets[params[0]] = params[1]
+    
+    def executemany(self, query, rows):
+        self.database.inserted.extend(rows)
+    
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+    
+    def fetchall(self):
+        return self.rows
+
+class FakeDatabase:
+    def __init__(self, heads):
+        self.heads = heads  # acc_no -> ledger_marker
+        self.offsets = {}
+        self.inserted = []
+        self.recorded = []
+    
+    @contextmanager
+    def cursor(self, session=None, dictionary=False, transaction=False):
+        yield FakeCursor(self)
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase({1: None, 2: None})
+    monkeypatch.setattr(ledger_queue_module, 'db', database)
+    monkeypatch.setattr(ledger_queue_module.AccountStats, 'record', lambda cursor, entries: database.recorded.extend(entries))
+    return database
+
+@pytest.fixture
+def queue(tmp_path, database):
+    queue = LedgerQueue(str(tmp_path), True)
+    queue._open_segment()
+    yield queue
+    queue._file.close()
+
+def post(queue, database, marker, entries):
+    """Queue and commit one balance change of (acc_no, type, amount, prev) entries"""
+    now = datetime.now()
+    queue.append(marker, [(acc_no, txn_type, amount, now, prev) for acc_no, txn_type, amount, prev in entries])
+    for acc_no, *_ in entries:
+        database.heads[acc_no] = marker
+    queue.committed(marker)
+
+def test_rows_of_deleted_accounts_are_dropped(queue, database):
+    post(queue, database, 'a' * 32, [(1, 'deposit', Decimal('5'), None)])
+    post(queue, database, 'b' * 32, [(2, 'transfer_out', Decimal('2'), None), (1, 'transfer_in', Decimal('2'), 'a' * 32)])
+    del database.heads[2]
+    
+    assert queue.flush() == 3
+    assert [(row[0], row[1]) for row in database.inserted] == [(1, 'deposit'), (1, 'transfer_in')]
+    assert database.recorded == [(1, 'deposit', Decimal('5')), (1, 'transfer_in', Decimal('2'))]
+    assert database.offsets[queue._segment] == queue._written
+    assert queue.pending(2) == []
+    assert queue.stats()['dropped'] == 1
+
+def test_delete_racing_the_flush_is_dropped_on_retry(queue, database, monkeypatch):
+    post(queue, database, 'a' * 32, [(2, 'deposit', Decimal('5'), None)])
+    
+    def deleted_meanwhile(cursor, entries):
+        # The account is deleted after the flusher checked it exists
+        del database.heads[2]
+        raise Error("Cannot add or update a child row: a foreign key constraint fails")
+    
+    monkeypatch.setattr(ledger_queue_module.AccountStats, 'record', deleted_meanwhile)
+    with pytest.raises(Error):
+        queue.flush()
+    assert len(queue.pending(2)) == 1
+    
+    database.inserted.clear()
+    assert queue.flush() == 1
+    assert database.inserted == []
+    assert queue.stats()['pending'] == 0
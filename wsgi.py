@@ -0,0 +1,5 @@
+from app import create_app
+
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+# BANKING_SERVICES selects the blueprints (e.g. "transactions" per container)
+app = create_app()